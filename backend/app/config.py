@@ -18,6 +18,13 @@ class Settings(BaseSettings):
 
     # ── Database (Supabase PostgreSQL) ────────────────────────────────────────
     DATABASE_URL: str  # postgresql://postgres.[ref]:[password]@[host]:5432/postgres
+    PROCESS_ROLE: str = "api"             # api | worker | script — selects default pool sizes
+    DB_POOL_SIZE: Optional[int] = None    # per process; 0 = no client-side pool (NullPool)
+    DB_MAX_OVERFLOW: Optional[int] = None
+    DB_POOL_TIMEOUT: int = 10             # seconds to wait for a pooled connection
+    DB_POOL_RECYCLE: int = 1800
+    DB_PGBOUNCER_TRANSACTION_MODE: bool = False  # no session-level state on connections
+    DB_STATEMENT_TIMEOUT_MS: int = 0      # 0 = server default
 
     # ── Supabase ─────────────────────────────────────────────────────────────
     SUPABASE_URL: str
@@ -31,11 +38,44 @@ class Settings(BaseSettings):
     OPENAI_EMBEDDING_MODEL: str = "text-embedding-3-small"
     OPENAI_CHAT_MODEL: str = "gpt-4o"
     EMBEDDING_DIMENSIONS: int = 1536
+    OPENAI_EMBEDDING_RPM: int = 3000      # account rate limits for the embedding model
+    OPENAI_EMBEDDING_TPM: int = 1_000_000
+    EMBEDDING_BATCH_MAX_TOKENS: int = 250_000  # per request; the API rejects inputs totalling > 300k
+    EMBEDDING_MAX_CONCURRENCY: int = 4    # upper bound of the AIMD in-flight window
+    EMBEDDING_MAX_RETRIES: int = 6        # per sub-batch, on 429 / 5xx / connection errors
     RAG_TOP_K: int = 6
+    RAG_CONTEXT_TOKEN_BUDGET: int = 3000  # max prompt tokens spent on retrieved context
+
+    # ── Chunking ─────────────────────────────────────────────────────────────
+    CHUNK_MAX_CHARS: int = 1200
+    CHUNK_MIN_CHARS: int = 300            # don't close a chunk below this just to keep a block whole
+    CHUNK_OVERLAP_CHARS: int = 200        # max length of the sentence repeated across a split
+    PDF_EXTRACT_WORKERS: int = 0          # process-pool size for page text extraction; 0 = CPU count
+    PDF_EXTRACT_POOL_MIN_PAGES: int = 24  # smaller PDFs are extracted in-process
+
+    # ── Background work ──────────────────────────────────────────────────────
+    PREGENERATE_QUESTION_COUNTS: List[int] = []  # e.g. [10, 20]: warm question cache after ingestion
+    ITEM_CALIBRATION_MIN_RESPONSES: int = 30   # submissions of a question set before it is calibrated
+    ITEM_CALIBRATION_INTERVAL_SECONDS: int = 86400  # celery beat runs calibrate_items this often; 0 = never
+    INGESTION_JOB_STALE_SECONDS: int = 1800    # a pending/processing job older than this is no longer joined
 
     # ── Cache ────────────────────────────────────────────────────────────────
     REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_MAX_CONNECTIONS: int = 20       # per process, for the cache client
+    REDIS_POOL_TIMEOUT: float = 2.0       # seconds to wait for a free connection
     CACHE_TTL_SECONDS: int = 604800       # 7 days
+    CACHE_CIRCUIT_FAILURE_THRESHOLD: int = 5   # consecutive Redis connection errors/timeouts before fast-failing
+    CACHE_CIRCUIT_RESET_SECONDS: float = 5.0   # interval between background pings while the circuit is open
+    CACHE_CODEC: str = "orjson"           # "json" | "orjson" | "msgpack"; existing entries decode regardless
+    CACHE_COMPRESSION: str = "zstd"       # "zstd" | "zlib" | "none"
+    CACHE_COMPRESSION_MIN_BYTES: int = 1024
+    # In-process L1 in front of Redis, kept coherent via pub/sub. Enable it
+    # on every process that writes the cache, or their writes won't invalidate.
+    CACHE_L1_ENABLED: bool = False
+    CACHE_L1_MAX_ENTRIES: int = 1024      # per process
+    CACHE_L1_MAX_BYTES: int = 67108864    # 64 MB of encoded values per process
+    CACHE_L1_TTL_SECONDS: int = 60        # upper bound on staleness if an invalidation is lost
+    CACHE_INVALIDATION_CHANNEL: str = "cache:invalidate"
 
     # ── Storage (AWS S3 for PDFs) ─────────────────────────────────────────────
     STORAGE_MODE: str = "s3"             # "local" | "s3"
@@ -51,11 +91,27 @@ class Settings(BaseSettings):
     FREE_TESTS_PER_WEEK: int = 3
     BASIC_TESTS_PER_WEEK: int = 20
     PREMIUM_TESTS_PER_WEEK: int = 100
+    USAGE_FLUSH_INTERVAL_SECONDS: float = 30.0   # write-behind of Redis usage counters to Postgres (0 = off)
 
     # ── Rate Limiting ─────────────────────────────────────────────────────────
     RATE_LIMIT_REQUESTS: int = 200
     RATE_LIMIT_WINDOW_SECONDS: int = 3600
 
+    # ── Internal endpoints ───────────────────────────────────────────────────
+    INTERNAL_API_TOKEN: Optional[str] = None  # enables /internal/* and /metrics; X-Internal-Token or Bearer
+    WORKER_METRICS_PORT: int = 0          # Celery workers serve Prometheus metrics here; 0 = off
+
+    # ── Profiling (per request, see app/core/profiling.py) ───────────────────
+    PROFILING_ENABLED: bool = True        # kill switch for X-Profile-Token and /admin/profiling/arm
+    PROFILING_INTERVAL_MS: float = 1.0    # pyinstrument sampling interval
+    PROFILING_RETENTION_SECONDS: int = 86400
+
+    # ── Tracing (OpenTelemetry, opt-in) ──────────────────────────────────────
+    OTEL_ENABLED: bool = False
+    OTEL_EXPORTER: str = "otlp"           # otlp | console | file
+    OTEL_FILE_PATH: str = "otel-spans.log"
+    OTEL_SAMPLE_RATIO: float = 1.0        # head sampling for new traces; children follow the parent
+
     # ── CORS ─────────────────────────────────────────────────────────────────
     ALLOWED_ORIGINS: List[str] = ["http://localhost:3000"]
     ALLOWED_ORIGIN_REGEX: Optional[str] = None
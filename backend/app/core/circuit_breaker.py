@@ -0,0 +1,138 @@
+"""Consecutive-failure circuit breaker with a background half-open probe.
+
+closed     calls go through; failure_threshold consecutive failures trip
+           the breaker
+open       calls are refused immediately (allow() is False) — callers
+           degrade as if the dependency had missed, without waiting on
+           socket timeouts
+half_open  a background thread is probing the dependency; calls are still
+           refused. A successful probe closes the breaker; a failed one
+           re-opens it for another reset_seconds
+
+Requests never act as the probe, so no request pays for finding out that
+the dependency is still down.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        probe: Callable[[], Any],
+        failure_threshold: int,
+        reset_seconds: float,
+        on_transition: Optional[Callable[[str, str], None]] = None,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._probe = probe
+        self._on_transition = on_transition
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._last_error: Optional[str] = None
+        self._trips = 0
+        self._rejected = 0
+        self._pid = os.getpid()
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        """True if a call may go to the dependency; lock-free on the hot path."""
+        if self._state == CLOSED:
+            return True
+        if self._pid != os.getpid():
+            self._reset_after_fork()
+            return True
+        self._rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        if self._failures:
+            with self._lock:
+                self._failures = 0
+
+    def record_failure(self, exc: BaseException) -> None:
+        with self._lock:
+            self._failures += 1
+            self._last_error = repr(exc)
+            if self._state != CLOSED or self._failures < self.failure_threshold:
+                return
+            self._transition(OPEN)
+            self._opened_at = time.time()
+            self._trips += 1
+            self._pid = os.getpid()
+        logger.error(
+            "Circuit %s opened after %d consecutive failures (%s); probing every %.1fs",
+            self.name,
+            self.failure_threshold,
+            exc,
+            self.reset_seconds,
+        )
+        threading.Thread(target=self._probe_until_closed, name=f"circuit-{self.name}", daemon=True).start()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self._state,
+            "consecutive_failures": self._failures,
+            "opened_at": (
+                datetime.fromtimestamp(self._opened_at, timezone.utc).isoformat()
+                if self._opened_at is not None and self._state != CLOSED
+                else None
+            ),
+            "last_error": self._last_error,
+            "trips": self._trips,
+            "rejected_calls": self._rejected,
+        }
+
+    def _probe_until_closed(self) -> None:
+        while True:
+            time.sleep(self.reset_seconds)
+            with self._lock:
+                self._transition(HALF_OPEN)
+            try:
+                self._probe()
+            except Exception as exc:
+                with self._lock:
+                    self._last_error = repr(exc)
+                    self._transition(OPEN)
+                logger.warning("Circuit %s probe failed: %s", self.name, exc)
+                continue
+            with self._lock:
+                self._failures = 0
+                self._opened_at = None
+                self._transition(CLOSED)
+            logger.info("Circuit %s closed; dependency is reachable again", self.name)
+            return
+
+    def _reset_after_fork(self) -> None:
+        # The probe thread stayed behind in the parent; start this process closed.
+        with self._lock:
+            self._pid = os.getpid()
+            self._failures = 0
+            self._opened_at = None
+            self._transition(CLOSED)
+
+    def _transition(self, state: str) -> None:
+        # Called with the lock held.
+        previous, self._state = self._state, state
+        if self._on_transition is not None and previous != state:
+            self._on_transition(previous, state)
@@ -7,6 +7,11 @@ class AppException(HTTPException):
     pass
 
 
+class BadRequestError(AppException):
+    def __init__(self, detail: str = "Bad request") -> None:
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
 class AuthenticationError(AppException):
     def __init__(self, detail: str = "Could not validate credentials") -> None:
         super().__init__(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail)
@@ -38,3 +43,8 @@ class UsageLimitError(AppException):
 class GenerationError(AppException):
     def __init__(self, detail: str = "Failed to generate content") -> None:
         super().__init__(status_code=status.HTTP_502_BAD_GATEWAY, detail=detail)
+
+
+class ServiceUnavailableError(AppException):
+    def __init__(self, detail: str = "Service temporarily unavailable, please retry shortly") -> None:
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail)
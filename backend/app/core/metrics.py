@@ -0,0 +1,153 @@
+"""Prometheus metrics shared by the API and Celery workers.
+
+Multi-process: when PROMETHEUS_MULTIPROC_DIR is set (uvicorn --workers N,
+Celery prefork), every process writes its samples to that directory and
+render_latest() aggregates them. The directory must be emptied before the
+server starts — see the Dockerfile CMD.
+"""
+from __future__ import annotations
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+_MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+# Stages of POST /tests/generate, in pipeline order.
+GENERATION_STAGES = (
+    "usage_check",
+    "question_cache_lookup",
+    "embedding",
+    "vector_search",
+    "context_build",
+    "openai_completion",
+    "persistence",
+)
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "vidyai_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+GENERATION_STAGE_SECONDS = Histogram(
+    "vidyai_generation_stage_seconds",
+    "Latency of each stage of the test-generation pipeline.",
+    ["stage"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+CACHE_REQUESTS = Counter(
+    "vidyai_cache_requests_total",
+    "Cache lookups by cache and result.",
+    ["cache", "result"],   # cache: rag_context | question | query_embedding; result: hit | miss
+)
+
+CACHE_TIER_EVENTS = Counter(
+    "vidyai_cache_tier_events_total",
+    "CacheService events by tier.",
+    ["tier", "event"],     # l1: hit | miss | eviction | expiration | invalidation; redis: hit | miss | error | short_circuit
+)
+
+CIRCUIT_TRANSITIONS = Counter(
+    "vidyai_circuit_transitions_total",
+    "Circuit-breaker state changes, by the state entered.",
+    ["circuit", "state"],  # state: open | half_open | closed
+)
+
+OPENAI_TOKENS = Counter(
+    "vidyai_openai_tokens_total",
+    "OpenAI tokens consumed.",
+    ["model", "kind"],     # kind: prompt | completion | embedding
+)
+
+INGESTED_CHUNKS = Counter(
+    "vidyai_ingested_chunks_total",
+    "Text chunks embedded and stored by ingestion. rate() gives chunks/s.",
+)
+
+INGESTION_SECONDS = Histogram(
+    "vidyai_ingestion_duration_seconds",
+    "Wall time of one ingestion run (one task attempt).",
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1200, 1800),
+)
+
+INGESTION_THROUGHPUT = Histogram(
+    "vidyai_ingestion_throughput_chunks_per_second",
+    "Chunks embedded per second, per ingestion run.",
+    buckets=(0.5, 1, 2, 5, 10, 20, 50, 100, 200),
+)
+
+
+@contextmanager
+def observe_stage(stage: str) -> Iterator[None]:
+    """Record the wall time of the enclosed block under *stage*."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        GENERATION_STAGE_SECONDS.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def record_cache_tier(tier: str, event: str, count: int = 1) -> None:
+    CACHE_TIER_EVENTS.labels(tier=tier, event=event).inc(count)
+
+
+def record_circuit_transition(circuit: str, state: str) -> None:
+    CIRCUIT_TRANSITIONS.labels(circuit=circuit, state=state).inc()
+
+
+def record_openai_usage(model: str, usage: object, embedding: bool = False) -> None:
+    """Count tokens from an OpenAI response's ``usage`` object (may be None)."""
+    if usage is None:
+        return
+    if embedding:
+        OPENAI_TOKENS.labels(model=model, kind="embedding").inc(getattr(usage, "total_tokens", 0) or 0)
+        return
+    OPENAI_TOKENS.labels(model=model, kind="prompt").inc(getattr(usage, "prompt_tokens", 0) or 0)
+    OPENAI_TOKENS.labels(model=model, kind="completion").inc(getattr(usage, "completion_tokens", 0) or 0)
+
+
+def record_ingestion(chunks: int, seconds: float) -> None:
+    INGESTED_CHUNKS.inc(chunks)
+    INGESTION_SECONDS.observe(seconds)
+    if chunks and seconds > 0:
+        INGESTION_THROUGHPUT.observe(chunks / seconds)
+
+
+def is_multiprocess() -> bool:
+    return bool(os.environ.get(_MULTIPROC_DIR_ENV))
+
+
+def render_latest() -> Tuple[bytes, str]:
+    """Return (body, content type) for a scrape of this process group."""
+    if is_multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    from prometheus_client import REGISTRY
+
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int | None = None) -> None:
+    """Drop a finished process's live-gauge files (no-op outside multiprocess mode)."""
+    if is_multiprocess():
+        multiprocess.mark_process_dead(pid or os.getpid())
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Sequence
+
+import redis
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.pool import QueuePool
+
+# Checkout waits are usually sub-millisecond; anything in the top buckets
+# means the pool is too small for the traffic (or a connection is leaking).
+WAIT_BUCKETS_SECONDS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Thread-safe cumulative histogram with fixed upper bounds (Prometheus-style)."""
+
+    def __init__(self, buckets: Sequence[float] = WAIT_BUCKETS_SECONDS) -> None:
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)   # last slot is +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._counts[bisect_left(self.buckets, value)] += 1
+            self._sum += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative: Dict[str, int] = {}
+        running = 0
+        for bound, count in zip([*map(str, self.buckets), "+Inf"], counts):
+            running += count
+            cumulative[bound] = running
+        return {"buckets": cumulative, "count": running, "sum": round(total, 6)}
+
+
+class PoolWaitStats:
+    """Checkout wait times and timeouts for one connection pool."""
+
+    def __init__(self) -> None:
+        self.wait_seconds = Histogram()
+        self._timeouts = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, timed_out: bool = False) -> None:
+        self.wait_seconds.observe(seconds)
+        if timed_out:
+            with self._lock:
+                self._timeouts += 1
+
+    @property
+    def timeouts(self) -> int:
+        return self._timeouts
+
+
+db_pool_stats = PoolWaitStats()
+redis_pool_stats = PoolWaitStats()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):  # type: ignore[override]
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except sa_exc.TimeoutError:
+            db_pool_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        except Exception:
+            # e.g. the database refusing a new overflow connection: a failed
+            # checkout, but not a pool that stayed full for pool_timeout.
+            db_pool_stats.record(time.perf_counter() - start)
+            raise
+        db_pool_stats.record(time.perf_counter() - start)
+        return conn
+
+
+class PoolExhaustedError(redis.ConnectionError):
+    """No pooled Redis connection became free within the pool timeout.
+
+    A local capacity problem, not evidence that Redis is down: callers that
+    track Redis health (the cache circuit breaker) must not count it.
+    """
+
+
+# redis-py raises a plain ConnectionError with this message when its
+# BlockingConnectionPool queue stays empty for the whole timeout.
+_POOL_EMPTY_MESSAGE = "No connection available"
+
+
+class TimedBlockingConnectionPool(redis.BlockingConnectionPool):
+    """Bounded Redis pool that records how long each checkout waited.
+
+    A checkout that times out raises PoolExhaustedError; failing to connect
+    to Redis still raises redis.ConnectionError.
+    """
+
+    def get_connection(self, *args: Any, **kwargs: Any):
+        start = time.perf_counter()
+        try:
+            conn = super().get_connection(*args, **kwargs)
+        except redis.ConnectionError as exc:
+            if not str(exc).startswith(_POOL_EMPTY_MESSAGE):
+                redis_pool_stats.record(time.perf_counter() - start)
+                raise
+            redis_pool_stats.record(time.perf_counter() - start, timed_out=True)
+            raise PoolExhaustedError(str(exc)) from exc
+        redis_pool_stats.record(time.perf_counter() - start)
+        return conn
+
+
+def db_pool_snapshot(pool: Any) -> Dict[str, Any]:
+    """Current occupancy of a SQLAlchemy pool plus accumulated wait stats."""
+    snapshot: Dict[str, Any] = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        snapshot.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=max(0, pool.overflow()),
+            max_overflow=pool._max_overflow,
+            timeout_seconds=pool.timeout(),
+        )
+    snapshot["timeouts"] = db_pool_stats.timeouts
+    snapshot["wait_seconds"] = db_pool_stats.wait_seconds.snapshot()
+    return snapshot
+
+
+def redis_pool_snapshot(pool: Any) -> Dict[str, Any]:
+    """Current occupancy of a redis-py pool plus accumulated wait stats."""
+    snapshot: Dict[str, Any] = {
+        "class": type(pool).__name__,
+        "max_connections": pool.max_connections,
+        "created": len(getattr(pool, "_connections", [])),
+    }
+    if isinstance(pool, redis.BlockingConnectionPool):
+        idle = sum(1 for c in list(pool.pool.queue) if c is not None)
+        snapshot.update(idle=idle, checked_out=snapshot["created"] - idle)
+    snapshot["timeouts"] = redis_pool_stats.timeouts
+    snapshot["wait_seconds"] = redis_pool_stats.wait_seconds.snapshot()
+    return snapshot
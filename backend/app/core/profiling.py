@@ -0,0 +1,350 @@
+"""Per-request profiling of hot-path endpoints, switchable at runtime.
+
+A request to an endpoint wrapped with @profiled is profiled when either
+
+  * it carries ``X-Profile-Token: <INTERNAL_API_TOKEN>``, or
+  * an admin has armed that endpoint (POST /admin/profiling/arm), in which
+    case the next N matching requests on any API process are profiled.
+
+The request then runs under pyinstrument, and every SQL statement it
+executes is logged with its duration. The report is kept in Redis for
+PROFILING_RETENTION_SECONDS. It holds the flame graph as pyinstrument HTML,
+a text call tree and the SQL log, and is served under /admin/profiles. The
+profile id comes back in the ``X-Profile-Id`` response header.
+
+When nothing is armed, the cost per request is one ContextVar set in
+attach_timing plus a dict lookup in the wrapper. Redis is asked whether an
+endpoint is armed at most every couple of seconds per process.
+"""
+from __future__ import annotations
+
+import functools
+import hmac
+import inspect
+import logging
+import threading
+import time
+import uuid
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from sqlalchemy import event
+
+from app.config import settings
+from app.services.cache_service import cache
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Endpoints wrapped with @profiled; arming is limited to these names.
+PROFILED_ENDPOINTS = ("generate_test", "list_boards")
+
+_ARMED_KEY = "profiling:armed:{endpoint}"
+_REPORT_KEY = "profiling:report:{profile_id}"
+_HTML_KEY = "profiling:report:{profile_id}:html"
+_INDEX_KEY = "profiling:index"
+_INDEX_LIMIT = 50
+_ARMED_TTL_SECONDS = 15 * 60
+_ARMED_REFRESH_SECONDS = 2.0
+_MAX_LOGGED_STATEMENTS = 500
+
+# KEYS[1] armed counter. Claims one profile if the counter exists and is
+# positive (DECR keeps its TTL); returns the count left, or -1 if nothing was
+# claimed. A bare DECR would create an expired or disarmed key at -1, with
+# no TTL.
+_CLAIM_ARMED_LUA = """
+local armed = tonumber(redis.call('GET', KEYS[1]) or '0')
+if armed > 0 then
+  return redis.call('DECR', KEYS[1])
+end
+return -1
+"""
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class _RequestProfiling:
+    method: str
+    path: str
+    forced: bool
+    profile_id: Optional[str] = None
+
+
+_current_request: ContextVar[Optional[_RequestProfiling]] = ContextVar("profiling_request", default=None)
+_sql_log: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("profiling_sql_log", default=None)
+
+# Per-process hint of whether an endpoint is armed, refreshed from Redis.
+_armed_hint: Dict[str, bool] = {}
+_armed_checked_at: Dict[str, float] = {}
+_claim_armed_script = None
+
+_listeners_lock = threading.Lock()
+_listeners_installed = False
+_missing_profiler_logged = False
+
+
+# ── Middleware hooks (attach_timing) ──────────────────────────────────────────
+
+
+def begin_request(method: str, path: str, profile_token: Optional[str]) -> Optional[Token]:
+    """Make the request eligible for profiling; returns a token for end_request()."""
+    if not settings.PROFILING_ENABLED:
+        return None
+    forced = bool(
+        profile_token
+        and settings.INTERNAL_API_TOKEN
+        and hmac.compare_digest(profile_token, settings.INTERNAL_API_TOKEN)
+    )
+    return _current_request.set(_RequestProfiling(method=method, path=path, forced=forced))
+
+
+def end_request(token: Optional[Token]) -> Optional[str]:
+    """Return the id of the profile recorded for this request, if any."""
+    if token is None:
+        return None
+    state = _current_request.get()
+    _current_request.reset(token)
+    return state.profile_id if state else None
+
+
+# ── Endpoint wrapper ──────────────────────────────────────────────────────────
+
+
+def profiled(func: F) -> F:
+    """Allow a sync endpoint to be profiled; its name is the arming key.
+
+    Must sit below the router decorator, so the wrapper (which FastAPI runs
+    in its threadpool) is what gets registered.
+    """
+    endpoint = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        state = _current_request.get()
+        if state is None or not (state.forced or _claim_armed(endpoint)):
+            return func(*args, **kwargs)
+        return _run_profiled(endpoint, state, func, args, kwargs)
+
+    # FastAPI resolves string annotations against the callable's __globals__,
+    # which for the wrapper would be this module's; hand it resolved types.
+    wrapper.__signature__ = inspect.signature(func, eval_str=True)  # type: ignore[attr-defined]
+    return wrapper  # type: ignore[return-value]
+
+
+def _claim_armed(endpoint: str) -> bool:
+    if not cache.available:
+        return False
+    now = time.monotonic()
+    if not _armed_hint.get(endpoint):
+        if now - _armed_checked_at.get(endpoint, 0.0) < _ARMED_REFRESH_SECONDS:
+            return False
+        _armed_checked_at[endpoint] = now
+        try:
+            _armed_hint[endpoint] = int(cache.client.get(_ARMED_KEY.format(endpoint=endpoint)) or 0) > 0
+        except Exception as exc:
+            logger.debug("Profiling arm check failed: %s", exc)
+            _armed_hint[endpoint] = False
+        if not _armed_hint[endpoint]:
+            return False
+
+    # The script is the cross-process claim: only N requests get a non-negative result.
+    global _claim_armed_script
+    try:
+        if _claim_armed_script is None:
+            _claim_armed_script = cache.client.register_script(_CLAIM_ARMED_LUA)
+        remaining = int(_claim_armed_script(keys=[_ARMED_KEY.format(endpoint=endpoint)]))
+    except Exception as exc:
+        logger.debug("Profiling arm claim failed: %s", exc)
+        remaining = -1
+    if remaining <= 0:
+        _armed_hint[endpoint] = False
+    return remaining >= 0
+
+
+def _run_profiled(
+    endpoint: str,
+    state: _RequestProfiling,
+    func: Callable[..., Any],
+    args: tuple,
+    kwargs: dict,
+) -> Any:
+    global _missing_profiler_logged
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        if not _missing_profiler_logged:
+            logger.warning("Profiling requested but pyinstrument is not installed")
+            _missing_profiler_logged = True
+        return func(*args, **kwargs)
+
+    _install_sql_listeners()
+    statements: List[Dict[str, Any]] = []
+    sql_token = _sql_log.set(statements)
+    profiler = Profiler(interval=settings.PROFILING_INTERVAL_MS / 1000.0, async_mode="disabled")
+    error: Optional[str] = None
+    started = time.perf_counter()
+    profiler.start()
+    try:
+        return func(*args, **kwargs)
+    except Exception as exc:
+        error = repr(exc)
+        raise
+    finally:
+        profiler.stop()
+        _sql_log.reset(sql_token)
+        state.profile_id = _store_report(
+            endpoint=endpoint,
+            state=state,
+            duration_ms=round((time.perf_counter() - started) * 1000, 2),
+            error=error,
+            statements=statements,
+            profiler=profiler,
+        )
+
+
+# ── SQL statement log ─────────────────────────────────────────────────────────
+
+
+def _install_sql_listeners() -> None:
+    """Hook the engine once, on first use; outside a profile each hook is one ContextVar read."""
+    global _listeners_installed
+    if _listeners_installed:
+        return
+    with _listeners_lock:
+        if _listeners_installed:
+            return
+        from app.database import engine
+
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        _listeners_installed = True
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _sql_log.get() is not None:
+        conn.info.setdefault("profiling_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    log = _sql_log.get()
+    if log is None:
+        return
+    starts = conn.info.get("profiling_started")
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+    # Parameters are left out on purpose: they carry user data.
+    log.append(
+        {
+            "statement": statement,
+            "duration_ms": round(elapsed_ms, 3),
+            "rows": cursor.rowcount,
+            "executemany": executemany,
+        }
+    )
+
+
+# ── Report storage ────────────────────────────────────────────────────────────
+
+
+def _store_report(
+    endpoint: str,
+    state: _RequestProfiling,
+    duration_ms: float,
+    error: Optional[str],
+    statements: List[Dict[str, Any]],
+    profiler: Any,
+) -> Optional[str]:
+    profile_id = uuid.uuid4().hex
+    ttl = settings.PROFILING_RETENTION_SECONDS
+    try:
+        html = profiler.output_html()
+        call_tree = profiler.output_text(unicode=True, color=False)
+    except Exception as exc:
+        logger.warning("Could not render profile for %s: %s", endpoint, exc)
+        return None
+
+    report = {
+        "id": profile_id,
+        "endpoint": endpoint,
+        "method": state.method,
+        "path": state.path,
+        "trigger": "header" if state.forced else "armed",
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "duration_ms": duration_ms,
+        "error": error,
+        "sql": {
+            "count": len(statements),
+            "total_ms": round(sum(s["duration_ms"] for s in statements), 3),
+            "statements": statements[:_MAX_LOGGED_STATEMENTS],
+        },
+        "call_tree": call_tree,
+    }
+    try:
+        cache.set(_REPORT_KEY.format(profile_id=profile_id), report, ttl=ttl)
+        cache.set(_HTML_KEY.format(profile_id=profile_id), html, ttl=ttl)
+        pipe = cache.client.pipeline()
+        pipe.lpush(_INDEX_KEY, profile_id)
+        pipe.ltrim(_INDEX_KEY, 0, _INDEX_LIMIT - 1)
+        pipe.expire(_INDEX_KEY, ttl)
+        pipe.execute()
+    except Exception as exc:
+        logger.warning("Could not store profile for %s: %s", endpoint, exc)
+        return None
+    logger.info(
+        "Profiled %s %s (%s): %.1f ms, %d SQL statements — id=%s",
+        state.method,
+        state.path,
+        endpoint,
+        duration_ms,
+        len(statements),
+        profile_id,
+    )
+    return profile_id
+
+
+# ── Admin API ─────────────────────────────────────────────────────────────────
+
+
+def arm(endpoint: str, count: int) -> None:
+    """Profile the next *count* requests to *endpoint* across all API processes (0 disarms)."""
+    key = _ARMED_KEY.format(endpoint=endpoint)
+    if count > 0:
+        cache.client.set(key, count, ex=_ARMED_TTL_SECONDS)
+    else:
+        cache.client.delete(key)
+
+
+def armed_counts() -> Dict[str, int]:
+    values = cache.client.mget([_ARMED_KEY.format(endpoint=e) for e in PROFILED_ENDPOINTS])
+    return {e: max(0, int(v or 0)) for e, v in zip(PROFILED_ENDPOINTS, values)}
+
+
+def list_reports() -> List[Dict[str, Any]]:
+    """Most recent first; summaries only (no call tree or statements)."""
+    summaries = []
+    for profile_id in cache.client.lrange(_INDEX_KEY, 0, _INDEX_LIMIT - 1):
+        report = cache.get(_REPORT_KEY.format(profile_id=profile_id))
+        if report is None:
+            continue   # expired
+        summaries.append(
+            {
+                **{k: report[k] for k in ("id", "endpoint", "method", "path", "trigger", "created_at", "duration_ms", "error")},
+                "sql_count": report["sql"]["count"],
+                "sql_total_ms": report["sql"]["total_ms"],
+            }
+        )
+    return summaries
+
+
+def get_report(profile_id: str) -> Optional[Dict[str, Any]]:
+    return cache.get(_REPORT_KEY.format(profile_id=profile_id))
+
+
+def get_flame_graph(profile_id: str) -> Optional[str]:
+    return cache.get(_HTML_KEY.format(profile_id=profile_id))
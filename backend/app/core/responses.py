@@ -0,0 +1,58 @@
+"""JSON response class rendered with orjson, and a bypass for trusted payloads.
+
+FastJSONResponse is the app's default_response_class. On the normal path
+FastAPI still validates the endpoint's return value against response_model
+and runs jsonable_encoder before render(); only the final dumps gets faster.
+
+For large payloads built from data we wrote ourselves (stored questions_json,
+the curriculum tree), an endpoint can return ``trusted_response(content)``.
+A Response returned from an endpoint skips response_model validation and
+encoding entirely, and the plain dicts, lists and datetimes go straight to
+orjson. The caller must produce exactly the shape response_model declares,
+which stays on the route for the OpenAPI schema.
+
+Without orjson installed, rendering falls back to the stdlib with the same
+output (UTC datetimes end in "Z", as Pydantic writes them).
+"""
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from typing import Any
+from uuid import UUID
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:   # optional; see requirements.txt
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """Types orjson (or, without it, json) can't encode natively, as jsonable_encoder would."""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, datetime):
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    if isinstance(value, (date, UUID)):
+        return value.isoformat() if isinstance(value, date) else str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return json.dumps(
+                content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_default
+            ).encode("utf-8")
+        return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+
+def trusted_response(content: Any, status_code: int = 200) -> FastJSONResponse:
+    """Serialize already-trusted *content* without re-validating it against response_model."""
+    return FastJSONResponse(content=content, status_code=status_code)
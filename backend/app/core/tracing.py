@@ -0,0 +1,109 @@
+"""Opt-in OpenTelemetry tracing (OTEL_ENABLED=true).
+
+setup_tracing() installs a tracer provider and the FastAPI, SQLAlchemy,
+Redis and Celery instrumentations; span() adds manual spans around our own
+code (OpenAI calls, RAG retrieval, cache access). When tracing is disabled
+or the opentelemetry packages are not installed, span() is a no-op.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Any, Iterator, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_tracer: Optional[Any] = None
+_setup_lock = threading.Lock()
+_instrumented_app_ids: set = set()
+
+
+def _build_exporter() -> Any:
+    exporter = settings.OTEL_EXPORTER.lower()
+    if exporter == "otlp":
+        # Endpoint/headers come from the standard OTEL_EXPORTER_OTLP_* env vars.
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        return OTLPSpanExporter()
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    if exporter == "file":
+        # One JSON span per line-group; handy for tests and local debugging.
+        out = open(settings.OTEL_FILE_PATH, "a", encoding="utf-8")  # noqa: SIM115 — lives for the process
+        return ConsoleSpanExporter(out=out)
+    return ConsoleSpanExporter()
+
+
+def setup_tracing(service_name: str, app: Any = None) -> bool:
+    """Configure tracing for this process. Safe to call more than once.
+
+    *app* is the FastAPI application to instrument (API processes only).
+    Returns True when tracing is active.
+    """
+    global _tracer
+    if not settings.OTEL_ENABLED:
+        return False
+
+    try:
+        from opentelemetry import trace
+        from opentelemetry.instrumentation.celery import CeleryInstrumentor
+        from opentelemetry.instrumentation.redis import RedisInstrumentor
+        from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.sdk.trace.sampling import ParentBasedTraceIdRatio
+    except ImportError as exc:
+        logger.warning("OTEL_ENABLED but opentelemetry is not installed (%s) — tracing off", exc)
+        return False
+
+    with _setup_lock:
+        if _tracer is None:
+            provider = TracerProvider(
+                resource=Resource.create(
+                    {
+                        "service.name": service_name,
+                        "service.version": settings.APP_VERSION,
+                        "deployment.environment": settings.ENVIRONMENT,
+                    }
+                ),
+                sampler=ParentBasedTraceIdRatio(settings.OTEL_SAMPLE_RATIO),
+            )
+            provider.add_span_processor(BatchSpanProcessor(_build_exporter()))
+            trace.set_tracer_provider(provider)
+
+            from app.database import engine
+
+            SQLAlchemyInstrumentor().instrument(engine=engine)  # one span per statement
+            RedisInstrumentor().instrument()
+            # Producer side injects trace context into task headers; the
+            # worker side continues the trace from them.
+            CeleryInstrumentor().instrument()
+            _tracer = trace.get_tracer("vidyai")
+            logger.info("Tracing enabled: service=%s exporter=%s", service_name, settings.OTEL_EXPORTER)
+
+        if app is not None and id(app) not in _instrumented_app_ids:
+            from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+
+            FastAPIInstrumentor.instrument_app(app, excluded_urls="health,metrics")
+            _instrumented_app_ids.add(id(app))
+    return True
+
+
+def span(name: str, **attributes: Any):
+    """Context manager for a child span of the current trace (no-op when tracing is off)."""
+    if _tracer is None:
+        return nullcontext()
+    return _active_span(name, attributes)
+
+
+@contextmanager
+def _active_span(name: str, attributes: dict) -> Iterator[Any]:
+    with _tracer.start_as_current_span(name) as current:
+        for key, value in attributes.items():
+            if value is not None:
+                current.set_attribute(key, value)
+        yield current
@@ -1,22 +1,72 @@
 from __future__ import annotations
 
 import logging
-from typing import Generator
+from typing import Any, Dict, Generator, Tuple
 
 from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.config import settings
+from app.core.pool_metrics import TimedQueuePool
 
 logger = logging.getLogger(__name__)
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
-    echo=settings.DEBUG,
-)
+# (pool_size, max_overflow) per process when DB_POOL_SIZE / DB_MAX_OVERFLOW are
+# unset. Every uvicorn worker and every Celery child has its own pool, so the
+# fleet-wide ceiling is roughly processes × (size + overflow) — keep it under
+# the Supabase pooler's client limit.
+#
+# api: a request holds a connection only for its own queries — generate_test
+# and the chapter summary commit before the OpenAI completion, which hands the
+# connection back for the slow part — so 15 connections serve far more than
+# 15 concurrent requests. A deployment
+# whose requests do wait on the pool (see /internal/pools) can raise it with
+# DB_POOL_SIZE / DB_MAX_OVERFLOW, up to FastAPI's 40 threadpool threads; or
+# set DB_POOL_SIZE=0 behind a transaction-mode pooler.
+_ROLE_POOL_DEFAULTS: Dict[str, Tuple[int, int]] = {
+    "api": (5, 10),
+    "worker": (1, 2),    # a --pool threads worker runs --concurrency=2 tasks in one process
+    "script": (4, 4),    # bulk_ingest threads
+}
+
+
+def _engine_kwargs() -> Dict[str, Any]:
+    size, overflow = _ROLE_POOL_DEFAULTS.get(settings.PROCESS_ROLE, _ROLE_POOL_DEFAULTS["api"])
+    if settings.DB_POOL_SIZE is not None:
+        size = settings.DB_POOL_SIZE
+    if settings.DB_MAX_OVERFLOW is not None:
+        overflow = settings.DB_MAX_OVERFLOW
+
+    kwargs: Dict[str, Any] = {"pool_pre_ping": True, "echo": settings.DEBUG}
+    if size == 0:
+        # Let an external pooler (PgBouncer / Supavisor) do all the pooling.
+        kwargs["poolclass"] = NullPool
+    else:
+        kwargs.update(
+            poolclass=TimedQueuePool,
+            pool_size=size,
+            max_overflow=overflow,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+
+    if settings.DB_STATEMENT_TIMEOUT_MS and not settings.DB_PGBOUNCER_TRANSACTION_MODE:
+        # Startup parameters are session state; PgBouncer transaction mode rejects them.
+        kwargs["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return kwargs
+
+
+engine = create_engine(settings.DATABASE_URL, **_engine_kwargs())
+
+
+if settings.DB_STATEMENT_TIMEOUT_MS and settings.DB_PGBOUNCER_TRANSACTION_MODE:
+    # In transaction mode consecutive transactions may land on different server
+    # connections, so anything session-scoped (SET, prepared statements,
+    # advisory locks, LISTEN) is unsafe. Scope the timeout to each transaction.
+    @event.listens_for(engine, "begin")
+    def _set_local_statement_timeout(conn) -> None:
+        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(settings.DB_STATEMENT_TIMEOUT_MS)}")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -4,14 +4,21 @@ import logging
 import time
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 
 from app.config import settings
 from app.core.exceptions import AppException
+from app.core.metrics import HTTP_REQUEST_SECONDS, mark_process_dead, render_latest
+from app.core.profiling import PROFILE_ID_HEADER, PROFILE_TOKEN_HEADER, begin_request, end_request
+from app.core.responses import FastJSONResponse
+from app.core.tracing import setup_tracing
 from app.middleware.rate_limit import RateLimitMiddleware
-from app.routers import admin, auth, boards, tests, usage
+from app.routers import admin, analytics, auth, boards, internal, tests, usage
+from app.routers.deps import require_internal_token
+from app.services.cache_service import cache
+from app.services.usage_service import usage_flusher
 
 logging.basicConfig(
     level=logging.DEBUG if settings.DEBUG else logging.INFO,
@@ -28,7 +35,10 @@ async def lifespan(app: FastAPI):
         settings.ALLOWED_ORIGINS,
         settings.ALLOWED_ORIGIN_REGEX,
     )
+    usage_flusher.start()
     yield
+    usage_flusher.stop()
+    mark_process_dead()
     logger.info("Shutting down cleanly.")
 
 
@@ -38,6 +48,7 @@ app = FastAPI(
     description="AI-powered Education SaaS API — CBSE & more",
     docs_url="/docs" if settings.DEBUG else None,
     redoc_url="/redoc" if settings.DEBUG else None,
+    default_response_class=FastJSONResponse,
     lifespan=lifespan,
 )
 
@@ -53,14 +64,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 app.add_middleware(RateLimitMiddleware)
+setup_tracing("vidyai-api", app)
 
 
 @app.middleware("http")
 async def attach_timing(request: Request, call_next):
     start = time.perf_counter()
-    response = await call_next(request)
-    elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
-    response.headers["X-Response-Time-Ms"] = str(elapsed_ms)
+    # Lets @profiled endpoints profile this request (header or admin arm).
+    profiling = begin_request(request.method, request.url.path, request.headers.get(PROFILE_TOKEN_HEADER))
+    try:
+        response = await call_next(request)
+    finally:
+        profile_id = end_request(profiling)
+    elapsed = time.perf_counter() - start
+    response.headers["X-Response-Time-Ms"] = str(round(elapsed * 1000, 2))
+    if profile_id:
+        response.headers[PROFILE_ID_HEADER] = profile_id
+    # Label by route template (/tests/{test_id}), never the raw path, to keep
+    # the series count bounded.
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.labels(
+        method=request.method,
+        route=getattr(route, "path", "unmatched"),
+        status=str(response.status_code),
+    ).observe(elapsed)
     return response
 
 
@@ -86,7 +113,9 @@ app.include_router(auth.router, prefix=PREFIX)
 app.include_router(boards.router, prefix=PREFIX)
 app.include_router(tests.router, prefix=PREFIX)
 app.include_router(usage.router, prefix=PREFIX)
+app.include_router(analytics.router, prefix=PREFIX)
 app.include_router(admin.router, prefix=PREFIX)
+app.include_router(internal.router)
 
 
 # ── Health check ─────────────────────────────────────────────────────────────
@@ -94,4 +123,21 @@ app.include_router(admin.router, prefix=PREFIX)
 
 @app.get("/health", tags=["Health"])
 def health_check():
-    return {"status": "ok", "version": settings.APP_VERSION, "env": settings.ENVIRONMENT}
+    redis_circuit = cache.breaker.snapshot()
+    return {
+        # Degraded, not down: requests still succeed, just without the cache.
+        "status": "ok" if redis_circuit["state"] == "closed" else "degraded",
+        "version": settings.APP_VERSION,
+        "env": settings.ENVIRONMENT,
+        "redis": redis_circuit,
+    }
+
+
+# ── Metrics ──────────────────────────────────────────────────────────────────
+
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_internal_token)])
+def metrics() -> Response:
+    """Prometheus scrape endpoint (aggregated across uvicorn workers)."""
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
@@ -11,6 +11,11 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from app.config import settings
 
 
+# Health checks, scrapes and internal tooling poll on a fixed schedule.
+_EXEMPT_PATHS = ("/health", "/metrics")
+_EXEMPT_PREFIXES = ("/internal/",)
+
+
 class RateLimitMiddleware(BaseHTTPMiddleware):
     """
     Simple in-process sliding-window rate limiter keyed by client IP.
@@ -54,6 +59,9 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         # CORS preflight should never be throttled.
         if request.method == "OPTIONS":
             return await call_next(request)
+        path = request.url.path
+        if path in _EXEMPT_PATHS or path.startswith(_EXEMPT_PREFIXES):
+            return await call_next(request)
 
         ip = self._get_client_ip(request)
         now = time.monotonic()
@@ -1,7 +1,9 @@
+from app.models.analytics import ChapterStats, QuestionStats, UserChapterStats
 from app.models.board import Board, Class, Subject, Chapter
 from app.models.generated_test import GeneratedTest
 from app.models.ingestion_job import IngestionJob
 from app.models.question_cache import QuestionCache
+from app.models.question_set import QuestionSet
 from app.models.text_chunk import TextChunk
 from app.models.usage_tracking import UsageTracking
 from app.models.user import Profile
@@ -16,5 +18,9 @@ __all__ = [
     "UsageTracking",
     "GeneratedTest",
     "QuestionCache",
+    "QuestionSet",
     "IngestionJob",
+    "UserChapterStats",
+    "ChapterStats",
+    "QuestionStats",
 ]
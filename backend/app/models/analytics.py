@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from sqlalchemy import JSON, Column, DateTime, Float, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.database import Base
+
+# Aggregates maintained incrementally by AnalyticsService.record_submission(),
+# in the same transaction as the submission they count. Averages are stored
+# as sums so an update is a single "+=" per column; readers divide.
+
+
+class UserChapterStats(Base):
+    """One student's submitted tests on one chapter."""
+
+    __tablename__ = "user_chapter_stats"
+
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("profiles.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    chapter_id = Column(
+        Integer,
+        ForeignKey("chapters.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    attempts = Column(Integer, nullable=False, server_default="0")
+    score_sum = Column(Float, nullable=False, server_default="0")
+    best_score = Column(Float, nullable=True)
+    last_score = Column(Float, nullable=True)
+    questions_total = Column(Integer, nullable=False, server_default="0")
+    questions_correct = Column(Integer, nullable=False, server_default="0")
+    last_attempt_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<UserChapterStats user={self.user_id} chapter={self.chapter_id} attempts={self.attempts}>"
+
+
+class ChapterStats(Base):
+    """All submitted tests on one chapter, across students."""
+
+    __tablename__ = "chapter_stats"
+
+    chapter_id = Column(
+        Integer,
+        ForeignKey("chapters.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    attempts = Column(Integer, nullable=False, server_default="0")
+    students = Column(Integer, nullable=False, server_default="0")   # distinct users with an attempt
+    score_sum = Column(Float, nullable=False, server_default="0")
+    questions_total = Column(Integer, nullable=False, server_default="0")
+    questions_correct = Column(Integer, nullable=False, server_default="0")
+    last_attempt_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<ChapterStats chapter={self.chapter_id} attempts={self.attempts}>"
+
+
+class QuestionStats(Base):
+    """Correctness counts for one question of a shared QuestionSet."""
+
+    __tablename__ = "question_stats"
+
+    question_set_id = Column(
+        Integer,
+        ForeignKey("question_sets.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    question_id = Column(Integer, primary_key=True)   # the "id" inside questions_json
+    presented = Column(Integer, nullable=False, server_default="0")   # in a submitted test
+    answered = Column(Integer, nullable=False, server_default="0")
+    correct = Column(Integer, nullable=False, server_default="0")
+
+    # Written by the item calibration job (AnalyticsService.calibrate_items);
+    # NULL until the set has ITEM_CALIBRATION_MIN_RESPONSES submissions.
+    difficulty = Column(Float, nullable=True)       # 1 - share answering correctly: 0 easy … 1 hard
+    discrimination = Column(Float, nullable=True)   # corrected item–total correlation
+    distractors = Column(JSON, nullable=True)       # {"A": {"share": .., "r": ..}, ..., "-": omitted}
+    calibrated_responses = Column(Integer, nullable=True)
+    calibrated_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self) -> str:
+        return (
+            f"<QuestionStats set={self.question_set_id} q={self.question_id} "
+            f"{self.correct}/{self.presented}>"
+        )
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -40,6 +40,10 @@ class Class(Base):
     board = relationship("Board", back_populates="classes")
     subjects = relationship("Subject", back_populates="class_", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        UniqueConstraint("board_id", "class_number", name="uq_class_board_number"),
+    )
+
     def __repr__(self) -> str:
         return f"<Class {self.display_name}>"
 
@@ -59,6 +63,10 @@ class Subject(Base):
     class_ = relationship("Class", back_populates="subjects")
     chapters = relationship("Chapter", back_populates="subject", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        UniqueConstraint("class_id", "subject_name", name="uq_subject_class_name"),
+    )
+
     def __repr__(self) -> str:
         return f"<Subject {self.subject_name}>"
 
@@ -87,5 +95,9 @@ class Chapter(Base):
     generated_tests = relationship("GeneratedTest", back_populates="chapter")
     ingestion_jobs = relationship("IngestionJob", back_populates="chapter", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        UniqueConstraint("subject_id", "chapter_number", name="uq_chapter_subject_number"),
+    )
+
     def __repr__(self) -> str:
         return f"<Chapter {self.chapter_number}: {self.chapter_name}>"
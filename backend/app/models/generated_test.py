@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, JSON
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, JSON
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -26,13 +26,31 @@ class GeneratedTest(Base):
         nullable=True,
         index=True,
     )
-    questions_json = Column(JSON, nullable=False)
+    question_set_id = Column(
+        Integer,
+        ForeignKey("question_sets.id"),
+        nullable=False,
+        index=True,
+    )
+    num_questions = Column(Integer, nullable=False, server_default="0")   # lets listings skip the question set
+    answers = Column(JSON, nullable=True)           # {"<question id>": "A", ...}, set on submission
     score = Column(Float, nullable=True)            # 0–100, set after submission
     completed_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     user = relationship("Profile", back_populates="generated_tests")
     chapter = relationship("Chapter", back_populates="generated_tests")
+    question_set = relationship("QuestionSet")
+
+    __table_args__ = (
+        # Keyset pagination of a user's history: newest first, id breaks ties.
+        Index(
+            "ix_generated_tests_user_created",
+            "user_id",
+            created_at.desc(),
+            id.desc(),
+        ),
+    )
 
     def __repr__(self) -> str:
         return f"<GeneratedTest id={self.id} user={self.user_id} score={self.score}>"
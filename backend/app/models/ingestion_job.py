@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import uuid
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Integer, String, Text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -25,6 +25,12 @@ class IngestionJob(Base):
     status = Column(String(20), default="pending", nullable=False)  # pending | processing | completed | failed
     pdf_s3_key = Column(Text, nullable=False)
     error_message = Column(Text, nullable=True)
+    # Checkpoint: the extracted chunks are stored once, and retries resume by
+    # embedding only those whose chunk_index is not yet in text_chunks.
+    chunks_json = Column(JSON, nullable=True)   # cleared when the job completes
+    total_chunks = Column(Integer, nullable=True)
+    embedded_chunks = Column(Integer, default=0, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
     started_at = Column(DateTime(timezone=True), nullable=True)
     completed_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from sqlalchemy import Column, DateTime, Integer, JSON, UniqueConstraint
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, UniqueConstraint
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from app.database import Base
@@ -10,7 +11,7 @@ class QuestionCache(Base):
     """Shared question bank keyed on (chapter_id, num_questions).
 
     When multiple users request the same chapter + question count within
-    the TTL window, the stored questions_json is reused and the expensive
+    the TTL window, the referenced QuestionSet is reused and the expensive
     RAG + OpenAI pipeline is skipped entirely.
     """
 
@@ -19,10 +20,16 @@ class QuestionCache(Base):
     id = Column(Integer, primary_key=True, index=True)
     chapter_id = Column(Integer, nullable=False, index=True)
     num_questions = Column(Integer, nullable=False)
-    questions_json = Column(JSON, nullable=False)
+    question_set_id = Column(
+        Integer,
+        ForeignKey("question_sets.id", ondelete="CASCADE"),
+        nullable=False,
+    )
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     expires_at = Column(DateTime(timezone=True), nullable=False)
 
+    question_set = relationship("QuestionSet")
+
     __table_args__ = (
         UniqueConstraint("chapter_id", "num_questions", name="uq_question_cache"),
     )
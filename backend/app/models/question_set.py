@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Dict
+
+from sqlalchemy import Column, DateTime, Integer, JSON, String
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+def question_set_hash(questions_json: Dict[str, Any]) -> str:
+    """sha256 of the canonical JSON form (sorted keys, no whitespace)."""
+    canonical = json.dumps(questions_json, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class QuestionSet(Base):
+    """An immutable, content-addressed set of generated MCQs.
+
+    GeneratedTest and QuestionCache rows reference a set instead of holding
+    their own copy of questions_json, so every user served the same cached
+    questions shares one row. Never update a set in place: identical content
+    always hashes to the same row, and tests taken from it must not change.
+    """
+
+    __tablename__ = "question_sets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), nullable=False, unique=True)   # question_set_hash(questions_json)
+    num_questions = Column(Integer, nullable=False)
+    questions_json = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<QuestionSet id={self.id} hash={self.content_hash[:12]} num_q={self.num_questions}>"
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -30,7 +30,9 @@ class TextChunk(Base):
     )
     content = Column(Text, nullable=False)
     chunk_index = Column(Integer, nullable=False)
-    page_number = Column(Integer, nullable=True)
+    chunk_id = Column(String(16), nullable=True)    # content hash; same text → same id on re-ingest
+    page_number = Column(Integer, nullable=True)    # first page of the chunk
+    page_end = Column(Integer, nullable=True)       # last page (chunks may span pages)
     embedding = Column(Vector(settings.EMBEDDING_DIMENSIONS), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Literal
 
-from fastapi import APIRouter, Depends, File, Form, UploadFile
+from fastapi import APIRouter, Depends, File, Form, Query, UploadFile
+from fastapi.responses import HTMLResponse
 from sqlalchemy.orm import Session
 
+from app.config import settings
+from app.core import profiling
+from app.core.exceptions import ConflictError, NotFoundError
 from app.database import get_db
 from app.models.user import Profile
 from app.routers.deps import get_admin_user
@@ -100,7 +104,50 @@ def get_job_status(
         "chapter_id": job.chapter_id,
         "status": job.status,
         "error_message": job.error_message,
+        "total_chunks": job.total_chunks,
+        "embedded_chunks": job.embedded_chunks,
+        "attempts": job.attempts,
         "started_at": job.started_at,
         "completed_at": job.completed_at,
         "created_at": job.created_at,
     }
+
+
+# ── Profiling ─────────────────────────────────────────────────────────────────
+
+
+@router.post("/profiling/arm")
+def arm_profiling(
+    endpoint: Literal["generate_test", "list_boards"],
+    count: int = Query(default=1, ge=0, le=20),
+    admin: Profile = Depends(get_admin_user),
+) -> Dict[str, Any]:
+    """Profile the next *count* requests to *endpoint* on any API process (0 disarms)."""
+    if not settings.PROFILING_ENABLED:
+        raise ConflictError("Profiling is disabled (PROFILING_ENABLED=false)")
+    profiling.arm(endpoint, count)
+    return {"armed": profiling.armed_counts()}
+
+
+@router.get("/profiles")
+def list_profiles(admin: Profile = Depends(get_admin_user)) -> Dict[str, Any]:
+    """Recent request profiles, newest first (admin only)."""
+    return {"armed": profiling.armed_counts(), "profiles": profiling.list_reports()}
+
+
+@router.get("/profiles/{profile_id}")
+def get_profile(profile_id: str, admin: Profile = Depends(get_admin_user)) -> Dict[str, Any]:
+    """One profile: timings, SQL statement log and call tree (admin only)."""
+    report = profiling.get_report(profile_id)
+    if report is None:
+        raise NotFoundError("Profile")
+    return report
+
+
+@router.get("/profiles/{profile_id}/flamegraph", response_class=HTMLResponse)
+def get_profile_flame_graph(profile_id: str, admin: Profile = Depends(get_admin_user)) -> HTMLResponse:
+    """Interactive pyinstrument flame graph for one profile (admin only)."""
+    html = profiling.get_flame_graph(profile_id)
+    if html is None:
+        raise NotFoundError("Profile")
+    return HTMLResponse(html)
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.user import Profile
+from app.routers.deps import get_current_user
+from app.schemas.analytics import ChapterAnalytics, UserPerformance
+from app.services.analytics_service import AnalyticsService
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+
+@router.get("/me", response_model=UserPerformance)
+def get_my_performance(
+    db: Session = Depends(get_db),
+    current_user: Profile = Depends(get_current_user),
+) -> UserPerformance:
+    """Per-chapter attempts and scores for the authenticated user, from the running aggregates."""
+    return AnalyticsService(db).get_user_performance(current_user.id)
+
+
+@router.get("/chapters/{chapter_id}", response_model=ChapterAnalytics)
+def get_chapter_analytics(
+    chapter_id: int,
+    db: Session = Depends(get_db),
+    current_user: Profile = Depends(get_current_user),
+) -> ChapterAnalytics:
+    """Chapter-wide attempts and average score, with the caller's own stats on it."""
+    return AnalyticsService(db).get_chapter_analytics(chapter_id, current_user.id)
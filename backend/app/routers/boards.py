@@ -1,17 +1,25 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Union
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy import func
 from sqlalchemy.orm import Session, selectinload
 
+from app.core.profiling import profiled
+from app.core.responses import trusted_response
 from app.database import get_db
 from app.models.board import Board, Class, Subject, Chapter
 from app.models.text_chunk import TextChunk
 from app.models.user import Profile
-from app.routers.deps import get_current_user
-from app.schemas.board import BoardResponse, ChapterContentResponse, ChapterSummaryResponse
+from app.routers.deps import get_current_user, preparation_accepted
+from app.schemas.board import (
+    BoardResponse,
+    ChapterContentResponse,
+    ChapterPreparationResponse,
+    ChapterSummaryResponse,
+)
 from app.services.generation_service import GenerationService
 
 router = APIRouter(prefix="/boards", tags=["Curriculum"])
@@ -44,7 +52,6 @@ def _build_board_response(board: Board, chunk_counts: dict[int, int]) -> dict:
                                 "chapter_name": ch.chapter_name,
                                 "description": ch.description,
                                 "is_active": ch.is_active,
-                                "status": ch.status,
                                 "chunk_count": chunk_counts.get(ch.id, 0),
                             }
                             for ch in subj.chapters
@@ -59,10 +66,11 @@ def _build_board_response(board: Board, chunk_counts: dict[int, int]) -> dict:
 
 
 @router.get("", response_model=List[BoardResponse])
+@profiled
 def list_boards(
     db: Session = Depends(get_db),
     _: Profile = Depends(get_current_user),
-) -> list[dict]:
+) -> Response:
     """Return the full curriculum hierarchy: boards → classes → subjects → chapters.
 
     Each chapter includes ``chunk_count`` — the number of embedded text chunks
@@ -88,7 +96,8 @@ def list_boards(
         .all()
     )
 
-    return [_build_board_response(b, chunk_counts) for b in boards]
+    # Built from our own rows in BoardResponse's shape: skip re-validation.
+    return trusted_response([_build_board_response(b, chunk_counts) for b in boards])
 
 
 @router.get("/chapters/{chapter_id}", response_model=ChapterContentResponse)
@@ -116,11 +125,31 @@ def get_chapter(
     return chapter
 
 
-@router.post("/chapters/{chapter_id}/summary", response_model=ChapterSummaryResponse)
+@router.post(
+    "/chapters/{chapter_id}/summary",
+    response_model=ChapterSummaryResponse,
+    responses={202: {"model": ChapterPreparationResponse}},
+)
 def generate_chapter_summary(
     chapter_id: int,
     db: Session = Depends(get_db),
     _: Profile = Depends(get_current_user),
-) -> ChapterSummaryResponse:
-    """Generate an AI summary for a chapter using RAG context."""
-    return GenerationService(db).generate_chapter_summary(chapter_id)
+) -> Union[ChapterSummaryResponse, JSONResponse]:
+    """Generate an AI summary for a chapter using RAG context.
+
+    Returns 202 with a job handle while the chapter is being prepared.
+    """
+    result = GenerationService(db).generate_chapter_summary(chapter_id)
+    if isinstance(result, ChapterPreparationResponse):
+        return preparation_accepted(result)
+    return result
+
+
+@router.get("/chapters/{chapter_id}/preparation", response_model=ChapterPreparationResponse)
+def get_chapter_preparation(
+    chapter_id: int,
+    db: Session = Depends(get_db),
+    _: Profile = Depends(get_current_user),
+) -> ChapterPreparationResponse:
+    """Embedding readiness of a chapter and progress of its latest ingestion job."""
+    return GenerationService(db).get_chapter_preparation(chapter_id)
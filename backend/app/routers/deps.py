@@ -1,15 +1,22 @@
 from __future__ import annotations
 
+import hmac
 from typing import Optional
 
 from fastapi import Depends, Header
+from fastapi.responses import JSONResponse
 from jose import JWTError
 from sqlalchemy.orm import Session
 
-from app.core.exceptions import AuthenticationError, AuthorizationError
+from app.core.exceptions import AuthenticationError, AuthorizationError, NotFoundError
+from app.config import settings
 from app.core.security import verify_supabase_token
 from app.database import get_db
 from app.models.user import Profile
+from app.schemas.board import ChapterPreparationResponse
+
+# How long clients should wait between polls of a preparing chapter.
+PREPARATION_RETRY_AFTER_SECONDS = 5
 
 
 def get_current_user(
@@ -40,3 +47,36 @@ def get_admin_user(
     if not current_user.is_admin:
         raise AuthorizationError("Admin access required")
     return current_user
+
+
+def require_internal_token(
+    x_internal_token: Optional[str] = Header(default=None),
+    authorization: Optional[str] = Header(default=None),
+) -> None:
+    """Gate /internal and /metrics; they 404 unless INTERNAL_API_TOKEN is configured.
+
+    Accepts the token as X-Internal-Token or as a Bearer token (what
+    Prometheus' ``authorization`` scrape config sends).
+    """
+    if not settings.INTERNAL_API_TOKEN:
+        raise NotFoundError()
+    token = x_internal_token
+    if token is None and authorization and authorization.startswith("Bearer "):
+        token = authorization.split(" ", 1)[1]
+    if not token or not hmac.compare_digest(token, settings.INTERNAL_API_TOKEN):
+        raise AuthenticationError("Invalid internal token")
+
+
+def preparation_accepted(preparation: ChapterPreparationResponse) -> JSONResponse:
+    """202 response pointing the client at the chapter's preparation status."""
+    return JSONResponse(
+        status_code=202,
+        content=preparation.model_dump(),
+        headers={
+            "Location": (
+                f"{settings.API_V1_PREFIX}/boards/chapters/"
+                f"{preparation.chapter_id}/preparation"
+            ),
+            "Retry-After": str(PREPARATION_RETRY_AFTER_SECONDS),
+        },
+    )
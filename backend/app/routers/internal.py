@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends
+
+from app.config import settings
+from app.core.pool_metrics import db_pool_snapshot, redis_pool_snapshot
+from app.database import engine
+from app.routers.deps import require_internal_token
+from app.services.cache_service import cache
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["Internal"],
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_token)],
+)
+
+
+@router.get("/pools")
+def pool_stats() -> Dict[str, Any]:
+    """Connection-pool occupancy and checkout-wait histograms for this process."""
+    return {
+        "process_role": settings.PROCESS_ROLE,
+        "database": db_pool_snapshot(engine.pool),
+        "redis": redis_pool_snapshot(cache.client.connection_pool),
+    }
+
+
+@router.get("/cache")
+def cache_stats() -> Dict[str, Any]:
+    """Hit/miss/eviction counters of this process's cache tiers (in-process L1 and Redis)."""
+    return {
+        "process_role": settings.PROCESS_ROLE,
+        **cache.stats(),
+    }
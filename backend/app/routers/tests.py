@@ -1,32 +1,50 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Optional, Union
 
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.orm import Session
 
+from app.core.profiling import profiled
+from app.core.responses import trusted_response
 from app.database import get_db
 from app.models.user import Profile
-from app.routers.deps import get_current_user
+from app.routers.deps import get_current_user, preparation_accepted
+from app.schemas.board import ChapterPreparationResponse
 from app.schemas.test import (
     GenerateTestRequest,
     GeneratedTestResponse,
     SubmitTestRequest,
     SubmitTestResponse,
+    TestHistoryPage,
 )
 from app.services.generation_service import GenerationService
 
 router = APIRouter(prefix="/tests", tags=["Tests"])
 
 
-@router.post("/generate", response_model=GeneratedTestResponse, status_code=201)
+@router.post(
+    "/generate",
+    response_model=GeneratedTestResponse,
+    status_code=201,
+    responses={202: {"model": ChapterPreparationResponse}},
+)
+@profiled
 def generate_test(
     request: GenerateTestRequest,
     db: Session = Depends(get_db),
     current_user: Profile = Depends(get_current_user),
-) -> GeneratedTestResponse:
-    """Generate a new MCQ test via RAG + OpenAI."""
-    return GenerationService(db).generate_test(request, current_user)
+) -> Union[GeneratedTestResponse, JSONResponse]:
+    """Generate a new MCQ test via RAG + OpenAI.
+
+    Returns 202 with a job handle while the chapter's embeddings are still
+    being generated; poll the Location header, then retry.
+    """
+    result = GenerationService(db).generate_test(request, current_user)
+    if isinstance(result, ChapterPreparationResponse):
+        return preparation_accepted(result)
+    return result
 
 
 @router.get("", response_model=List[GeneratedTestResponse])
@@ -35,9 +53,22 @@ def list_tests(
     limit: int = Query(default=20, ge=1, le=100),
     db: Session = Depends(get_db),
     current_user: Profile = Depends(get_current_user),
-) -> List[GeneratedTestResponse]:
+) -> Response:
     """List all tests for the authenticated user."""
-    return GenerationService(db).list_tests(current_user.id, skip=skip, limit=limit)
+    return trusted_response(GenerationService(db).list_tests(current_user.id, skip=skip, limit=limit))
+
+
+@router.get("/history", response_model=TestHistoryPage)
+def list_test_history(
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = Query(default=None, description="next_cursor of the previous page"),
+    db: Session = Depends(get_db),
+    current_user: Profile = Depends(get_current_user),
+) -> Response:
+    """The user's tests, newest first, without questions (fetch those via GET /tests/{id})."""
+    return trusted_response(
+        GenerationService(db).list_test_summaries(current_user.id, limit=limit, cursor=cursor)
+    )
 
 
 @router.get("/{test_id}", response_model=GeneratedTestResponse)
@@ -45,9 +76,9 @@ def get_test(
     test_id: int,
     db: Session = Depends(get_db),
     current_user: Profile = Depends(get_current_user),
-) -> GeneratedTestResponse:
+) -> Response:
     """Retrieve a single test (must belong to the user)."""
-    return GenerationService(db).get_test(test_id, current_user.id)
+    return trusted_response(GenerationService(db).get_test(test_id, current_user.id))
 
 
 @router.post("/{test_id}/submit", response_model=SubmitTestResponse)
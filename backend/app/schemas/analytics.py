@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class ChapterPerformance(BaseModel):
+    """A student's submitted tests on one chapter."""
+
+    chapter_id: int
+    chapter_name: Optional[str] = None
+    subject_name: Optional[str] = None
+    attempts: int
+    average_score: Optional[float] = None
+    best_score: Optional[float] = None
+    last_score: Optional[float] = None
+    questions_total: int
+    questions_correct: int
+    last_attempt_at: Optional[datetime] = None
+
+
+class UserPerformance(BaseModel):
+    tests_completed: int
+    average_score: Optional[float] = None
+    questions_total: int
+    questions_correct: int
+    chapters: List[ChapterPerformance]   # most recently attempted first
+
+
+class ChapterAnalytics(BaseModel):
+    """All students' submitted tests on one chapter, plus the caller's own."""
+
+    chapter_id: int
+    chapter_name: str
+    attempts: int
+    students: int
+    average_score: Optional[float] = None
+    questions_total: int
+    questions_correct: int
+    last_attempt_at: Optional[datetime] = None
+    user_stats: Optional[ChapterPerformance] = None
@@ -35,6 +35,19 @@ class ChapterSummaryResponse(BaseModel):
     summary: str
 
 
+class ChapterPreparationResponse(BaseModel):
+    """Returned with 202 while a chapter's embeddings are being generated."""
+
+    chapter_id: int
+    ready: bool
+    chapter_status: str
+    job_id: Optional[str] = None
+    job_status: Optional[str] = None
+    total_chunks: Optional[int] = None
+    embedded_chunks: int = 0
+    error_message: Optional[str] = None
+
+
 class SubjectResponse(BaseModel):
     id: int
     subject_name: str
@@ -41,6 +41,24 @@ class GeneratedTestResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class TestSummary(BaseModel):
+    """One row of the test history: no questions, just what the list shows."""
+
+    id: int
+    chapter_id: Optional[int] = None
+    chapter_name: Optional[str] = None
+    subject_name: Optional[str] = None
+    num_questions: int
+    score: Optional[float] = None
+    completed_at: Optional[datetime] = None
+    created_at: datetime
+
+
+class TestHistoryPage(BaseModel):
+    items: List[TestSummary]
+    next_cursor: Optional[str] = None   # pass back as ?cursor= for the next (older) page
+
+
 class SubmitTestRequest(BaseModel):
     answers: Dict[str, str]   # {"1": "A", "2": "C", ...}
 
@@ -11,6 +11,7 @@ from app.config import settings
 from app.models.board import Board, Chapter, Class, Subject
 from app.models.ingestion_job import IngestionJob
 from app.models.user import Profile
+from app.services.cache_service import cache
 from app.services.storage_service import storage_service
 
 logger = logging.getLogger(__name__)
@@ -92,6 +93,12 @@ class AdminService:
     ) -> dict[str, Any]:
         """Upload PDF to S3, create/get curriculum hierarchy, enqueue ingestion."""
         from app.tasks.ingest import ingest_pdf_task
+        from app.worker import PRIORITY_HIGH, QUEUE_INTERACTIVE
+
+        # The broker is the cache's Redis; don't upload a PDF we can't enqueue.
+        if not cache.available:
+            from app.core.exceptions import ServiceUnavailableError
+            raise ServiceUnavailableError("Ingestion queue is temporarily unavailable, please retry shortly")
 
         # ── Ensure curriculum hierarchy exists ─────────────────────────────
         board = self._get_or_create_board(board_name)
@@ -124,7 +131,12 @@ class AdminService:
         self.db.refresh(job)
 
         # ── Enqueue Celery task ────────────────────────────────────────────
-        ingest_pdf_task.delay(str(job.id), chapter.id, s3_key)
+        # An admin is waiting on this one: jump ahead of bulk ingestion.
+        ingest_pdf_task.apply_async(
+            (str(job.id), chapter.id, s3_key),
+            queue=QUEUE_INTERACTIVE,
+            priority=PRIORITY_HIGH,
+        )
         logger.info(f"[admin] Enqueued ingestion job {job.id} for chapter {chapter.id}")
 
         return {
@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import logging
+import time
+from datetime import datetime, timezone
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.exceptions import NotFoundError
+from app.models.analytics import ChapterStats, QuestionStats, UserChapterStats
+from app.models.board import Chapter, Subject
+from app.models.generated_test import GeneratedTest
+from app.models.question_set import QuestionSet
+from app.schemas.analytics import ChapterAnalytics, ChapterPerformance, UserPerformance
+from app.schemas.test import AnswerDetail
+from app.services.item_statistics import build_response_matrix, item_statistics, option_code
+
+logger = logging.getLogger(__name__)
+
+
+def _average(total: float, count: int) -> Optional[float]:
+    return round(total / count, 2) if count else None
+
+
+def _calibration_items(questions: List[Dict[str, Any]]) -> Tuple[List[int], np.ndarray]:
+    """Question ids and answer-key codes of a set, one column per distinct id.
+
+    Sets stored before ids were normalized may repeat an id (the first
+    occurrence wins, as in the answers map) or hold one that is not an
+    integer (skipped: it has no question_stats row).
+    """
+    question_ids: List[int] = []
+    key: List[int] = []
+    for q in questions:
+        question_id = q.get("id") if isinstance(q, dict) else None
+        if isinstance(question_id, str) and question_id.isdigit():
+            question_id = int(question_id)
+        if not isinstance(question_id, int) or isinstance(question_id, bool) or question_id in question_ids:
+            continue
+        question_ids.append(question_id)
+        key.append(option_code(q.get("correct_answer")))
+    return question_ids, np.array(key, dtype=np.int8)
+
+
+class AnalyticsService:
+    """Performance aggregates: written per submission, read without scanning tests."""
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    # ── Write ────────────────────────────────────────────────────────────
+
+    def record_submission(
+        self,
+        test: GeneratedTest,
+        score: float,
+        details: List[AnswerDetail],
+        submitted_at: datetime,
+    ) -> None:
+        """Fold one graded submission into the aggregates.
+
+        Upserts only; does not commit. Call inside the transaction that marks
+        *test* submitted, so a test is counted exactly when its score is saved.
+        """
+        total = len(details)
+        correct = sum(1 for d in details if d.is_correct)
+
+        if test.chapter_id is not None:
+            user_insert = pg_insert(UserChapterStats).values(
+                user_id=test.user_id,
+                chapter_id=test.chapter_id,
+                attempts=1,
+                score_sum=score,
+                best_score=score,
+                last_score=score,
+                questions_total=total,
+                questions_correct=correct,
+                last_attempt_at=submitted_at,
+            )
+            attempts = self.db.execute(
+                user_insert.on_conflict_do_update(
+                    index_elements=[UserChapterStats.user_id, UserChapterStats.chapter_id],
+                    set_={
+                        "attempts": UserChapterStats.attempts + 1,
+                        "score_sum": UserChapterStats.score_sum + score,
+                        "best_score": func.greatest(UserChapterStats.best_score, score),
+                        "last_score": score,
+                        "questions_total": UserChapterStats.questions_total + total,
+                        "questions_correct": UserChapterStats.questions_correct + correct,
+                        "last_attempt_at": submitted_at,
+                    },
+                ).returning(UserChapterStats.attempts)
+            ).scalar_one()
+
+            first_attempt = 1 if attempts == 1 else 0
+            chapter_insert = pg_insert(ChapterStats).values(
+                chapter_id=test.chapter_id,
+                attempts=1,
+                students=1,
+                score_sum=score,
+                questions_total=total,
+                questions_correct=correct,
+                last_attempt_at=submitted_at,
+            )
+            self.db.execute(
+                chapter_insert.on_conflict_do_update(
+                    index_elements=[ChapterStats.chapter_id],
+                    set_={
+                        "attempts": ChapterStats.attempts + 1,
+                        "students": ChapterStats.students + first_attempt,
+                        "score_sum": ChapterStats.score_sum + score,
+                        "questions_total": ChapterStats.questions_total + total,
+                        "questions_correct": ChapterStats.questions_correct + correct,
+                        "last_attempt_at": submitted_at,
+                    },
+                )
+            )
+
+        if details:
+            # One row per question id: a set stored before ids were normalized
+            # may repeat one, and ON CONFLICT cannot touch a row twice.
+            rows: Dict[int, Dict] = {}
+            for d in details:
+                row = rows.setdefault(
+                    d.question_id,
+                    {
+                        "question_set_id": test.question_set_id,
+                        "question_id": d.question_id,
+                        "presented": 0,
+                        "answered": 0,
+                        "correct": 0,
+                    },
+                )
+                row["presented"] += 1
+                row["answered"] += 0 if d.user_answer is None else 1
+                row["correct"] += 1 if d.is_correct else 0
+            # Sorted, so concurrent submissions of the same set lock rows in
+            # the same order and cannot deadlock each other.
+            question_insert = pg_insert(QuestionStats).values([rows[q] for q in sorted(rows)])
+            self.db.execute(
+                question_insert.on_conflict_do_update(
+                    index_elements=[QuestionStats.question_set_id, QuestionStats.question_id],
+                    set_={
+                        "presented": QuestionStats.presented + question_insert.excluded.presented,
+                        "answered": QuestionStats.answered + question_insert.excluded.answered,
+                        "correct": QuestionStats.correct + question_insert.excluded.correct,
+                    },
+                )
+            )
+
+    # ── Item calibration ─────────────────────────────────────────────────
+
+    def calibrate_items(self, min_responses: Optional[int] = None) -> Dict[str, int]:
+        """Recompute item statistics for every question set with enough submissions.
+
+        Streams the submitted answers set by set, builds each set's response
+        matrix and writes difficulty, discrimination and distractor stats back
+        to its question_stats rows. A set that cannot be calibrated is logged
+        and skipped, so it never blocks the others. Returns counts of what
+        was calibrated.
+        """
+        min_responses = min_responses or settings.ITEM_CALIBRATION_MIN_RESPONSES
+        started = time.perf_counter()
+        submitted = GeneratedTest.completed_at.isnot(None)
+        eligible = (
+            self.db.query(GeneratedTest.question_set_id)
+            .filter(submitted)
+            .group_by(GeneratedTest.question_set_id)
+            .having(func.count() >= min_responses)
+        )
+        sets = {
+            set_id: questions_json.get("questions", []) if isinstance(questions_json, dict) else []
+            for set_id, questions_json in self.db.query(QuestionSet.id, QuestionSet.questions_json)
+            .filter(QuestionSet.id.in_(eligible.scalar_subquery()))
+        }
+        answers = (
+            self.db.query(GeneratedTest.question_set_id, GeneratedTest.answers)
+            .filter(submitted, GeneratedTest.question_set_id.in_(list(sets)))
+            .order_by(GeneratedTest.question_set_id)
+            .yield_per(5000)
+        )
+
+        calibrated_at = datetime.now(timezone.utc)
+        updates: List[Dict] = []
+        responses = 0
+        skipped = 0
+        for set_id, rows in groupby(answers, key=itemgetter(0)):
+            try:
+                question_ids, key = _calibration_items(sets[set_id])
+                choices = build_response_matrix(question_ids, (row.answers or {} for row in rows))
+                stats = item_statistics(question_ids, choices, key)
+            except Exception as exc:
+                logger.warning("Item calibration: skipping question set %s: %s", set_id, exc, exc_info=True)
+                skipped += 1
+                continue
+            responses += stats.responses
+            for j, question_id in enumerate(question_ids):
+                discrimination = stats.discrimination[j]
+                updates.append(
+                    {
+                        "question_set_id": set_id,
+                        "question_id": question_id,
+                        "difficulty": round(1.0 - float(stats.p_correct[j]), 4),
+                        "discrimination": None if np.isnan(discrimination) else round(float(discrimination), 4),
+                        "distractors": stats.distractors(j),
+                        "calibrated_responses": stats.responses,
+                        "calibrated_at": calibrated_at,
+                    }
+                )
+
+        # A bulk UPDATE by primary key raises StaleDataError if any row is
+        # missing (e.g. a question never presented in a submitted test), so
+        # only existing question_stats rows are written.
+        missing = 0
+        if updates:
+            existing = set(
+                self.db.query(QuestionStats.question_set_id, QuestionStats.question_id)
+                .filter(QuestionStats.question_set_id.in_({u["question_set_id"] for u in updates}))
+                .tuples()
+            )
+            calibrated = [u for u in updates if (u["question_set_id"], u["question_id"]) in existing]
+            missing = len(updates) - len(calibrated)
+            updates = calibrated
+        if updates:
+            self.db.execute(update(QuestionStats), updates)
+        self.db.commit()
+        logger.info(
+            "Item calibration: %d set(s) (%d skipped), %d question(s) (%d without a stats row) "
+            "from %d submission(s) in %.2fs",
+            len(sets) - skipped,
+            skipped,
+            len(updates),
+            missing,
+            responses,
+            time.perf_counter() - started,
+        )
+        return {
+            "question_sets": len(sets) - skipped,
+            "skipped": skipped,
+            "questions": len(updates),
+            "responses": responses,
+        }
+
+    # ── Read ─────────────────────────────────────────────────────────────
+
+    def get_user_performance(self, user_id) -> UserPerformance:
+        rows = (
+            self.db.query(UserChapterStats, Chapter.chapter_name, Subject.subject_name)
+            .outerjoin(Chapter, Chapter.id == UserChapterStats.chapter_id)
+            .outerjoin(Subject, Subject.id == Chapter.subject_id)
+            .filter(UserChapterStats.user_id == user_id)
+            .order_by(UserChapterStats.last_attempt_at.desc())
+            .all()
+        )
+        chapters = [
+            self._to_performance(stats, chapter_name, subject_name)
+            for stats, chapter_name, subject_name in rows
+        ]
+        attempts = sum(stats.attempts for stats, _, _ in rows)
+        return UserPerformance(
+            tests_completed=attempts,
+            average_score=_average(sum(stats.score_sum for stats, _, _ in rows), attempts),
+            questions_total=sum(c.questions_total for c in chapters),
+            questions_correct=sum(c.questions_correct for c in chapters),
+            chapters=chapters,
+        )
+
+    def get_chapter_analytics(self, chapter_id: int, user_id) -> ChapterAnalytics:
+        chapter = self.db.query(Chapter).filter(Chapter.id == chapter_id).first()
+        if not chapter:
+            raise NotFoundError("Chapter")
+        stats = self.db.get(ChapterStats, chapter_id)
+        own = self.db.get(UserChapterStats, (user_id, chapter_id))
+        return ChapterAnalytics(
+            chapter_id=chapter.id,
+            chapter_name=chapter.chapter_name,
+            attempts=stats.attempts if stats else 0,
+            students=stats.students if stats else 0,
+            average_score=_average(stats.score_sum, stats.attempts) if stats else None,
+            questions_total=stats.questions_total if stats else 0,
+            questions_correct=stats.questions_correct if stats else 0,
+            last_attempt_at=stats.last_attempt_at if stats else None,
+            user_stats=(
+                self._to_performance(own, chapter.chapter_name, chapter.subject.subject_name)
+                if own
+                else None
+            ),
+        )
+
+    @staticmethod
+    def _to_performance(
+        stats: UserChapterStats, chapter_name: str | None, subject_name: str | None
+    ) -> ChapterPerformance:
+        return ChapterPerformance(
+            chapter_id=stats.chapter_id,
+            chapter_name=chapter_name,
+            subject_name=subject_name,
+            attempts=stats.attempts,
+            average_score=_average(stats.score_sum, stats.attempts),
+            best_score=stats.best_score,
+            last_score=stats.last_score,
+            questions_total=stats.questions_total,
+            questions_correct=stats.questions_correct,
+            last_attempt_at=stats.last_attempt_at,
+        )
@@ -0,0 +1,197 @@
+"""Value encodings for CacheService.
+
+Every value CacheService writes starts with a three-byte header:
+
+    0x00 | codec tag | compression tag
+
+followed by the (possibly compressed) payload. Values without the header
+are legacy plain-JSON entries; JSON text never starts with a NUL byte, so
+they are told apart reliably and still decode after the codec is changed.
+
+Codecs (CACHE_CODEC, or per call):
+    json     stdlib JSON                         tag "j"
+    orjson   orjson, JSON-compatible output      tag "o"
+    msgpack  MessagePack                         tag "m"
+    f32      flat sequence of floats as raw      tag "f"
+             little-endian float32 (embeddings)
+
+Payloads of at least CACHE_COMPRESSION_MIN_BYTES are compressed with
+CACHE_COMPRESSION ("zstd", "zlib" or "none") when that shrinks them (f32
+vectors are never compressed).
+
+orjson, msgpack and zstandard are optional. If the configured one is not
+installed, writes fall back to json / zlib with a single warning. A reader
+that lacks the library for an entry it finds raises, which CacheService
+treats as a miss.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import sys
+import zlib
+from array import array
+from typing import Any, Callable, Dict, NamedTuple, Optional, Set, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"\x00"
+_HEADER_LEN = 3
+_NO_COMPRESSION = b"-"
+
+
+class _Codec(NamedTuple):
+    tag: bytes
+    encode: Callable[[Any], bytes]
+    decode: Callable[[bytes], Any]
+    compressible: bool = True
+
+
+# ── Codecs ────────────────────────────────────────────────────────────────────
+
+
+def _json_encode(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _orjson_encode(value: Any) -> bytes:
+    import orjson
+
+    return orjson.dumps(value)
+
+
+def _orjson_decode(payload: bytes) -> Any:
+    try:
+        import orjson
+    except ImportError:
+        return json.loads(payload)   # orjson output is plain JSON
+    return orjson.loads(payload)
+
+
+def _msgpack_encode(value: Any) -> bytes:
+    import msgpack
+
+    return msgpack.packb(value, use_bin_type=True)
+
+
+def _msgpack_decode(payload: bytes) -> Any:
+    import msgpack
+
+    return msgpack.unpackb(payload, raw=False)
+
+
+def _f32_encode(value: Any) -> bytes:
+    vector = array("f", value)
+    if sys.byteorder == "big":
+        vector.byteswap()
+    return vector.tobytes()
+
+
+def _f32_decode(payload: bytes) -> Any:
+    vector = array("f")
+    vector.frombytes(payload)
+    if sys.byteorder == "big":
+        vector.byteswap()
+    return vector.tolist()
+
+
+_CODECS: Dict[str, _Codec] = {
+    "json": _Codec(b"j", _json_encode, json.loads),
+    "orjson": _Codec(b"o", _orjson_encode, _orjson_decode),
+    "msgpack": _Codec(b"m", _msgpack_encode, _msgpack_decode),
+    "f32": _Codec(b"f", _f32_encode, _f32_decode, compressible=False),   # float noise doesn't shrink
+}
+_CODECS_BY_TAG: Dict[bytes, _Codec] = {c.tag: c for c in _CODECS.values()}
+
+# Libraries a codec or compressor needs at write time (json/f32/zlib: stdlib).
+_REQUIRES = {"orjson": "orjson", "msgpack": "msgpack", "zstd": "zstandard"}
+_FALLBACK = {"orjson": "json", "msgpack": "json", "zstd": "zlib"}
+
+
+# ── Compression ───────────────────────────────────────────────────────────────
+
+
+def _zstd_compress(payload: bytes) -> bytes:
+    import zstandard
+
+    return zstandard.ZstdCompressor(level=3).compress(payload)
+
+
+def _zstd_decompress(payload: bytes) -> bytes:
+    import zstandard
+
+    return zstandard.ZstdDecompressor().decompress(payload)
+
+
+_COMPRESSORS: Dict[str, Tuple[bytes, Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    "zstd": (b"z", _zstd_compress, _zstd_decompress),
+    "zlib": (b"d", lambda p: zlib.compress(p, 6), zlib.decompress),
+}
+_DECOMPRESSORS_BY_TAG = {tag: decompress for tag, _, decompress in _COMPRESSORS.values()}
+
+
+# ── Availability ──────────────────────────────────────────────────────────────
+
+_resolved: Dict[str, str] = {}
+_warned: Set[str] = set()
+
+
+def _resolve(name: str) -> str:
+    """Return *name*, or its stdlib fallback if its library is missing."""
+    if name in _resolved:
+        return _resolved[name]
+    chosen = name
+    module = _REQUIRES.get(name)
+    if module is not None:
+        try:
+            __import__(module)
+        except ImportError:
+            chosen = _FALLBACK[name]
+            if name not in _warned:
+                _warned.add(name)
+                logger.warning("Cache %s unavailable (%s not installed); using %s", name, module, chosen)
+    _resolved[name] = chosen
+    return chosen
+
+
+# ── Public API ────────────────────────────────────────────────────────────────
+
+
+def encode(value: Any, codec: Optional[str] = None) -> Tuple[bytes, int]:
+    """Return (stored bytes, uncompressed payload size) for *value*."""
+    name = _resolve(codec or settings.CACHE_CODEC)
+    try:
+        selected = _CODECS[name]
+    except KeyError:
+        raise ValueError(f"Unknown cache codec {name!r}") from None
+    payload = selected.encode(value)
+
+    compression_tag = _NO_COMPRESSION
+    body = payload
+    method = settings.CACHE_COMPRESSION
+    if selected.compressible and method != "none" and len(payload) >= settings.CACHE_COMPRESSION_MIN_BYTES:
+        tag, compress, _ = _COMPRESSORS[_resolve(method)]
+        compressed = compress(payload)
+        if len(compressed) < len(payload):
+            compression_tag, body = tag, compressed
+    return MAGIC + selected.tag + compression_tag + body, len(payload)
+
+
+def decode(raw: bytes) -> Tuple[Any, int]:
+    """Return (value, uncompressed payload size) for bytes read from Redis."""
+    if not raw.startswith(MAGIC):
+        return json.loads(raw), len(raw)   # legacy plain-JSON entry
+    codec_tag, compression_tag = raw[1:2], raw[2:3]
+    payload = raw[_HEADER_LEN:]
+    if compression_tag != _NO_COMPRESSION:
+        try:
+            payload = _DECOMPRESSORS_BY_TAG[compression_tag](payload)
+        except KeyError:
+            raise ValueError(f"Unknown cache compression tag {compression_tag!r}") from None
+    try:
+        selected = _CODECS_BY_TAG[codec_tag]
+    except KeyError:
+        raise ValueError(f"Unknown cache codec tag {codec_tag!r}") from None
+    return selected.decode(payload), len(payload)
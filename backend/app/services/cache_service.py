@@ -1,65 +1,481 @@
 from __future__ import annotations
 
 import hashlib
-import json
 import logging
-from typing import Any, Optional
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
 
 import redis
+from redis.client import NEVER_DECODE
 
 from app.config import settings
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.metrics import record_cache_tier, record_circuit_transition
+from app.core.pool_metrics import PoolExhaustedError, TimedBlockingConnectionPool
+from app.core.tracing import span
+from app.services import cache_codecs
+from app.services.local_cache import MISSING, LocalCache
 
 logger = logging.getLogger(__name__)
 
 _CACHE_MISS = object()  # sentinel distinct from None
 
+USAGE_LIMIT_REACHED = -1
+USAGE_DIRTY_KEY = "usage:dirty"
+
+# KEYS[1] counter, KEYS[2] dirty set; ARGV[1] limit.
+# Returns the new count, USAGE_LIMIT_REACHED, or -2 if the counter is not
+# seeded (the caller seeds it from Postgres and retries). INCR keeps the TTL.
+_INCREMENT_USAGE_LUA = """
+local current = redis.call('GET', KEYS[1])
+if not current then
+  return -2
+end
+if tonumber(current) >= tonumber(ARGV[1]) then
+  return -1
+end
+local count = redis.call('INCR', KEYS[1])
+redis.call('SADD', KEYS[2], KEYS[1])
+return count
+"""
+
+
+# KEYS[1] counter; ARGV[1] count. Raises an existing counter to ARGV[1]
+# (never lowers it, never creates it); returns 1 if it was raised.
+_RAISE_USAGE_LUA = """
+local current = redis.call('GET', KEYS[1])
+if current and tonumber(current) < tonumber(ARGV[1]) then
+  redis.call('SET', KEYS[1], ARGV[1], 'KEEPTTL')
+  return 1
+end
+return 0
+"""
+
 
 class CacheService:
-    """Thin Redis wrapper with JSON serialisation and graceful degradation.
+    """Thin Redis wrapper with compact serialisation and graceful degradation.
 
     All methods swallow Redis errors and log a warning — a cache failure
-    must never break the main request path.
+    must never break the main request path. After
+    CACHE_CIRCUIT_FAILURE_THRESHOLD consecutive connection errors or
+    timeouts the circuit breaker opens: every operation then returns a miss
+    at once instead of waiting on socket timeouts, until a background ping
+    succeeds. ``available`` exposes the breaker to other Redis users.
+
+    Values are stored through cache_codecs (CACHE_CODEC, optionally
+    compressed, tagged so entries written with another codec still decode).
+    They are read back as bytes even though the client decodes responses.
+
+    With CACHE_L1_ENABLED, get() is served from a per-process LRU (see
+    LocalCache) before going to Redis. set()/delete() publish the key on
+    CACHE_INVALIDATION_CHANNEL and a background subscriber drops it from
+    every other process's L1. The L1 is only filled while that subscriber
+    is connected, and is emptied whenever it (re)connects, so a lost
+    message costs at most CACHE_L1_TTL_SECONDS of staleness.
     """
 
     def __init__(self) -> None:
         self._client: Optional[redis.Redis] = None
+        self._l1: Optional[LocalCache] = None
+        if settings.CACHE_L1_ENABLED:
+            self._l1 = LocalCache(
+                max_entries=settings.CACHE_L1_MAX_ENTRIES,
+                max_bytes=settings.CACHE_L1_MAX_BYTES,
+                ttl_seconds=settings.CACHE_L1_TTL_SECONDS,
+                on_event=lambda event, n: record_cache_tier("l1", event, n),
+            )
+        self._redis_counts: Dict[str, int] = dict.fromkeys(("hit", "miss", "error", "short_circuit"), 0)
+        self.breaker = CircuitBreaker(
+            "redis",
+            probe=lambda: self.client.ping(),
+            failure_threshold=settings.CACHE_CIRCUIT_FAILURE_THRESHOLD,
+            reset_seconds=settings.CACHE_CIRCUIT_RESET_SECONDS,
+            on_transition=lambda _, state: record_circuit_transition("redis", state),
+        )
+        self._origin = ""
+        self._subscriber_pid: Optional[int] = None
+        self._subscriber_lock = threading.Lock()
+        self._subscribed = threading.Event()
+        self._invalidations_published = 0
+        self._invalidations_received = 0
+        self._increment_usage_script = None
+        self._raise_usage_script = None
 
     @property
     def client(self) -> redis.Redis:
         if self._client is None:
-            self._client = redis.from_url(
+            # Bounded pool: callers wait up to REDIS_POOL_TIMEOUT for a free
+            # connection instead of opening an unbounded number of sockets.
+            pool = TimedBlockingConnectionPool.from_url(
                 settings.REDIS_URL,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                timeout=settings.REDIS_POOL_TIMEOUT,
                 decode_responses=True,
                 socket_connect_timeout=2,
                 socket_timeout=2,
             )
+            self._client = redis.Redis(connection_pool=pool)
         return self._client
 
+    @property
+    def available(self) -> bool:
+        """False while the circuit is open: skip Redis work instead of waiting on it."""
+        return self.breaker.allow()
+
     # ── Core operations ───────────────────────────────────────────────────
 
     def get(self, key: str) -> Any:
         """Return the cached value, or None on miss/error."""
+        l1_epoch = None
+        if self._l1 is not None:
+            self._ensure_subscriber()
+            value = self._l1.get(key)
+            if value is not MISSING:
+                return value
+            l1_epoch = self._l1.epoch
+        if not self._allow():
+            return None
+        with span("cache.get", **{"cache.key": key}) as current:
+            try:
+                raw = self.client.execute_command("GET", key, **{NEVER_DECODE: []})
+                self.breaker.record_success()
+                if current is not None:
+                    current.set_attribute("cache.hit", raw is not None)
+                self._count_redis("hit" if raw is not None else "miss")
+                if raw is not None:
+                    value, size = cache_codecs.decode(raw)
+                    if self._l1 is not None and self._subscribed.is_set():
+                        self._l1.put(key, value, size=size, epoch=l1_epoch)
+                    return value
+            except Exception as exc:
+                self._record_error(exc)
+                logger.warning("Cache GET error for key=%s: %s", key, exc)
+            return None
+
+    def set(self, key: str, value: Any, ttl: int | None = None, codec: str | None = None) -> None:
+        """Store value with optional TTL (seconds). Defaults to CACHE_TTL_SECONDS.
+
+        *codec* overrides CACHE_CODEC for this value, e.g. "f32" for an embedding.
+        """
+        ttl = ttl if ttl is not None else settings.CACHE_TTL_SECONDS
+        if not self._allow():
+            if self._l1 is not None:
+                self._l1.invalidate(key)
+            return
+        with span("cache.set", **{"cache.key": key, "cache.ttl": ttl}):
+            try:
+                raw, size = cache_codecs.encode(value, codec)
+                if self._l1 is None:
+                    self.client.setex(key, ttl, raw)
+                    self.breaker.record_success()
+                    return
+                # Same round trip: the write and its invalidation notice.
+                pipe = self.client.pipeline(transaction=False)
+                pipe.setex(key, ttl, raw)
+                pipe.publish(settings.CACHE_INVALIDATION_CHANNEL, self._invalidation_message(key))
+                pipe.execute()
+                self.breaker.record_success()
+                self._invalidations_published += 1
+                self._l1.invalidate(key)
+                if self._subscribed.is_set():
+                    self._l1.put(key, value, size=size, ttl=ttl, epoch=self._l1.epoch)
+            except Exception as exc:
+                self._record_error(exc)
+                logger.warning("Cache SET error for key=%s: %s", key, exc)
+
+    def delete(self, key: str) -> None:
         try:
-            raw = self.client.get(key)
-            if raw is not None:
-                return json.loads(raw)
+            if not self._allow():
+                return
+            if self._l1 is None:
+                self.client.delete(key)
+            else:
+                pipe = self.client.pipeline(transaction=False)
+                pipe.delete(key)
+                pipe.publish(settings.CACHE_INVALIDATION_CHANNEL, self._invalidation_message(key))
+                pipe.execute()
+                self._invalidations_published += 1
+            self.breaker.record_success()
         except Exception as exc:
-            logger.warning("Cache GET error for key=%s: %s", key, exc)
-        return None
+            self._record_error(exc)
+            logger.warning("Cache DELETE error for key=%s: %s", key, exc)
+        finally:
+            if self._l1 is not None:
+                self._l1.invalidate(key)
 
-    def set(self, key: str, value: Any, ttl: int | None = None) -> None:
-        """Store value as JSON with optional TTL (seconds). Defaults to CACHE_TTL_SECONDS."""
-        ttl = ttl if ttl is not None else settings.CACHE_TTL_SECONDS
+    # ── L1 coherence ──────────────────────────────────────────────────────
+
+    def _invalidation_message(self, key: str) -> str:
+        self._ensure_subscriber()
+        return f"{self._origin}|{key}"
+
+    def _ensure_subscriber(self) -> None:
+        """Start the invalidation listener once per process (again after a fork)."""
+        pid = os.getpid()
+        if self._subscriber_pid == pid:
+            return
+        with self._subscriber_lock:
+            if self._subscriber_pid == pid:
+                return
+            # A forked child inherits the parent's L1 but not its listener thread.
+            self._subscribed.clear()
+            self._l1.clear()
+            self._origin = f"{socket.gethostname()}:{pid}:{uuid.uuid4().hex[:8]}"
+            self._subscriber_pid = pid
+            threading.Thread(target=self._listen, name="cache-invalidation", daemon=True).start()
+
+    def _listen(self) -> None:
+        pid = os.getpid()
+        backoff = 1.0
+        while self._subscriber_pid == pid:
+            pubsub = None
+            try:
+                # Own connection: a subscribed socket can't serve commands, and
+                # must not hold one of the bounded pool's slots forever.
+                conn = redis.Redis.from_url(
+                    settings.REDIS_URL,
+                    decode_responses=True,
+                    socket_connect_timeout=2,
+                    health_check_interval=30,
+                )
+                pubsub = conn.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(settings.CACHE_INVALIDATION_CHANNEL)
+                # Anything published while we weren't listening is lost.
+                self._l1.clear()
+                self._subscribed.set()
+                backoff = 1.0
+                logger.info("Cache L1 invalidation listener subscribed (origin=%s)", self._origin)
+                while self._subscriber_pid == pid:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get("type") == "message":
+                        self._on_invalidation(message["data"])
+            except Exception as exc:
+                logger.warning("Cache L1 invalidation listener error: %s; retrying in %.0fs", exc, backoff)
+            finally:
+                self._subscribed.clear()
+                self._l1.clear()
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    def _on_invalidation(self, data: str) -> None:
+        origin, _, key = data.partition("|")
+        if origin == self._origin:
+            return   # our own write; the local L1 is already up to date
+        self._invalidations_received += 1
+        self._l1.invalidate(key)
+
+    # ── Circuit breaker ───────────────────────────────────────────────────
+
+    def _allow(self) -> bool:
+        if self.breaker.allow():
+            return True
+        self._count_redis("short_circuit")
+        return False
+
+    def _record_error(self, exc: Exception) -> None:
+        self._count_redis("error")
+        # Only an unreachable or stalled server trips the breaker; a bad
+        # value or command error says nothing about Redis's health, and
+        # neither does waiting too long for one of our own pooled connections.
+        if isinstance(exc, PoolExhaustedError):
+            return
+        if isinstance(exc, (redis.ConnectionError, redis.TimeoutError)):
+            self.breaker.record_failure(exc)
+
+    def _count_redis(self, event: str) -> None:
+        self._redis_counts[event] += 1
+        record_cache_tier("redis", event)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-process hit/miss counters for each tier."""
+        lookups = self._redis_counts["hit"] + self._redis_counts["miss"]
+        return {
+            "l1": (
+                {
+                    "enabled": True,
+                    **self._l1.stats(),
+                    "subscribed": self._subscribed.is_set(),
+                    "invalidations_published": self._invalidations_published,
+                    "invalidations_received": self._invalidations_received,
+                }
+                if self._l1 is not None
+                else {"enabled": False}
+            ),
+            "redis": {
+                "hits": self._redis_counts["hit"],
+                "misses": self._redis_counts["miss"],
+                "errors": self._redis_counts["error"],
+                "short_circuits": self._redis_counts["short_circuit"],
+                "hit_ratio": round(self._redis_counts["hit"] / lookups, 4) if lookups else None,
+                "circuit": self.breaker.snapshot(),
+            },
+        }
+
+    # ── Chapter generations ───────────────────────────────────────────────
+    # Each chapter has a counter that is part of its cache keys. Re-ingestion
+    # bumps it, which orphans every key of the old generation at once (they
+    # age out via their TTL) — no SCAN/DEL over the keyspace. The counter is
+    # read on every RAG lookup, so it is kept in the L1 too and a bump
+    # publishes an invalidation for it like any other write.
+
+    def chapter_generation(self, chapter_id: int) -> Optional[int]:
+        """Current cache generation of a chapter (0 if never bumped).
+
+        None when it can't be read (circuit open or error): the caller then
+        doesn't know which keys are current and must not use the cache.
+        """
+        key = self.chapter_generation_key(chapter_id)
+        l1_epoch = None
+        if self._l1 is not None:
+            self._ensure_subscriber()
+            generation = self._l1.get(key)
+            if generation is not MISSING:
+                return generation
+            l1_epoch = self._l1.epoch
+        if not self._allow():
+            return None
         try:
-            self.client.setex(key, ttl, json.dumps(value))
+            generation = int(self.client.get(key) or 0)
+            self.breaker.record_success()
+            if self._l1 is not None and self._subscribed.is_set():
+                self._l1.put(key, generation, size=len(str(generation)), epoch=l1_epoch)
+            return generation
         except Exception as exc:
-            logger.warning("Cache SET error for key=%s: %s", key, exc)
+            self._record_error(exc)
+            logger.warning("Cache generation read error for chapter=%s: %s", chapter_id, exc)
+            return None
 
-    def delete(self, key: str) -> None:
+    def bump_chapter_generation(self, chapter_id: int) -> Optional[int]:
+        """Atomically start a new generation for a chapter; returns it (None on error)."""
+        if not self._allow():
+            logger.warning("Cache generation bump skipped for chapter=%s: Redis circuit open", chapter_id)
+            return None
+        key = self.chapter_generation_key(chapter_id)
         try:
-            self.client.delete(key)
+            # Published even without a local L1 (e.g. a standalone ingest
+            # script): other processes may be holding the old generation.
+            message = self._invalidation_message(key) if self._l1 is not None else f"|{key}"
+            pipe = self.client.pipeline(transaction=False)
+            pipe.incr(key)
+            pipe.publish(settings.CACHE_INVALIDATION_CHANNEL, message)
+            generation = int(pipe.execute()[0])
+            self.breaker.record_success()
+            self._invalidations_published += 1
+            return generation
         except Exception as exc:
-            logger.warning("Cache DELETE error for key=%s: %s", key, exc)
+            self._record_error(exc)
+            logger.warning("Cache generation bump error for chapter=%s: %s", chapter_id, exc)
+            return None
+        finally:
+            if self._l1 is not None:
+                self._l1.invalidate(key)
+
+    # ── Usage counters ────────────────────────────────────────────────────
+    # Weekly test counters for UsageService. Redis holds the live count;
+    # increments add the key to USAGE_DIRTY_KEY and a write-behind flush
+    # (UsageService.flush_counters) copies dirty counts to usage_tracking.
+
+    def get_usage_count(self, key: str) -> Optional[int]:
+        """Current count, or None if the counter is not seeded or Redis is unavailable."""
+        if not self._allow():
+            return None
+        try:
+            value = self.client.get(key)
+            self.breaker.record_success()
+            return int(value) if value is not None else None
+        except Exception as exc:
+            self._record_error(exc)
+            logger.warning("Usage counter read error for %s: %s", key, exc)
+            return None
+
+    def seed_usage_count(self, key: str, value: int, expire_at: int) -> None:
+        """Create the counter at *value* (expiring at unix time *expire_at*) unless it exists."""
+        if not self._allow():
+            return
+        try:
+            self.client.set(key, value, nx=True, exat=expire_at)
+            self.breaker.record_success()
+        except Exception as exc:
+            self._record_error(exc)
+            logger.warning("Usage counter seed error for %s: %s", key, exc)
+
+    def increment_usage(self, key: str, limit: int) -> Optional[int]:
+        """Atomically increment unless at *limit*.
+
+        Returns the new count, USAGE_LIMIT_REACHED, or None if the counter
+        is not seeded or Redis is unavailable.
+        """
+        if not self._allow():
+            return None
+        try:
+            if self._increment_usage_script is None:
+                self._increment_usage_script = self.client.register_script(_INCREMENT_USAGE_LUA)
+            count = int(self._increment_usage_script(keys=[key, USAGE_DIRTY_KEY], args=[limit]))
+            self.breaker.record_success()
+            return None if count == -2 else count
+        except Exception as exc:
+            self._record_error(exc)
+            logger.warning("Usage counter increment error for %s: %s", key, exc)
+            return None
+
+    def raise_usage_counts(self, counts: Dict[str, int]) -> Optional[int]:
+        """Raise existing counters to at least the given counts, in one round trip.
+
+        Used to push increments made through the database fallback back into
+        Redis. Returns how many counters were raised, or None if Redis is
+        unavailable.
+        """
+        if not counts:
+            return 0
+        if not self._allow():
+            return None
+        try:
+            if self._raise_usage_script is None:
+                self._raise_usage_script = self.client.register_script(_RAISE_USAGE_LUA)
+            pipe = self.client.pipeline(transaction=False)
+            for key, count in counts.items():
+                self._raise_usage_script(keys=[key], args=[count], client=pipe)
+            raised = sum(int(r) for r in pipe.execute())
+            self.breaker.record_success()
+            return raised
+        except Exception as exc:
+            self._record_error(exc)
+            logger.warning("Usage counter raise error (%d keys): %s", len(counts), exc)
+            return None
+
+    def drain_dirty_usage(self, batch: int) -> Dict[str, Optional[int]]:
+        """Pop up to *batch* dirty counters and return their counts (None if expired)."""
+        if not self._allow():
+            return {}
+        try:
+            keys: List[str] = self.client.spop(USAGE_DIRTY_KEY, batch) or []
+            values = self.client.mget(keys) if keys else []
+            self.breaker.record_success()
+        except Exception as exc:
+            self._record_error(exc)
+            logger.warning("Usage counter drain error: %s", exc)
+            return {}
+        return {key: int(value) if value is not None else None for key, value in zip(keys, values)}
+
+    def mark_usage_dirty(self, keys: List[str]) -> None:
+        """Put drained counters back, e.g. after a failed flush."""
+        if not keys or not self._allow():
+            return
+        try:
+            self.client.sadd(USAGE_DIRTY_KEY, *keys)
+            self.breaker.record_success()
+        except Exception as exc:
+            self._record_error(exc)
+            logger.warning("Usage counter re-mark error (%d keys): %s", len(keys), exc)
 
     # ── Key helpers ───────────────────────────────────────────────────────
 
@@ -70,9 +486,22 @@ class CacheService:
         return hashlib.md5(raw.encode()).hexdigest()
 
     @staticmethod
-    def rag_context_key(chapter_id: int, query: str) -> str:
+    def chapter_generation_key(chapter_id: int) -> str:
+        return f"chapter_gen:{chapter_id}"
+
+    @staticmethod
+    def usage_counter_key(user_id: Any, week_start: Any) -> str:
+        return f"usage:{user_id}:{week_start}"
+
+    @staticmethod
+    def rag_context_key(chapter_id: int, query: str, generation: int = 0) -> str:
         h = hashlib.md5(query.encode()).hexdigest()
-        return f"rag_ctx:{chapter_id}:{h}"
+        return f"rag_ctx:{chapter_id}:g{generation}:{h}"
+
+    @staticmethod
+    def query_embedding_key(model: str, text: str) -> str:
+        h = hashlib.md5(text.encode()).hexdigest()
+        return f"qemb:{model}:{h}"
 
     @staticmethod
     def ping() -> bool:
@@ -0,0 +1,357 @@
+"""Structure-aware text chunker shared by every ingestion path.
+
+Pages are streamed in, cleaned of running headers and Symbol-font glyphs,
+grouped into structural blocks (sections, examples, exercises, theorems)
+and split into sentences. Sentences are then packed into chunks of at most
+``max_chars`` characters:
+
+- a block that fits in one chunk is never split across two,
+- a heading is never left dangling at the end of a chunk,
+- chunks may span page boundaries and record their page range,
+- when a block has to be split mid-paragraph, the last sentence of the
+  previous chunk is repeated at the start of the next one for continuity.
+
+Each chunk carries a stable ``chunk_id`` derived from its content, so
+re-ingesting an unchanged PDF yields identical IDs. Both the ID and the
+page range are stored on the TextChunk row.
+"""
+from __future__ import annotations
+
+import bisect
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.config import settings
+
+if TYPE_CHECKING:
+    from app.services.pdf_text import PdfSource
+
+# ── Text clean-up ─────────────────────────────────────────────────────────────
+
+# NCERT PDFs typeset math with the Symbol font, which pypdf extracts into the
+# U+F0xx private-use range. Map the common glyphs back to real characters.
+_SYMBOL_FONT_MAP: Dict[int, str] = {
+    0xF02B: "+", 0xF02D: "−", 0xF03D: "=", 0xF03C: "<", 0xF03E: ">",
+    0xF0B4: "×", 0xF0B8: "÷", 0xF0B9: "≠", 0xF0A3: "≤", 0xF0B3: "≥",
+    0xF0B1: "±", 0xF0B0: "°", 0xF0D6: "√", 0xF0D7: "·", 0xF0A5: "∞",
+    0xF070: "π", 0xF071: "θ", 0xF061: "α", 0xF062: "β", 0xF067: "γ",
+    0xF064: "δ", 0xF0C5: "∆", 0xF044: "∆", 0xF06C: "λ", 0xF06D: "μ",
+    0xF073: "σ", 0xF053: "Σ", 0xF0DE: "⇒", 0xF0DB: "⇔", 0xF0CE: "∈",
+    0xF05B: "[", 0xF05D: "]", 0xF07B: "{", 0xF07D: "}", 0xF07C: "|",
+}
+# Bracket-building pieces carry no meaning once flattened to text.
+_SYMBOL_FONT_DROP = {0xF0E6, 0xF0E7, 0xF0E8, 0xF0F6, 0xF0F7, 0xF0F8, 0xF0EC, 0xF0ED, 0xF0EE, 0xF0FC, 0xF0FD, 0xF0FE}
+
+_TRANSLATION = {
+    # Digits and ASCII punctuation sit at their usual code points in the Symbol font.
+    **{0xF000 + cp: chr(cp) for cp in range(0x20, 0x40)},
+    **_SYMBOL_FONT_MAP,
+    **{cp: None for cp in _SYMBOL_FONT_DROP},
+}
+
+_RUNNING_HEADER_RE = re.compile(
+    r"^(?:[Rr]eprint\s+\d{4}-\d{2}|\d+|(?:\d+\s+)?[A-Z][A-Z ]{3,}(?:\s+\d+)?)$"
+)
+_HEADER_LINES = 2   # running headers/footers live in the first/last lines of a page
+
+# Lines that open a new structural block.
+_BLOCK_START_RE = re.compile(
+    r"^(?:"
+    r"(?:example|exercise|theorem|lemma|corollary|definition|activity)\s*\d+(?:\.\d+)*\*?\s*(?::|$|\s)"
+    r"|\d{1,2}\.\d{1,2}(?:\.\d{1,2})?\s+[A-Z]"
+    r"|summary$"
+    r")",
+    re.IGNORECASE,
+)
+# Short block-start lines with no sentence terminator are pure headings.
+_MAX_HEADING_CHARS = 100
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+(?=[(\"'‘“]?[A-Z0-9])")
+_ABBREVIATIONS = ("fig.", "e.g.", "i.e.", "eq.", "no.", "vol.", "etc.", "ex.", "viz.", "cf.")
+
+
+def _clean_line(line: str) -> str:
+    return re.sub(r"[ \t]+", " ", line.translate(_TRANSLATION)).strip()
+
+
+def _is_running_header(line: str) -> bool:
+    return bool(_RUNNING_HEADER_RE.match(line)) and not _BLOCK_START_RE.match(line)
+
+
+def _strip_running_headers(lines: List[str]) -> List[str]:
+    head = 0
+    while head < min(_HEADER_LINES, len(lines)) and _is_running_header(lines[head]):
+        head += 1
+    tail = len(lines)
+    while tail > max(head, len(lines) - _HEADER_LINES) and _is_running_header(lines[tail - 1]):
+        tail -= 1
+    return lines[head:tail]
+
+
+def _split_sentences(text: str) -> List[str]:
+    pieces = _SENTENCE_END_RE.split(text)
+    sentences: List[str] = []
+    for piece in pieces:
+        if sentences and sentences[-1].lower().endswith(_ABBREVIATIONS):
+            sentences[-1] = f"{sentences[-1]} {piece}"
+        else:
+            sentences.append(piece)
+    return [s.strip() for s in sentences if s.strip()]
+
+
+# ── Data ──────────────────────────────────────────────────────────────────────
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """One chunk of chapter text, ready to embed."""
+
+    content: str
+    chunk_index: int
+    page_start: int
+    page_end: int
+
+    @property
+    def page_number(self) -> int:
+        return self.page_start
+
+    @property
+    def chunk_id(self) -> str:
+        """Content-derived ID, stable across re-ingestion of the same PDF."""
+        normalized = " ".join(self.content.split()).lower()
+        return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "chunk_id": self.chunk_id,
+            "content": self.content,
+            "chunk_index": self.chunk_index,
+            "page_number": self.page_start,
+            "page_end": self.page_end,
+        }
+
+
+@dataclass
+class _Sentence:
+    text: str
+    page: int
+    is_heading: bool = False
+
+
+# ── Block assembly ────────────────────────────────────────────────────────────
+
+
+class _BlockBuilder:
+    """Accumulates lines into a block and turns it into sentences on close."""
+
+    def __init__(self, spill_chars: int) -> None:
+        self._spill_chars = spill_chars
+        self._text = ""
+        self._line_offsets: List[int] = []
+        self._line_pages: List[int] = []
+        self._heading: Optional[_Sentence] = None
+
+    @property
+    def is_empty(self) -> bool:
+        return not self._text and self._heading is None
+
+    def start(self, line: str, page: int) -> None:
+        if (
+            len(line) <= _MAX_HEADING_CHARS
+            and not line.endswith((".", "?", "!", ","))
+            and not re.search(r":\s*\S", line)
+        ):
+            self._heading = _Sentence(line, page, is_heading=True)
+        else:
+            self.append(line, page)
+
+    def append(self, line: str, page: int) -> None:
+        if self._text.endswith("-") and len(self._text) > 1 and self._text[-2].isalpha() and line[:1].islower():
+            self._text = self._text[:-1]   # re-join hyphenated word
+        elif self._text:
+            self._text += " "
+        self._line_offsets.append(len(self._text))
+        self._line_pages.append(page)
+        self._text += line
+
+    def _page_at(self, offset: int) -> int:
+        i = bisect.bisect_right(self._line_offsets, offset) - 1
+        return self._line_pages[max(i, 0)]
+
+    def _sentences(self, text: str) -> List[_Sentence]:
+        result: List[_Sentence] = []
+        cursor = 0
+        for sentence in _split_sentences(text):
+            pos = text.find(sentence, cursor)
+            cursor = pos + len(sentence) if pos >= 0 else cursor
+            result.append(_Sentence(sentence, self._page_at(max(pos, 0))))
+        return result
+
+    def spill(self) -> List[_Sentence]:
+        """Release complete sentences of an oversized block, keeping the tail open."""
+        if len(self._text) < self._spill_chars:
+            return []
+        sentences = self._sentences(self._text)
+        if len(sentences) < 2:
+            return []
+        tail = sentences[-1]
+        tail_offset = self._text.rfind(tail.text)
+        released = ([self._heading] if self._heading else []) + sentences[:-1]
+        offsets = [o - tail_offset for o in self._line_offsets]
+        keep = max(bisect.bisect_right(offsets, 0) - 1, 0)
+        self._line_offsets = [0] + offsets[keep + 1 :]
+        self._line_pages = [tail.page] + self._line_pages[keep + 1 :]
+        self._text = self._text[tail_offset:]
+        self._heading = None
+        return released
+
+    def close(self) -> List[_Sentence]:
+        sentences = ([self._heading] if self._heading else []) + self._sentences(self._text)
+        self._text = ""
+        self._line_offsets = []
+        self._line_pages = []
+        self._heading = None
+        return sentences
+
+
+# ── Packing ───────────────────────────────────────────────────────────────────
+
+
+class _Packer:
+    def __init__(self, max_chars: int, min_chars: int, overlap_chars: int) -> None:
+        self.max_chars = max_chars
+        self.min_chars = min_chars
+        self.overlap_chars = overlap_chars
+        self._parts: List[_Sentence] = []
+        self._length = 0
+        self._carried = 0     # leading parts repeated from the previous chunk
+        self._index = 0
+
+    def _fits(self, size: int) -> bool:
+        return self._length + size + (1 if self._parts else 0) <= self.max_chars
+
+    def _append(self, sentence: _Sentence) -> None:
+        self._length += len(sentence.text) + (1 if self._parts else 0)
+        self._parts.append(sentence)
+
+    def _reset(self, parts: List[_Sentence], carried: int) -> None:
+        self._parts = []
+        self._length = 0
+        for part in parts:
+            self._append(part)
+        self._carried = carried
+
+    def flush(self, carry: bool = False) -> Iterator[Chunk]:
+        if len(self._parts) <= self._carried:
+            self._reset([], 0)
+            return
+        # Never end a chunk on a heading — move it to the next chunk instead.
+        trailing: List[_Sentence] = []
+        while self._parts and self._parts[-1].is_heading and len(self._parts) - 1 > self._carried:
+            trailing.insert(0, self._parts.pop())
+
+        content = " ".join(p.text for p in self._parts)
+        yield Chunk(
+            content=content,
+            chunk_index=self._index,
+            page_start=self._parts[0].page,
+            page_end=self._parts[-1].page,
+        )
+        self._index += 1
+
+        last = self._parts[-1]
+        if carry and not trailing and not last.is_heading and len(last.text) <= self.overlap_chars:
+            self._reset([last], 1)
+        else:
+            self._reset(trailing, 0)
+
+    def add_block(self, sentences: List[_Sentence]) -> Iterator[Chunk]:
+        size = sum(len(s.text) for s in sentences) + len(sentences) - 1
+        # Start the block on a fresh chunk unless the current one is still too small.
+        if not self._fits(size) and self._length - self._overlap_length() >= self.min_chars:
+            yield from self.flush()
+        if self._carried and len(self._parts) == self._carried and not self._fits(size):
+            self._reset([], 0)
+        if self._fits(size):
+            for sentence in sentences:
+                self._append(sentence)
+            return
+        for sentence in sentences:
+            yield from self.add_sentence(sentence)
+
+    def _overlap_length(self) -> int:
+        return sum(len(p.text) + 1 for p in self._parts[: self._carried])
+
+    def add_sentence(self, sentence: _Sentence) -> Iterator[Chunk]:
+        if len(sentence.text) > self.max_chars:
+            for piece in self._hard_split(sentence):
+                yield from self.add_sentence(piece)
+            return
+        if not self._fits(len(sentence.text)) and self._parts:
+            yield from self.flush(carry=True)
+            if not self._fits(len(sentence.text)):
+                self._reset([p for p in self._parts[self._carried :]], 0)
+        self._append(sentence)
+
+    def _hard_split(self, sentence: _Sentence) -> Iterator[_Sentence]:
+        """Split an over-long run-on "sentence" (tables, formulas) on word boundaries."""
+        words = sentence.text.split(" ")
+        piece: List[str] = []
+        length = 0
+        for word in words:
+            if piece and length + len(word) + 1 > self.max_chars:
+                yield _Sentence(" ".join(piece), sentence.page)
+                piece, length = [], 0
+            piece.append(word[: self.max_chars])
+            length += len(piece[-1]) + (1 if len(piece) > 1 else 0)
+        if piece:
+            yield _Sentence(" ".join(piece), sentence.page)
+
+
+# ── Public API ────────────────────────────────────────────────────────────────
+
+
+def chunk_pages(
+    pages: Iterable[Tuple[int, str]],
+    max_chars: int | None = None,
+    min_chars: int | None = None,
+    overlap_chars: int | None = None,
+) -> Iterator[Chunk]:
+    """Stream ``(page_number, text)`` pairs into structure-aware chunks.
+
+    Memory use is bounded by roughly ``2 * max_chars`` of pending text,
+    independent of the PDF size.
+    """
+    max_chars = max_chars or settings.CHUNK_MAX_CHARS
+    min_chars = min_chars if min_chars is not None else settings.CHUNK_MIN_CHARS
+    overlap_chars = overlap_chars if overlap_chars is not None else settings.CHUNK_OVERLAP_CHARS
+
+    packer = _Packer(max_chars, min_chars, overlap_chars)
+    block = _BlockBuilder(spill_chars=2 * max_chars)
+
+    for page_number, raw_text in pages:
+        lines = [_clean_line(line) for line in (raw_text or "").splitlines()]
+        lines = _strip_running_headers([line for line in lines if line])
+        for line in lines:
+            if _BLOCK_START_RE.match(line):
+                if not block.is_empty:
+                    yield from packer.add_block(block.close())
+                block.start(line, page_number)
+            else:
+                block.append(line, page_number)
+                spilled = block.spill()
+                for sentence in spilled:
+                    yield from packer.add_sentence(sentence)
+
+    if not block.is_empty:
+        yield from packer.add_block(block.close())
+    yield from packer.flush()
+
+
+def chunk_pdf(source: "PdfSource", **kwargs: Any) -> List[Dict[str, Any]]:
+    """Extract and chunk a PDF (bytes or path), returning the dicts stored as TextChunk rows."""
+    from app.services.pdf_text import iter_pdf_pages
+
+    return [chunk.as_dict() for chunk in chunk_pages(iter_pdf_pages(source), **kwargs)]
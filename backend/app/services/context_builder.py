@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Protocol, Sequence
+
+from app.config import settings
+from app.services.tokenizer import count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+PASSAGE_SEPARATOR = "\n\n---\n\n"
+
+# Adjacent chunks share a CHUNK_OVERLAP-sized tail/head; allow some slack for
+# whitespace stripping at the window edges.
+_MAX_OVERLAP_CHARS = 400
+_MIN_OVERLAP_CHARS = 20
+
+# Two passages whose word-trigram sets overlap this much are treated as the same text.
+_NEAR_DUPLICATE_JACCARD = 0.85
+_SHINGLE_SIZE = 3
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class ChunkLike(Protocol):
+    content: str
+    chunk_index: int
+    page_number: Optional[int]
+
+
+@dataclass
+class _Passage:
+    rank: int
+    chunk_index: int
+    page_number: Optional[int]
+    content: str
+    shingles: frozenset = field(repr=False, default=frozenset())
+
+    @property
+    def sort_key(self) -> tuple[int, int]:
+        return (self.page_number or 0, self.chunk_index)
+
+
+def _shingles(text: str) -> frozenset:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < _SHINGLE_SIZE:
+        return frozenset([" ".join(words)]) if words else frozenset()
+    return frozenset(
+        " ".join(words[i : i + _SHINGLE_SIZE]) for i in range(len(words) - _SHINGLE_SIZE + 1)
+    )
+
+
+def _is_near_duplicate(a: frozenset, b: frozenset) -> bool:
+    if not a or not b:
+        return False
+    return len(a & b) / len(a | b) >= _NEAR_DUPLICATE_JACCARD
+
+
+def _overlap_length(head: str, tail: str) -> int:
+    """Length of the longest suffix of *head* that is also a prefix of *tail*."""
+    limit = min(len(head), len(tail), _MAX_OVERLAP_CHARS)
+    for size in range(limit, _MIN_OVERLAP_CHARS - 1, -1):
+        if head.endswith(tail[:size]):
+            return size
+    return 0
+
+
+def _merge_text(head: str, tail: str) -> str:
+    overlap = _overlap_length(head, tail)
+    if overlap:
+        return head + tail[overlap:]
+    if tail in head:
+        return head
+    return f"{head}\n{tail}"
+
+
+def _page_label(first: Optional[int], last: Optional[int]) -> str:
+    if first is None:
+        return ""
+    if last is None or last == first:
+        return f", p. {first}"
+    return f", pp. {first}-{last}"
+
+
+def build_context(
+    chunks: Sequence[ChunkLike],
+    token_budget: int | None = None,
+) -> str:
+    """Assemble retrieved chunks into a compact, token-bounded prompt context.
+
+    *chunks* must be in relevance order (best first), as returned by
+    RAGService.retrieve(). The pipeline:
+
+    1. drop near-duplicate passages (word-trigram Jaccard similarity),
+    2. keep the most relevant passages that fit in *token_budget*,
+    3. re-order the survivors by (page_number, chunk_index),
+    4. merge runs of consecutive chunk_index values, stripping the
+       sliding-window overlap so shared text is sent only once.
+    """
+    budget = token_budget if token_budget is not None else settings.RAG_CONTEXT_TOKEN_BUDGET
+    separator_tokens = count_tokens(PASSAGE_SEPARATOR)
+
+    kept: List[_Passage] = []
+    used_tokens = 0
+    dropped_duplicates = 0
+    dropped_budget = 0
+
+    for rank, chunk in enumerate(chunks):
+        content = (chunk.content or "").strip()
+        if not content:
+            continue
+
+        shingles = _shingles(content)
+        if any(_is_near_duplicate(shingles, p.shingles) for p in kept):
+            dropped_duplicates += 1
+            continue
+
+        cost = count_tokens(content) + (separator_tokens if kept else 0)
+        if used_tokens + cost > budget:
+            if kept:
+                dropped_budget += 1
+                continue
+            # Never return an empty context because the best chunk alone is too large.
+            content = truncate_to_tokens(content, budget)
+            cost = count_tokens(content)
+
+        kept.append(
+            _Passage(
+                rank=rank,
+                chunk_index=chunk.chunk_index,
+                page_number=chunk.page_number,
+                content=content,
+                shingles=shingles,
+            )
+        )
+        used_tokens += cost
+
+    if not kept:
+        return ""
+
+    kept.sort(key=lambda p: p.sort_key)
+
+    sections: List[str] = []
+    run_text = kept[0].content
+    run_first_page = kept[0].page_number
+    run_last_page = kept[0].page_number
+    prev = kept[0]
+
+    for passage in kept[1:]:
+        if passage.chunk_index == prev.chunk_index + 1:
+            run_text = _merge_text(run_text, passage.content)
+            run_last_page = passage.page_number
+        else:
+            sections.append(
+                f"[Passage {len(sections) + 1}{_page_label(run_first_page, run_last_page)}]\n{run_text}"
+            )
+            run_text = passage.content
+            run_first_page = passage.page_number
+            run_last_page = passage.page_number
+        prev = passage
+
+    sections.append(
+        f"[Passage {len(sections) + 1}{_page_label(run_first_page, run_last_page)}]\n{run_text}"
+    )
+
+    logger.debug(
+        "Context: %d/%d chunks kept in %d passages (~%d tokens, budget %d); "
+        "dropped %d duplicate, %d over budget",
+        len(kept),
+        len(chunks),
+        len(sections),
+        used_tokens,
+        budget,
+        dropped_duplicates,
+        dropped_budget,
+    )
+    return PASSAGE_SEPARATOR.join(sections)
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import contextvars
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import openai
+from openai import OpenAI
+
+from app.config import settings
+from app.core.metrics import record_openai_usage
+from app.core.tracing import span
+from app.services.rate_limiter import RateLimiter
+from app.services.tokenizer import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Hard per-request limit of the embeddings endpoint on the number of inputs.
+_API_MAX_INPUTS = 2048
+
+_BACKOFF_BASE_SECONDS = 1.0
+_BACKOFF_MAX_SECONDS = 60.0
+# Concurrent 429s from one burst should shrink the window once, not N times.
+_DECREASE_COOLDOWN_SECONDS = 1.0
+
+_TRANSIENT_ERRORS = (
+    openai.APIConnectionError,   # includes APITimeoutError
+    openai.InternalServerError,
+)
+
+
+class _AimdWindow:
+    """Adaptive cap on in-flight requests: +1 per window of successes, ×½ on a 429."""
+
+    def __init__(self, maximum: int) -> None:
+        self.maximum = max(1, maximum)
+        self.limit = float(self.maximum)
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def __enter__(self) -> "_AimdWindow":
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                self._cond.wait()
+            self._in_flight += 1
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self) -> None:
+        with self._cond:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def on_throttle(self) -> None:
+        with self._cond:
+            now = time.monotonic()
+            if now - self._last_decrease >= _DECREASE_COOLDOWN_SECONDS:
+                self.limit = max(1.0, self.limit / 2)
+                self._last_decrease = now
+                logger.info("Embeddings throttled — concurrency window now %d", int(self.limit))
+
+
+def _retry_after_seconds(exc: openai.APIStatusError) -> Optional[float]:
+    """Read the server's requested back-off from a 429 response, if any."""
+    headers = exc.response.headers if exc.response is not None else {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000.0
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+def _backoff_seconds(attempt: int) -> float:
+    delay = min(_BACKOFF_MAX_SECONDS, _BACKOFF_BASE_SECONDS * (2 ** attempt))
+    return delay * (0.5 + random.random() / 2)
+
+
+class EmbeddingClient:
+    """Thread-safe embeddings client shared by every ingestion path.
+
+    Inputs are packed into requests by token count (EMBEDDING_BATCH_MAX_TOKENS)
+    rather than a fixed number of chunks, and sub-batches are sent with up to
+    EMBEDDING_MAX_CONCURRENCY requests in flight. That window is AIMD-managed:
+    it halves on a 429 and grows back by one per window of successful calls.
+    A failed sub-batch is retried on its own — honouring Retry-After on 429s
+    and backing off exponentially on 5xx/connection errors — so one bad
+    request does not redo the rest of the document.
+
+    *limiter*, when given, is charged one request and the batch's tokens
+    before each call; share one client (and so one limiter and one window)
+    between threads that should respect the same account limits.
+    """
+
+    def __init__(
+        self,
+        limiter: Optional[RateLimiter] = None,
+        max_batch_tokens: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+    ) -> None:
+        self.limiter = limiter
+        self.max_batch_tokens = max_batch_tokens or settings.EMBEDDING_BATCH_MAX_TOKENS
+        self.max_concurrency = max_concurrency or settings.EMBEDDING_MAX_CONCURRENCY
+        self.max_retries = settings.EMBEDDING_MAX_RETRIES if max_retries is None else max_retries
+        self._window = _AimdWindow(self.max_concurrency)
+        self._client: OpenAI | None = None
+
+    @property
+    def client(self) -> OpenAI:
+        if self._client is None:
+            # Retries are handled per sub-batch below, with AIMD feedback.
+            self._client = OpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
+        return self._client
+
+    # ── Packing ───────────────────────────────────────────────────────────
+
+    def pack(self, texts: Sequence[str]) -> List[Tuple[int, int, int]]:
+        """Split *texts* into (start, stop, tokens) ranges that fit one request each."""
+        batches: List[Tuple[int, int, int]] = []
+        start = 0
+        tokens = 0
+        for i, text in enumerate(texts):
+            cost = count_tokens(text)
+            if i > start and (
+                tokens + cost > self.max_batch_tokens or i - start >= _API_MAX_INPUTS
+            ):
+                batches.append((start, i, tokens))
+                start, tokens = i, 0
+            tokens += cost
+        if start < len(texts):
+            batches.append((start, len(texts), tokens))
+        return batches
+
+    # ── Requests ──────────────────────────────────────────────────────────
+
+    def _request(self, texts: Sequence[str], tokens: int) -> List[List[float]]:
+        """Embed one sub-batch, retrying it alone on throttling or transient errors."""
+        attempt = 0
+        while True:
+            if self.limiter is not None:
+                self.limiter.acquire(tokens)
+            try:
+                with self._window, span(
+                    "openai.embeddings",
+                    **{"openai.model": settings.OPENAI_EMBEDDING_MODEL, "openai.inputs": len(texts)},
+                ):
+                    response = self.client.embeddings.create(
+                        input=list(texts),
+                        model=settings.OPENAI_EMBEDDING_MODEL,
+                    )
+            except openai.RateLimitError as exc:
+                if getattr(exc, "code", None) == "insufficient_quota" or attempt >= self.max_retries:
+                    raise
+                self._window.on_throttle()
+                delay = _retry_after_seconds(exc) or _backoff_seconds(attempt)
+                reason = "rate limited"
+            except _TRANSIENT_ERRORS as exc:
+                if attempt >= self.max_retries:
+                    raise
+                delay = _backoff_seconds(attempt)
+                reason = type(exc).__name__
+            else:
+                self._window.on_success()
+                record_openai_usage(settings.OPENAI_EMBEDDING_MODEL, response.usage, embedding=True)
+                return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+            attempt += 1
+            logger.warning(
+                "Embedding sub-batch of %d inputs %s — retry %d/%d in %.1fs",
+                len(texts),
+                reason,
+                attempt,
+                self.max_retries,
+                delay,
+            )
+            time.sleep(delay)
+
+    def iter_batches(self, texts: Sequence[str]) -> Iterator[Tuple[int, List[List[float]]]]:
+        """Yield (start, embeddings) for each sub-batch of *texts* as it completes.
+
+        ``embeddings[k]`` belongs to ``texts[start + k]``. Sub-batches complete
+        out of order; the generator runs in the caller's thread, so callers
+        can write each result to their DB session as it arrives.
+        """
+        batches = self.pack(texts)
+        if len(batches) <= 1 or self.max_concurrency <= 1:
+            for start, stop, tokens in batches:
+                yield start, self._request(texts[start:stop], tokens)
+            return
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_concurrency, len(batches)),
+            thread_name_prefix="embed",
+        ) as pool:
+            # Each sub-batch runs in a copy of the caller's context, so its
+            # span is a child of the caller's (e.g. ingest.embed) instead of
+            # an orphan root. One copy per task: a Context can't be entered
+            # by two threads at once.
+            futures = {
+                pool.submit(contextvars.copy_context().run, self._request, texts[start:stop], tokens): start
+                for start, stop, tokens in batches
+            }
+            try:
+                for future in as_completed(futures):
+                    yield futures[future], future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embed *texts*, returning vectors in input order."""
+        vectors: List[List[float]] = [[] for _ in texts]
+        for start, embeddings in self.iter_batches(texts):
+            vectors[start : start + len(embeddings)] = embeddings
+        return vectors
+
+
+# Module-level singleton — one AIMD window per process for the API and worker.
+embedding_client = EmbeddingClient(
+    limiter=RateLimiter(
+        requests_per_minute=settings.OPENAI_EMBEDDING_RPM,
+        tokens_per_minute=settings.OPENAI_EMBEDDING_TPM,
+    )
+)
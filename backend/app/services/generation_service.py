@@ -1,26 +1,36 @@
 from __future__ import annotations
 
+import base64
+import binascii
 import json
 import logging
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from openai import OpenAI
-from sqlalchemy.orm import Session
+from sqlalchemy import tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, joinedload
 
 from app.config import settings
-from app.core.exceptions import GenerationError, NotFoundError
-from app.models.board import Chapter
+from app.core.exceptions import BadRequestError, ConflictError, GenerationError, NotFoundError
+from app.core.metrics import observe_stage, record_cache, record_openai_usage
+from app.core.tracing import span
+from app.models.board import Chapter, Subject
 from app.models.generated_test import GeneratedTest
+from app.models.ingestion_job import IngestionJob
 from app.models.question_cache import QuestionCache
+from app.models.question_set import QuestionSet, question_set_hash
 from app.models.user import Profile
-from app.schemas.board import ChapterSummaryResponse
+from app.schemas.board import ChapterPreparationResponse, ChapterSummaryResponse
 from app.schemas.test import (
     AnswerDetail,
     GenerateTestRequest,
     GeneratedTestResponse,
     SubmitTestResponse,
 )
+from app.services.analytics_service import AnalyticsService
+from app.services.cache_service import cache
 from app.services.rag_service import RAGService
 from app.services.usage_service import UsageService
 
@@ -75,11 +85,40 @@ Return only the summary text.
 """
 
 
+def _question_id(value: Any) -> Optional[int]:
+    """*value* as a positive integer question id, or None if it is not one."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value if value > 0 else None
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value) or None
+    return None
+
+
+def _normalize_questions(questions_json: Any) -> Dict[str, Any]:
+    """Validate the model's output and give every question a unique integer id.
+
+    Question ids key the answers map and question_stats rows, so they must
+    be unique within a set. Ids that are all valid and distinct are kept
+    (as ints); otherwise the questions are renumbered 1..n in order.
+    """
+    questions = questions_json.get("questions") if isinstance(questions_json, dict) else None
+    if not isinstance(questions, list) or not all(isinstance(q, dict) for q in questions):
+        raise GenerationError("AI returned questions in an unexpected format. Please retry.")
+    ids = [_question_id(q.get("id")) for q in questions]
+    if None in ids or len(set(ids)) != len(ids):
+        logger.warning("AI returned missing or duplicate question ids %s; renumbering", [q.get("id") for q in questions])
+        ids = list(range(1, len(questions) + 1))
+    return {**questions_json, "questions": [{**q, "id": i} for q, i in zip(questions, ids)]}
+
+
 class GenerationService:
     def __init__(self, db: Session) -> None:
         self.db = db
         self.rag = RAGService(db)
         self.usage = UsageService(db)
+        self.analytics = AnalyticsService(db)
         self._client: OpenAI | None = None
 
     @property
@@ -92,22 +131,36 @@ class GenerationService:
 
     def generate_test(
         self, request: GenerateTestRequest, user: Profile
-    ) -> GeneratedTestResponse:
+    ) -> Union[GeneratedTestResponse, ChapterPreparationResponse]:
+        """Create a test for *user*, or return the job preparing the chapter.
+
+        When the question cache misses and the chapter's embeddings are not
+        ready, an ingestion job is enqueued (or joined) and its handle is
+        returned instead; the router answers 202 and no quota is consumed.
+        """
         chapter = self.db.query(Chapter).filter(Chapter.id == request.chapter_id).first()
         if not chapter:
             raise NotFoundError("Chapter")
 
-        # Enforce usage limit first (raises on exceeded)
-        self.usage.check_and_increment(user)
-
         # ── Strategy 1: DB question cache ─────────────────────────────────
         # Check if a valid cached question set exists for this
         # (chapter, num_questions) pair — shared across all users.
-        questions_json = self._get_cached_questions(
-            chapter.id, request.num_questions
-        )
+        with observe_stage("question_cache_lookup"):
+            question_set = self._get_cached_questions(
+                chapter.id, request.num_questions
+            )
+        record_cache("question", hit=question_set is not None)
+
+        if question_set is None:
+            preparing = self._preparation_if_not_ready(chapter)
+            if preparing is not None:
+                return preparing
+
+        # Enforce usage limit before any OpenAI spend (raises on exceeded)
+        with observe_stage("usage_check"):
+            self.usage.check_and_increment(user)
 
-        if questions_json is not None:
+        if question_set is not None:
             logger.info(
                 "Question cache HIT: chapter=%d num_q=%d — skipping OpenAI",
                 chapter.id,
@@ -119,7 +172,48 @@ class GenerationService:
                 chapter.id,
                 request.num_questions,
             )
+            question_set = self._generate_and_cache_questions(chapter, request.num_questions)
 
+        # Always create a per-user GeneratedTest record (for score tracking).
+        # It references the shared question set; nothing is copied.
+        with observe_stage("persistence"):
+            test = GeneratedTest(
+                user_id=user.id,
+                chapter_id=chapter.id,
+                question_set=question_set,
+                num_questions=question_set.num_questions,
+            )
+            self.db.add(test)
+            self.db.commit()
+            self.db.refresh(test)
+
+        return self._to_response(test, chapter.chapter_name, chapter.subject.subject_name)
+
+    def warm_question_cache(self, chapter_id: int, num_questions: int) -> bool:
+        """Pre-generate the shared question set for a chapter if none is cached.
+
+        Returns True when a new set was generated. Used by the
+        pregenerate_questions task; does not touch any user's usage quota.
+        """
+        chapter = self.db.query(Chapter).filter(Chapter.id == chapter_id).first()
+        if not chapter:
+            raise NotFoundError("Chapter")
+        if self._get_cached_questions(chapter.id, num_questions) is not None:
+            return False
+        self._generate_and_cache_questions(chapter, num_questions, ensure_embeddings=True)
+        return True
+
+    def _generate_and_cache_questions(
+        self, chapter: Chapter, num_questions: int, ensure_embeddings: bool = False
+    ) -> QuestionSet:
+        """Cache-miss path: retrieve context, call OpenAI, store.
+
+        Only worker callers pass *ensure_embeddings* (which may download,
+        parse and embed the PDF). The API path has already checked readiness
+        with _preparation_if_not_ready and must never ingest in-request; if
+        the chunks vanished since, retrieval comes back empty and fails below.
+        """
+        if ensure_embeddings:
             try:
                 embedded_chunks = self.rag.ensure_chapter_embeddings(
                     chapter_id=chapter.id,
@@ -140,69 +234,64 @@ class GenerationService:
                 raise GenerationError(
                     "No embeddings found for this chapter. Please upload/reprocess the chapter PDF first."
                 )
-            if chapter.status != "ready" or chapter.error_message:
-                chapter.status = "ready"
-                chapter.error_message = None
-
-            # ── Strategy 2: Redis RAG context cache ───────────────────────
-            # retrieve_context() caches the embedding + vector search result
-            # in Redis, skipping the OpenAI embed call on subsequent requests.
-            rag_query = (
-                f"Key concepts, theorems, formulas and important topics "
-                f"in {chapter.chapter_name}"
+        if chapter.status != "ready" or chapter.error_message:
+            chapter.status = "ready"
+            chapter.error_message = None
+
+        # Captured before retrieval: if the chapter is re-ingested while we
+        # generate, the result was built from old chunks and must not be shared.
+        generation = cache.chapter_generation(chapter.id)
+
+        # ── Strategy 2: Redis RAG context cache ───────────────────────────
+        # retrieve_context() caches the embedding + vector search result
+        # in Redis, skipping the OpenAI embed call on subsequent requests.
+        rag_query = (
+            f"Key concepts, theorems, formulas and important topics "
+            f"in {chapter.chapter_name}"
+        )
+        context = self.rag.retrieve_context(chapter.id, rag_query)
+        if not context:
+            raise GenerationError(
+                "Failed to retrieve chapter context from embeddings. Please retry."
             )
-            context = self.rag.retrieve_context(chapter.id, rag_query)
-            if not context:
-                raise GenerationError(
-                    "Failed to retrieve chapter context from embeddings. Please retry."
-                )
 
+        # Return the connection to the pool for the completion call; nothing
+        # below may touch an expired ORM attribute until it is back.
+        chapter_id, chapter_name = chapter.id, chapter.chapter_name
+        self.db.commit()
+
+        with observe_stage("openai_completion"):
             questions_json = self._call_openai(
                 context=context,
-                chapter_name=chapter.chapter_name,
-                num_questions=request.num_questions,
+                chapter_name=chapter_name,
+                num_questions=num_questions,
             )
 
-            # Store in DB question cache for future requests
-            self._store_cached_questions(chapter.id, request.num_questions, questions_json)
+        with observe_stage("persistence"):
+            question_set = self._get_or_create_question_set(questions_json)
 
-        # Always create a per-user GeneratedTest record (for score tracking)
-        test = GeneratedTest(
-            user_id=user.id,
-            chapter_id=chapter.id,
-            questions_json=questions_json,
-        )
-        self.db.add(test)
-        self.db.commit()
-        self.db.refresh(test)
-
-        return self._to_response(test, chapter.chapter_name, chapter.subject.subject_name)
+            # Store in DB question cache for future requests
+            if generation is None or cache.chapter_generation(chapter_id) != generation:
+                logger.info(
+                    "Chapter %d was re-ingested during generation (or its generation "
+                    "is unreadable) — not caching its questions",
+                    chapter_id,
+                )
+                return question_set
+            self._store_cached_questions(chapter_id, num_questions, question_set)
+        return question_set
 
-    def generate_chapter_summary(self, chapter_id: int) -> ChapterSummaryResponse:
+    def generate_chapter_summary(
+        self, chapter_id: int
+    ) -> Union[ChapterSummaryResponse, ChapterPreparationResponse]:
         chapter = self.db.query(Chapter).filter(Chapter.id == chapter_id).first()
         if not chapter:
             raise NotFoundError("Chapter")
 
-        try:
-            embedded_chunks = self.rag.ensure_chapter_embeddings(
-                chapter_id=chapter.id,
-                pdf_s3_key=chapter.pdf_s3_key,
-            )
-        except Exception as exc:
-            logger.error(
-                "Failed to auto-generate embeddings for chapter %d: %s",
-                chapter.id,
-                exc,
-                exc_info=True,
-            )
-            raise GenerationError(
-                "Failed to prepare chapter embeddings. Please retry."
-            )
-
-        if embedded_chunks == 0:
-            raise GenerationError(
-                "No embeddings found for this chapter. Please upload/reprocess the chapter PDF first."
-            )
+        # Never embeds in-request: a chapter that is not ready gets a 202.
+        preparing = self._preparation_if_not_ready(chapter)
+        if preparing is not None:
+            return preparing
 
         if chapter.status != "ready" or chapter.error_message:
             chapter.status = "ready"
@@ -219,32 +308,90 @@ class GenerationService:
                 "Failed to retrieve chapter context from embeddings. Please retry."
             )
 
+        # Nothing else to read: release the connection before the completion.
+        chapter_name = chapter.chapter_name
+        self.db.commit()
+
         summary = self._call_openai_summary(
             context=context,
-            chapter_name=chapter.chapter_name,
+            chapter_name=chapter_name,
         )
 
         return ChapterSummaryResponse(
-            chapter_id=chapter.id,
-            chapter_name=chapter.chapter_name,
+            chapter_id=chapter_id,
+            chapter_name=chapter_name,
             summary=summary,
         )
 
+    # ── Chapter preparation ──────────────────────────────────────────────
+
+    def get_chapter_preparation(self, chapter_id: int) -> ChapterPreparationResponse:
+        """Poll target for clients that received a 202 from a generate call."""
+        chapter = self.db.query(Chapter).filter(Chapter.id == chapter_id).first()
+        if not chapter:
+            raise NotFoundError("Chapter")
+        job = (
+            self.db.query(IngestionJob)
+            .filter(IngestionJob.chapter_id == chapter.id)
+            .order_by(IngestionJob.created_at.desc())
+            .first()
+        )
+        return self._preparation_response(
+            chapter, job, ready=self.rag.chapter_embeddings_ready(chapter.id)
+        )
+
+    def _preparation_if_not_ready(
+        self, chapter: Chapter
+    ) -> Optional[ChapterPreparationResponse]:
+        """Return a job handle if *chapter* still needs embeddings, else None."""
+        if self.rag.chapter_embeddings_ready(chapter.id):
+            return None
+        job = self.rag.request_chapter_embeddings(chapter)
+        if job is None:
+            raise GenerationError(
+                "No embeddings found for this chapter. Please upload/reprocess the chapter PDF first."
+            )
+        return self._preparation_response(chapter, job, ready=False)
+
+    @staticmethod
+    def _preparation_response(
+        chapter: Chapter, job: Optional[IngestionJob], ready: bool
+    ) -> ChapterPreparationResponse:
+        return ChapterPreparationResponse(
+            chapter_id=chapter.id,
+            ready=ready,
+            chapter_status=chapter.status,
+            job_id=str(job.id) if job else None,
+            job_status=job.status if job else None,
+            total_chunks=job.total_chunks if job else None,
+            embedded_chunks=(job.embedded_chunks or 0) if job else 0,
+            error_message=job.error_message if job else chapter.error_message,
+        )
+
     # ── Read ─────────────────────────────────────────────────────────────
 
-    def get_test(self, test_id: int, user_id: int) -> GeneratedTestResponse:
+    # get_test/list_tests return plain dicts shaped like GeneratedTestResponse:
+    # every field comes from our own rows, so the routers send them with
+    # trusted_response() instead of re-validating questions_json per request.
+
+    def get_test(self, test_id: int, user_id: int) -> Dict[str, Any]:
         test = self._get_owned_test(test_id, user_id)
         chapter_name = test.chapter.chapter_name if test.chapter else None
         subject_name = (
             test.chapter.subject.subject_name if test.chapter else None
         )
-        return self._to_response(test, chapter_name, subject_name)
+        return self._to_payload(test, chapter_name, subject_name)
 
     def list_tests(
         self, user_id: int, skip: int = 0, limit: int = 20
-    ) -> List[GeneratedTestResponse]:
+    ) -> List[Dict[str, Any]]:
+        """Full tests, questions included. History pages should use list_test_summaries()."""
         tests = (
             self.db.query(GeneratedTest)
+            .options(
+                joinedload(GeneratedTest.chapter).joinedload(Chapter.subject),
+                joinedload(GeneratedTest.question_set),
+            )
             .filter(GeneratedTest.user_id == user_id)
             .order_by(GeneratedTest.created_at.desc())
             .offset(skip)
@@ -252,7 +399,7 @@ class GenerationService:
             .all()
         )
         return [
-            self._to_response(
+            self._to_payload(
                 t,
                 t.chapter.chapter_name if t.chapter else None,
                 t.chapter.subject.subject_name if t.chapter else None,
@@ -260,6 +407,61 @@ class GenerationService:
             for t in tests
         ]
 
+    def list_test_summaries(
+        self, user_id: int, limit: int = 20, cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """One page of the user's history, newest first, shaped like TestHistoryPage.
+
+        A single projection query that never reads the question set. Pages are
+        keyed on (created_at, id) instead of OFFSET, so each page is an index
+        range scan on ix_generated_tests_user_created however deep it is.
+        """
+        query = (
+            self.db.query(
+                GeneratedTest.id,
+                GeneratedTest.chapter_id,
+                Chapter.chapter_name,
+                Subject.subject_name,
+                GeneratedTest.num_questions,
+                GeneratedTest.score,
+                GeneratedTest.completed_at,
+                GeneratedTest.created_at,
+            )
+            .outerjoin(Chapter, Chapter.id == GeneratedTest.chapter_id)
+            .outerjoin(Subject, Subject.id == Chapter.subject_id)
+            .filter(GeneratedTest.user_id == user_id)
+        )
+        if cursor:
+            created_at, test_id = self._decode_history_cursor(cursor)
+            query = query.filter(
+                tuple_(GeneratedTest.created_at, GeneratedTest.id) < tuple_(created_at, test_id)
+            )
+        rows = (
+            query.order_by(GeneratedTest.created_at.desc(), GeneratedTest.id.desc())
+            .limit(limit + 1)   # one extra row tells us whether there is a next page
+            .all()
+        )
+        items = [dict(row._mapping) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = self._encode_history_cursor(last["created_at"], last["id"])
+        return {"items": items, "next_cursor": next_cursor}
+
+    @staticmethod
+    def _encode_history_cursor(created_at: datetime, test_id: int) -> str:
+        raw = f"{created_at.isoformat()}|{test_id}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_history_cursor(cursor: str) -> Tuple[datetime, int]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            created_at, test_id = raw.rsplit("|", 1)
+            return datetime.fromisoformat(created_at), int(test_id)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise BadRequestError("Invalid cursor") from None
+
     # ── Submit ────────────────────────────────────────────────────────────
 
     def submit_test(
@@ -267,11 +469,10 @@ class GenerationService:
     ) -> SubmitTestResponse:
         test = self._get_owned_test(test_id, user_id)
 
-        questions_payload = test.questions_json if isinstance(test.questions_json, dict) else {}
-        questions = questions_payload.get("questions", [])
+        questions = test.question_set.questions_json.get("questions", [])
         correct_count = 0
         details: List[AnswerDetail] = []
-        updated_questions: List[Dict[str, Any]] = []
+        recorded: Dict[str, str] = {}
 
         for q in questions:
             q_id = str(q["id"])
@@ -279,7 +480,8 @@ class GenerationService:
             is_correct = user_answer == q["correct_answer"]
             if is_correct:
                 correct_count += 1
-            updated_questions.append({**q, "user_answer": user_answer})
+            if user_answer is not None:
+                recorded[q_id] = user_answer
             details.append(
                 AnswerDetail(
                     question_id=q["id"],
@@ -291,11 +493,24 @@ class GenerationService:
                 )
             )
 
-        total = len(updated_questions)
+        total = len(questions)
         score = round((correct_count / total * 100) if total else 0, 2)
-        test.questions_json = {**questions_payload, "questions": updated_questions}
-        test.score = score
-        test.completed_at = datetime.now(timezone.utc)
+        submitted_at = datetime.now(timezone.utc)
+        # Only the answers are written; the shared question set is never touched.
+        # The completed_at guard makes this the single winning submission, so
+        # the aggregates below count every test at most once.
+        claimed = (
+            self.db.query(GeneratedTest)
+            .filter(GeneratedTest.id == test.id, GeneratedTest.completed_at.is_(None))
+            .update(
+                {"answers": recorded, "score": score, "completed_at": submitted_at},
+                synchronize_session=False,
+            )
+        )
+        if not claimed:
+            self.db.rollback()
+            raise ConflictError("This test has already been submitted")
+        self.analytics.record_submission(test, score, details, submitted_at)
         self.db.commit()
 
         return SubmitTestResponse(
@@ -310,11 +525,12 @@ class GenerationService:
 
     def _get_cached_questions(
         self, chapter_id: int, num_questions: int
-    ) -> Dict[str, Any] | None:
-        """Return questions_json from DB cache if a non-expired entry exists."""
+    ) -> QuestionSet | None:
+        """Return the cached question set if a non-expired entry exists."""
         now = datetime.now(timezone.utc)
-        entry = (
-            self.db.query(QuestionCache)
+        return (
+            self.db.query(QuestionSet)
+            .join(QuestionCache, QuestionCache.question_set_id == QuestionSet.id)
             .filter(
                 QuestionCache.chapter_id == chapter_id,
                 QuestionCache.num_questions == num_questions,
@@ -322,10 +538,34 @@ class GenerationService:
             )
             .first()
         )
-        return entry.questions_json if entry else None
+
+    def _get_or_create_question_set(self, questions_json: Dict[str, Any]) -> QuestionSet:
+        """Return the QuestionSet holding *questions_json*, inserting it if new.
+
+        Sets are addressed by content hash, so a concurrent insert of the same
+        questions is a no-op and both callers end up with the same row.
+        Question ids are normalized first (see _normalize_questions).
+        """
+        questions_json = _normalize_questions(questions_json)
+        content_hash = question_set_hash(questions_json)
+        self.db.execute(
+            pg_insert(QuestionSet)
+            .values(
+                content_hash=content_hash,
+                num_questions=len(questions_json.get("questions", [])),
+                questions_json=questions_json,
+            )
+            .on_conflict_do_nothing(index_elements=[QuestionSet.content_hash])
+        )
+        self.db.commit()
+        return (
+            self.db.query(QuestionSet)
+            .filter(QuestionSet.content_hash == content_hash)
+            .one()
+        )
 
     def _store_cached_questions(
-        self, chapter_id: int, num_questions: int, questions_json: Dict[str, Any]
+        self, chapter_id: int, num_questions: int, question_set: QuestionSet
     ) -> None:
         """Upsert a question cache entry with a fresh TTL."""
         expires_at = datetime.now(timezone.utc) + timedelta(
@@ -340,14 +580,14 @@ class GenerationService:
             .first()
         )
         if existing:
-            existing.questions_json = questions_json
+            existing.question_set_id = question_set.id
             existing.expires_at = expires_at
         else:
             self.db.add(
                 QuestionCache(
                     chapter_id=chapter_id,
                     num_questions=num_questions,
-                    questions_json=questions_json,
+                    question_set_id=question_set.id,
                     expires_at=expires_at,
                 )
             )
@@ -374,16 +614,24 @@ class GenerationService:
             f"Generate {num_questions} MCQ questions based on the above content."
         )
         try:
-            response = self.client.chat.completions.create(
-                model=settings.OPENAI_CHAT_MODEL,
-                messages=[
-                    {"role": "system", "content": system_msg},
-                    {"role": "user", "content": user_msg},
-                ],
-                temperature=0.7,
-                max_tokens=4096,
-                response_format={"type": "json_object"},
-            )
+            with span(
+                "openai.chat.completions",
+                **{"openai.model": settings.OPENAI_CHAT_MODEL, "questions.count": num_questions},
+            ) as current:
+                response = self.client.chat.completions.create(
+                    model=settings.OPENAI_CHAT_MODEL,
+                    messages=[
+                        {"role": "system", "content": system_msg},
+                        {"role": "user", "content": user_msg},
+                    ],
+                    temperature=0.7,
+                    max_tokens=4096,
+                    response_format={"type": "json_object"},
+                )
+                if current is not None and response.usage is not None:
+                    current.set_attribute("openai.prompt_tokens", response.usage.prompt_tokens)
+                    current.set_attribute("openai.completion_tokens", response.usage.completion_tokens)
+            record_openai_usage(settings.OPENAI_CHAT_MODEL, response.usage)
             return json.loads(response.choices[0].message.content)
         except json.JSONDecodeError as exc:
             logger.error(f"JSON parse error from OpenAI: {exc}")
@@ -403,15 +651,17 @@ class GenerationService:
             "Generate the chapter summary now."
         )
         try:
-            response = self.client.chat.completions.create(
-                model=settings.OPENAI_CHAT_MODEL,
-                messages=[
-                    {"role": "system", "content": _SUMMARY_SYSTEM_PROMPT},
-                    {"role": "user", "content": user_msg},
-                ],
-                temperature=0.4,
-                max_tokens=900,
-            )
+            with span("openai.chat.completions", **{"openai.model": settings.OPENAI_CHAT_MODEL}):
+                response = self.client.chat.completions.create(
+                    model=settings.OPENAI_CHAT_MODEL,
+                    messages=[
+                        {"role": "system", "content": _SUMMARY_SYSTEM_PROMPT},
+                        {"role": "user", "content": user_msg},
+                    ],
+                    temperature=0.4,
+                    max_tokens=900,
+                )
+            record_openai_usage(settings.OPENAI_CHAT_MODEL, response.usage)
             content = response.choices[0].message.content
             if not content or not content.strip():
                 raise GenerationError("AI returned an empty summary. Please retry.")
@@ -425,6 +675,7 @@ class GenerationService:
     def _get_owned_test(self, test_id: int, user_id: int) -> GeneratedTest:
         test = (
             self.db.query(GeneratedTest)
+            .options(joinedload(GeneratedTest.question_set))
             .filter(
                 GeneratedTest.id == test_id,
                 GeneratedTest.user_id == user_id,
@@ -435,19 +686,43 @@ class GenerationService:
             raise NotFoundError("Test")
         return test
 
+    @classmethod
+    def _to_payload(
+        cls,
+        test: GeneratedTest,
+        chapter_name: str | None,
+        subject_name: str | None,
+    ) -> Dict[str, Any]:
+        return {
+            "id": test.id,
+            "chapter_id": test.chapter_id,
+            "chapter_name": chapter_name,
+            "subject_name": subject_name,
+            "questions_json": cls._questions_with_answers(test),
+            "score": test.score,
+            "completed_at": test.completed_at,
+            "created_at": test.created_at,
+        }
+
     @staticmethod
+    def _questions_with_answers(test: GeneratedTest) -> Dict[str, Any]:
+        """The shared questions, with each one's user_answer once *test* is submitted."""
+        questions_json = test.question_set.questions_json
+        if test.answers is None:
+            return questions_json
+        return {
+            **questions_json,
+            "questions": [
+                {**q, "user_answer": test.answers.get(str(q["id"]))}
+                for q in questions_json.get("questions", [])
+            ],
+        }
+
+    @classmethod
     def _to_response(
+        cls,
         test: GeneratedTest,
         chapter_name: str | None,
         subject_name: str | None,
     ) -> GeneratedTestResponse:
-        return GeneratedTestResponse(
-            id=test.id,
-            chapter_id=test.chapter_id,
-            chapter_name=chapter_name,
-            subject_name=subject_name,
-            questions_json=test.questions_json,
-            score=test.score,
-            completed_at=test.completed_at,
-            created_at=test.created_at,
-        )
+        return GeneratedTestResponse(**cls._to_payload(test, chapter_name, subject_name))
@@ -0,0 +1,124 @@
+"""Classical item statistics over a (submissions × questions) response matrix.
+
+For one question set, every submitted test is a row and every question a
+column. Cells hold the chosen option as a small integer code: 0 for no
+answer, 1–4 for A–D (see OPTION_KEYS). From that matrix and the answer key:
+
+p_correct       share of submissions that answered the item correctly
+discrimination  corrected item–total correlation: point-biserial between
+                the item (0/1) and the rest score (total minus the item).
+                Good items are well above 0; near 0 or negative flags an
+                ambiguous or mis-keyed question
+option share    share of submissions choosing each option (and omitting)
+option r        point-biserial between choosing that option and the rest
+                score. A working distractor attracts weaker students, so
+                its r is negative; a positive r on a wrong option suggests
+                a second defensible answer
+
+Everything is column-wise array arithmetic; there is no per-submission
+Python loop once the matrix is built.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+OPTION_KEYS = ("A", "B", "C", "D")
+OMITTED = 0
+_CODES: Dict[str, int] = {key: code for code, key in enumerate(OPTION_KEYS, start=1)}
+
+
+@dataclass
+class ItemStatistics:
+    question_ids: np.ndarray            # (k,)
+    responses: int                      # n, submissions in the matrix
+    p_correct: np.ndarray               # (k,)
+    discrimination: np.ndarray          # (k,), nan where undefined
+    option_share: np.ndarray            # (k, len(OPTION_KEYS) + 1); column 0 = omitted
+    option_discrimination: np.ndarray   # (k, len(OPTION_KEYS) + 1), nan where undefined
+
+    def distractors(self, j: int) -> Dict[str, Dict[str, Optional[float]]]:
+        """Per-option share and r for column *j*, JSON-ready (omitted under "-")."""
+        labels = ("-",) + OPTION_KEYS
+        return {
+            label: {
+                "share": round(float(self.option_share[j, c]), 4),
+                "r": _rounded(self.option_discrimination[j, c]),
+            }
+            for c, label in enumerate(labels)
+        }
+
+
+def option_code(answer: Optional[str]) -> int:
+    return _CODES.get(answer, OMITTED) if answer is not None else OMITTED
+
+
+def build_response_matrix(
+    question_ids: Sequence[int], submissions: Iterable[Mapping[str, str]]
+) -> np.ndarray:
+    """(n, k) int8 matrix of option codes from answers maps like {"3": "B"}.
+
+    Keys that are not one of *question_ids* are ignored. *question_ids* must
+    be distinct: each one is a column.
+    """
+    column = {str(q): j for j, q in enumerate(question_ids)}
+    if len(column) != len(question_ids):
+        raise ValueError(f"duplicate question ids in {list(question_ids)}")
+    rows: List[int] = []
+    cols: List[int] = []
+    codes: List[int] = []
+    n = 0
+    for n, answers in enumerate(submissions, start=1):
+        for question_id, answer in answers.items():
+            j = column.get(question_id)
+            if j is not None:
+                rows.append(n - 1)
+                cols.append(j)
+                codes.append(option_code(answer))
+    matrix = np.zeros((n, len(column)), dtype=np.int8)
+    matrix[rows, cols] = codes
+    return matrix
+
+
+def item_statistics(
+    question_ids: Sequence[int], choices: np.ndarray, key: np.ndarray
+) -> ItemStatistics:
+    """Statistics for every column of *choices* (n, k) given the key codes (k,)."""
+    n, k = choices.shape
+    if n == 0:
+        raise ValueError("item_statistics needs at least one submission")
+    correct = (choices == key).astype(np.float32)
+    total = correct.sum(axis=1, keepdims=True)
+    rest = total - correct   # (n, k): each item correlated against the others only
+
+    share = np.empty((k, len(OPTION_KEYS) + 1), dtype=np.float64)
+    option_r = np.empty_like(share)
+    for code in range(len(OPTION_KEYS) + 1):
+        chosen = (choices == code).astype(np.float32)
+        share[:, code] = chosen.mean(axis=0)
+        option_r[:, code] = _columnwise_correlation(chosen, rest)
+
+    return ItemStatistics(
+        question_ids=np.asarray(question_ids),
+        responses=n,
+        p_correct=correct.mean(axis=0),
+        discrimination=_columnwise_correlation(correct, rest),
+        option_share=share,
+        option_discrimination=option_r,
+    )
+
+
+def _columnwise_correlation(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pearson r between matching columns of two (n, k) arrays; nan for constant columns."""
+    a = a - a.mean(axis=0)
+    b = b - b.mean(axis=0)
+    numerator = (a * b).sum(axis=0, dtype=np.float64)
+    denominator = np.sqrt((a * a).sum(axis=0, dtype=np.float64) * (b * b).sum(axis=0, dtype=np.float64))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+def _rounded(value: float) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 4)
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+MISSING = object()  # returned by LocalCache.get on a miss; cached values may be None
+
+
+class LocalCache:
+    """Thread-safe in-process LRU with a per-entry TTL and a total byte budget.
+
+    Values are stored decoded. *size* is what the caller says an entry costs
+    (CacheService passes its uncompressed encoded length); least recently
+    used entries are evicted until both max_entries and max_bytes hold.
+
+    ``epoch`` advances on every invalidate()/clear(). A caller that reads the
+    epoch before fetching a value from the backing store and passes it to
+    put() will not cache that value if an invalidation arrived meanwhile.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttl_seconds: float,
+        on_event: Optional[Callable[[str, int], None]] = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.epoch = 0
+        self._on_event = on_event
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = dict.fromkeys(
+            ("hit", "miss", "eviction", "expiration", "invalidation"), 0
+        )
+
+    def get(self, key: str) -> Any:
+        """Return the cached value, or MISSING."""
+        expired = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.monotonic():
+                del self._entries[key]
+                self._bytes -= entry[2]
+                expired = True
+                entry = None
+            if entry is None:
+                self._count("miss")
+                if expired:
+                    self._count("expiration")
+                return MISSING
+            self._entries.move_to_end(key)
+            self._count("hit")
+            return entry[0]
+
+    def put(self, key: str, value: Any, size: int, ttl: Optional[float] = None, epoch: Optional[int] = None) -> None:
+        """Cache *value* for min(ttl, ttl_seconds); skipped if *epoch* is stale."""
+        if size > self.max_bytes:
+            return   # would flush everything else; leave it to the backing store
+        ttl = self.ttl_seconds if ttl is None else min(ttl, self.ttl_seconds)
+        with self._lock:
+            if epoch is not None and epoch != self.epoch:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (value, time.monotonic() + ttl, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._count("eviction")
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self.epoch += 1
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+                self._count("invalidation")
+
+    def clear(self) -> None:
+        with self._lock:
+            self.epoch += 1
+            if self._entries:
+                self._count("invalidation", len(self._entries))
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._counts["hit"] + self._counts["miss"]
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._counts["hit"],
+                "misses": self._counts["miss"],
+                "hit_ratio": round(self._counts["hit"] / lookups, 4) if lookups else None,
+                "evictions": self._counts["eviction"],
+                "expirations": self._counts["expiration"],
+                "invalidations": self._counts["invalidation"],
+            }
+
+    def _count(self, event: str, n: int = 1) -> None:
+        # Called with the lock held; on_event must not call back into the cache.
+        self._counts[event] += n
+        if self._on_event is not None:
+            self._on_event(event, n)
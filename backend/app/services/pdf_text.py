@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import io
+import logging
+import mmap
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple, Union
+
+from pypdf import PdfReader
+
+logger = logging.getLogger(__name__)
+
+PdfSource = Union[bytes, str, "os.PathLike[str]"]
+
+# Each task re-parses the PDF's xref, so hand out page ranges no smaller than
+# this; otherwise aim for ~2 ranges per worker to balance uneven pages.
+_MIN_PAGES_PER_TASK = 4
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+@contextmanager
+def _open_reader(path: PdfSource) -> Iterator[PdfReader]:
+    """Open a PDF file as a PdfReader backed by a read-only memory map."""
+    with open(path, "rb") as fh:
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield PdfReader(mapped)
+
+
+def _extract_range(path: str, start: int, stop: int) -> List[str]:
+    """Worker entry point: extract text for pages [start, stop) of *path*."""
+    with _open_reader(path) as reader:
+        return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _worker_count() -> int:
+    from app.config import settings
+
+    return settings.PDF_EXTRACT_WORKERS or os.cpu_count() or 1
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    """Return the process-wide extraction pool, creating it on first use.
+
+    A daemonic process may not start children, and Celery's prefork pool
+    marks its children daemonic (billiard patches the stdlib's notion of the
+    current process too). Celery workers that run ingestion therefore use
+    ``--pool threads``: tasks run as threads of the non-daemonic main
+    process and share this pool. Returns None when PDF_EXTRACT_WORKERS < 2,
+    or — logged, as a deployment error — inside a daemonic process.
+    """
+    global _pool
+    if _worker_count() < 2:
+        return None
+    if multiprocessing.current_process().daemon:
+        logger.warning(
+            "PDF extraction pool unavailable in daemonic process %s — extracting serially; "
+            "run ingestion workers with --pool threads",
+            multiprocessing.current_process().name,
+        )
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn: never fork a process holding DB/Redis sockets and threads.
+            _pool = ProcessPoolExecutor(
+                max_workers=_worker_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _reset_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _iter_serial(reader: PdfReader, start: int = 0) -> Iterator[Tuple[int, str]]:
+    for i in range(start, len(reader.pages)):
+        yield i + 1, reader.pages[i].extract_text() or ""
+
+
+def _iter_parallel(path: str, num_pages: int, pool: ProcessPoolExecutor) -> Iterator[Tuple[int, str]]:
+    step = max(_MIN_PAGES_PER_TASK, -(-num_pages // (2 * _worker_count())))
+    ranges = [(s, min(s + step, num_pages)) for s in range(0, num_pages, step)]
+    futures = [pool.submit(_extract_range, path, start, stop) for start, stop in ranges]
+    try:
+        # Consume in submission order so pages are re-assembled in sequence
+        # while later ranges are still being extracted.
+        for (start, _), future in zip(ranges, futures):
+            for offset, text in enumerate(future.result()):
+                yield start + offset + 1, text
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def iter_pdf_pages(source: PdfSource) -> Iterator[Tuple[int, str]]:
+    """Yield (page_number, text) for every page of the PDF, 1-based.
+
+    *source* is either the raw PDF bytes or a filesystem path. Paths are
+    memory-mapped rather than read into memory, and PDFs with at least
+    PDF_EXTRACT_POOL_MIN_PAGES pages have their pages extracted across a
+    process pool (pypdf's extract_text is pure Python and CPU-bound).
+
+    Pages with no extractable text are still yielded (as empty strings) so
+    that page numbering stays aligned for downstream consumers.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield from _iter_serial(PdfReader(io.BytesIO(source)))
+        return
+
+    from app.config import settings
+
+    path = os.fspath(source)
+    with _open_reader(path) as reader:
+        num_pages = len(reader.pages)
+        pool = _get_pool() if num_pages >= settings.PDF_EXTRACT_POOL_MIN_PAGES else None
+        if pool is None:
+            yield from _iter_serial(reader)
+            return
+
+        emitted = 0
+        try:
+            for page in _iter_parallel(path, num_pages, pool):
+                yield page
+                emitted += 1
+        except BrokenProcessPool:
+            logger.warning("PDF extraction pool died — finishing %s serially", path)
+            _reset_pool()
+            yield from _iter_serial(reader, start=emitted)
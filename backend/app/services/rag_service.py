@@ -1,25 +1,28 @@
 from __future__ import annotations
 
-import io
 import logging
-from typing import Any, List
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
 
-from openai import OpenAI
-from pypdf import PdfReader
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.config import settings
+from app.core.exceptions import ServiceUnavailableError
+from app.core.metrics import observe_stage, record_cache
+from app.core.tracing import span
+from app.models.board import Chapter
+from app.models.ingestion_job import IngestionJob
+from app.models.question_cache import QuestionCache
 from app.models.text_chunk import TextChunk
 from app.services.cache_service import cache
+from app.services.chunker import chunk_pdf
+from app.services.context_builder import build_context
+from app.services.embedding_client import embedding_client
 from app.services.storage_service import storage_service
 
 logger = logging.getLogger(__name__)
 
-CHUNK_SIZE = 900
-CHUNK_OVERLAP = 100
-EMBED_BATCH_SIZE = 20
-
 
 class RAGService:
     """Retrieval-Augmented Generation: embed query → fetch similar chunks.
@@ -31,32 +34,119 @@ class RAGService:
 
     def __init__(self, db: Session) -> None:
         self.db = db
-        self._client: OpenAI | None = None
-
-    @property
-    def client(self) -> OpenAI:
-        if self._client is None:
-            self._client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        return self._client
 
     # ── Embedding ─────────────────────────────────────────────────────────
 
     def embed(self, text: str) -> List[float]:
-        response = self.client.embeddings.create(
-            input=text,
-            model=settings.OPENAI_EMBEDDING_MODEL,
-        )
-        return response.data[0].embedding
+        """Embed a query, reusing a cached vector (stored as raw float32) if any."""
+        cache_key = cache.query_embedding_key(settings.OPENAI_EMBEDDING_MODEL, text)
+        cached = cache.get(cache_key)
+        record_cache("query_embedding", hit=cached is not None)
+        if cached is not None:
+            return cached
+        vector = embedding_client.embed([text])[0]
+        cache.set(cache_key, vector, codec="f32")
+        return vector
 
     def embed_batch(self, texts: List[str]) -> List[List[float]]:
-        response = self.client.embeddings.create(
-            input=texts,
-            model=settings.OPENAI_EMBEDDING_MODEL,
-        )
-        return [item.embedding for item in response.data]
+        return embedding_client.embed(texts)
 
     # ── Embedding readiness ───────────────────────────────────────────────
 
+    def embedding_counts(self, chapter_id: int) -> Tuple[int, int]:
+        """Return (total chunks, embedded chunks) for a chapter in one query."""
+        total, embedded = (
+            self.db.query(func.count(TextChunk.id), func.count(TextChunk.embedding))
+            .filter(TextChunk.chapter_id == chapter_id)
+            .one()
+        )
+        return int(total or 0), int(embedded or 0)
+
+    def chapter_embeddings_ready(self, chapter_id: int) -> bool:
+        total, embedded = self.embedding_counts(chapter_id)
+        return total > 0 and embedded == total
+
+    def active_ingestion_job(self, chapter_id: int) -> Optional[IngestionJob]:
+        """The chapter's newest in-flight job, ignoring any older than INGESTION_JOB_STALE_SECONDS.
+
+        A job whose message was lost (a worker killed mid-task, a publish that
+        never reached the broker) stays pending or processing forever; past the
+        cutoff it is presumed dead, so the caller enqueues a fresh one.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.INGESTION_JOB_STALE_SECONDS)
+        return (
+            self.db.query(IngestionJob)
+            .filter(
+                IngestionJob.chapter_id == chapter_id,
+                IngestionJob.status.in_(("pending", "processing")),
+                func.coalesce(IngestionJob.started_at, IngestionJob.created_at) >= cutoff,
+            )
+            .order_by(IngestionJob.created_at.desc())
+            .first()
+        )
+
+    def request_chapter_embeddings(self, chapter: Chapter) -> Optional[IngestionJob]:
+        """Enqueue (or join) a worker job that makes *chapter*'s embeddings ready.
+
+        The web tier calls this instead of ensure_chapter_embeddings() so a
+        request never downloads, parses or embeds a PDF itself. The chapter
+        row is locked while looking for an in-flight job, so concurrent
+        requests for the same chapter share one job. Returns None when there
+        is nothing to embed from (no chunks and no source PDF).
+        """
+        from app.tasks.ingest import ensure_chapter_embeddings_task, ingest_pdf_task
+        from app.worker import PRIORITY_HIGH, QUEUE_INTERACTIVE
+
+        self.db.query(Chapter).filter(Chapter.id == chapter.id).with_for_update().one()
+        job = self.active_ingestion_job(chapter.id)
+        if job is not None:
+            self.db.commit()
+            return job
+
+        total, _ = self.embedding_counts(chapter.id)
+        if total == 0 and not chapter.pdf_s3_key:
+            self.db.commit()
+            return None
+        if not cache.available:
+            # The broker is the same Redis: fail now rather than leave a
+            # pending job nobody will pick up after a stalled publish.
+            self.db.commit()
+            raise ServiceUnavailableError("Background processing is temporarily unavailable, please retry shortly")
+
+        job = IngestionJob(
+            chapter_id=chapter.id,
+            status="pending",
+            pdf_s3_key=chapter.pdf_s3_key or "",
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+
+        try:
+            if total > 0:
+                # Chunks exist but some lack embeddings: backfill only those.
+                ensure_chapter_embeddings_task.apply_async(
+                    (chapter.id, str(job.id)), queue=QUEUE_INTERACTIVE, priority=PRIORITY_HIGH
+                )
+            else:
+                ingest_pdf_task.apply_async(
+                    (str(job.id), chapter.id, chapter.pdf_s3_key),
+                    queue=QUEUE_INTERACTIVE,
+                    priority=PRIORITY_HIGH,
+                )
+        except Exception as exc:
+            # Nobody will run this job: fail it so later requests don't join it.
+            logger.exception("RAG: could not enqueue embedding job %s for chapter %d", job.id, chapter.id)
+            job.status = "failed"
+            job.error_message = f"Enqueue failed: {exc}"
+            job.completed_at = datetime.now(timezone.utc)
+            self.db.commit()
+            raise ServiceUnavailableError(
+                "Background processing is temporarily unavailable, please retry shortly"
+            ) from exc
+        logger.info("RAG: enqueued embedding job %s for chapter %d", job.id, chapter.id)
+        return job
+
     def ensure_chapter_embeddings(
         self,
         chapter_id: int,
@@ -68,8 +158,7 @@ class RAGService:
         1) If chunks exist but some/all embeddings are missing, backfill those rows.
         2) If no chunks exist, download chapter PDF, chunk it, embed it, and store.
         """
-        total_chunks = self._count_chunks(chapter_id)
-        embedded_chunks = self._count_chunks(chapter_id, embedded_only=True)
+        total_chunks, embedded_chunks = self.embedding_counts(chapter_id)
 
         if total_chunks > 0 and embedded_chunks == total_chunks:
             return embedded_chunks
@@ -115,11 +204,9 @@ class RAGService:
         return int(query.scalar() or 0)
 
     def _embed_existing_chunks(self, chapter_id: int, chunks: List[TextChunk]) -> None:
-        for i in range(0, len(chunks), EMBED_BATCH_SIZE):
-            batch = chunks[i : i + EMBED_BATCH_SIZE]
-            texts = [chunk.content for chunk in batch]
-            embeddings = self.embed_batch(texts)
-            for chunk, embedding in zip(batch, embeddings):
+        texts = [chunk.content for chunk in chunks]
+        for start, embeddings in embedding_client.iter_batches(texts):
+            for chunk, embedding in zip(chunks[start:], embeddings):
                 chunk.embedding = embedding
             self.db.commit()
 
@@ -131,8 +218,8 @@ class RAGService:
 
     def _ingest_chunks_from_pdf(self, chapter_id: int, pdf_s3_key: str) -> int:
         try:
-            pdf_bytes = storage_service.download(pdf_s3_key)
-            all_chunks = self._extract_pdf_chunks(pdf_bytes)
+            with storage_service.local_path(pdf_s3_key) as pdf_path:
+                all_chunks = chunk_pdf(pdf_path)
             if not all_chunks:
                 logger.warning(
                     "RAG: chapter %d PDF produced no text chunks during on-demand ingestion",
@@ -143,17 +230,17 @@ class RAGService:
             self.db.query(TextChunk).filter(TextChunk.chapter_id == chapter_id).delete()
             self.db.commit()
 
-            for i in range(0, len(all_chunks), EMBED_BATCH_SIZE):
-                batch = all_chunks[i : i + EMBED_BATCH_SIZE]
-                texts = [chunk["content"] for chunk in batch]
-                embeddings = self.embed_batch(texts)
-                for chunk, embedding in zip(batch, embeddings):
+            texts = [chunk["content"] for chunk in all_chunks]
+            for start, embeddings in embedding_client.iter_batches(texts):
+                for chunk, embedding in zip(all_chunks[start:], embeddings):
                     self.db.add(
                         TextChunk(
                             chapter_id=chapter_id,
                             content=chunk["content"],
                             chunk_index=chunk["chunk_index"],
+                            chunk_id=chunk["chunk_id"],
                             page_number=chunk["page_number"],
+                            page_end=chunk["page_end"],
                             embedding=embedding,
                         )
                     )
@@ -164,6 +251,7 @@ class RAGService:
                 chapter_id,
                 len(all_chunks),
             )
+            self.invalidate_chapter_caches(chapter_id)
             return len(all_chunks)
         except Exception:
             self.db.rollback()
@@ -172,31 +260,6 @@ class RAGService:
             )
             raise
 
-    @staticmethod
-    def _extract_pdf_chunks(pdf_bytes: bytes) -> List[dict[str, Any]]:
-        reader = PdfReader(io.BytesIO(pdf_bytes))
-        all_chunks: List[dict[str, Any]] = []
-
-        for page_num, page in enumerate(reader.pages):
-            text = (page.extract_text() or "").strip()
-            if not text:
-                continue
-
-            start = 0
-            while start < len(text):
-                chunk_text = text[start : start + CHUNK_SIZE].strip()
-                if chunk_text:
-                    all_chunks.append(
-                        {
-                            "content": chunk_text,
-                            "page_number": page_num + 1,
-                            "chunk_index": len(all_chunks),
-                        }
-                    )
-                start += CHUNK_SIZE - CHUNK_OVERLAP
-
-        return all_chunks
-
     # ── Retrieval ─────────────────────────────────────────────────────────
 
     def retrieve(
@@ -206,16 +269,19 @@ class RAGService:
         top_k: int | None = None,
     ) -> List[TextChunk]:
         top_k = top_k or settings.RAG_TOP_K
-        query_embedding = self.embed(query)
-
-        results = (
-            self.db.query(TextChunk)
-            .filter(TextChunk.chapter_id == chapter_id)
-            .filter(TextChunk.embedding.isnot(None))
-            .order_by(TextChunk.embedding.cosine_distance(query_embedding))
-            .limit(top_k)
-            .all()
-        )
+        with span("rag.retrieve", **{"chapter.id": chapter_id, "rag.top_k": top_k}):
+            with observe_stage("embedding"):
+                query_embedding = self.embed(query)
+
+            with observe_stage("vector_search"):
+                results = (
+                    self.db.query(TextChunk)
+                    .filter(TextChunk.chapter_id == chapter_id)
+                    .filter(TextChunk.embedding.isnot(None))
+                    .order_by(TextChunk.embedding.cosine_distance(query_embedding))
+                    .limit(top_k)
+                    .all()
+                )
         logger.info(f"RAG: retrieved {len(results)} chunks for chapter {chapter_id}")
         return results
 
@@ -224,32 +290,75 @@ class RAGService:
     def retrieve_context(self, chapter_id: int, query: str) -> str:
         """Return the RAG context string, using Redis cache when available.
 
-        Cache key: rag_ctx:{chapter_id}:{md5(query)}
+        Cache key: rag_ctx:{chapter_id}:g{generation}:{md5(query)}
         TTL      : settings.CACHE_TTL_SECONDS (default 7 days)
 
         On a cache hit the OpenAI embedding API and pgvector search are
-        both skipped entirely, reducing latency and API cost.
+        both skipped entirely, reducing latency and API cost. Re-ingesting
+        the chapter bumps its generation, so contexts built from the old
+        PDF are never read again. If the generation can't be read, neither
+        tier is consulted: an L1 entry may belong to an older generation.
         """
-        cache_key = cache.rag_context_key(chapter_id, query)
+        generation = cache.chapter_generation(chapter_id)
+        if generation is None:
+            chunks = self.retrieve(chapter_id, query)
+            with observe_stage("context_build"):
+                return self.build_context(chunks) if chunks else ""
+        cache_key = cache.rag_context_key(chapter_id, query, generation)
 
         cached_context = cache.get(cache_key)
+        record_cache("rag_context", hit=cached_context is not None)
         if cached_context is not None:
             logger.info("RAG cache HIT for chapter %d", chapter_id)
             return cached_context
 
         logger.info("RAG cache MISS for chapter %d — fetching from DB", chapter_id)
         chunks = self.retrieve(chapter_id, query)
-        context = self.build_context(chunks) if chunks else ""
+        with observe_stage("context_build"):
+            context = self.build_context(chunks) if chunks else ""
 
         if context:
             cache.set(cache_key, context)
 
         return context
 
+    # ── Invalidation ──────────────────────────────────────────────────────
+
+    def invalidate_chapter_caches(self, chapter_id: int) -> int:
+        """Drop everything cached from a chapter's previous chunks.
+
+        Deletes the chapter's shared QuestionCache rows and bumps its cache
+        generation (orphaning its RAG context keys). Call after committing
+        the new chunks, so a concurrent reader cannot repopulate the new
+        generation from the old ones. Returns the number of purged rows.
+
+        Raises ServiceUnavailableError if the generation could not be bumped:
+        the old RAG contexts would stay current for their whole TTL, so the
+        ingestion must fail (and be retried) rather than report success.
+        """
+        purged = (
+            self.db.query(QuestionCache)
+            .filter(QuestionCache.chapter_id == chapter_id)
+            .delete(synchronize_session=False)
+        )
+        self.db.commit()
+        generation = cache.bump_chapter_generation(chapter_id)
+        if generation is None:
+            raise ServiceUnavailableError(
+                f"Could not bump the cache generation of chapter {chapter_id}; "
+                "cached contexts from its previous chunks are still current"
+            )
+        logger.info(
+            "Invalidated caches for chapter %d: %d question set(s) purged, generation now %s",
+            chapter_id,
+            purged,
+            generation,
+        )
+        return purged
+
     # ── Context builder ───────────────────────────────────────────────────
 
     @staticmethod
-    def build_context(chunks: List[TextChunk]) -> str:
-        return "\n\n---\n\n".join(
-            f"[Chunk {i + 1}]\n{chunk.content}" for i, chunk in enumerate(chunks)
-        )
+    def build_context(chunks: List[TextChunk], token_budget: int | None = None) -> str:
+        """Deduplicate, merge and budget *chunks* — see context_builder.build_context."""
+        return build_context(chunks, token_budget=token_budget)
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 import logging
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
-from typing import BinaryIO, Optional
+from typing import BinaryIO, Iterator, Optional
 
 from app.config import settings
 
@@ -63,6 +65,21 @@ class StorageService:
         obj = self._s3.get_object(Bucket=self._bucket, Key=key)
         return obj["Body"].read()
 
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[Path]:
+        """Yield a filesystem path holding the object, for memory-mapped reads.
+
+        Local mode yields the stored file directly; S3 mode streams the object
+        into a temporary file (never fully into memory) that is removed on exit.
+        """
+        if self.mode == "local":
+            yield Path(settings.LOCAL_STORAGE_PATH) / key
+            return
+        with tempfile.NamedTemporaryFile(suffix=Path(key).suffix) as tmp:
+            self._s3.download_fileobj(self._bucket, key, tmp)
+            tmp.flush()
+            yield Path(tmp.name)
+
     def presigned_url(self, key: str, expires_in: int = 3600) -> Optional[str]:
         if self.mode == "s3":
             return self._s3.generate_presigned_url(
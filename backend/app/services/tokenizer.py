@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import logging
+from functools import lru_cache
+from typing import Any, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rough chars-per-token ratio for English prose with the OpenAI BPE vocabularies.
+# Only used when tiktoken (or its BPE file) is unavailable.
+_APPROX_CHARS_PER_TOKEN = 4
+
+
+@lru_cache()
+def _get_encoding() -> Optional[Any]:
+    """Return the tiktoken encoding for the chat model, or None if unavailable.
+
+    tiktoken downloads its BPE ranks on first use, so an offline worker can
+    fail here even when the package is installed — fall back to the heuristic.
+    """
+    try:
+        import tiktoken  # lazy import — optional in dev
+
+        try:
+            return tiktoken.encoding_for_model(settings.OPENAI_CHAT_MODEL)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as exc:
+        logger.warning("tiktoken unavailable (%s) — using approximate token counts", exc)
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Return the number of prompt tokens *text* costs for the chat model."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return -(-len(text) // _APPROX_CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Return the longest prefix of *text* that fits in *max_tokens*."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[: max_tokens * _APPROX_CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
 import logging
-from datetime import date, timedelta
+import threading
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
 
+from sqlalchemy import func, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from app.config import settings
@@ -10,6 +15,7 @@ from app.core.exceptions import UsageLimitError
 from app.models.usage_tracking import UsageTracking
 from app.models.user import Profile
 from app.schemas.usage import UsageResponse
+from app.services.cache_service import USAGE_LIMIT_REACHED, cache
 
 logger = logging.getLogger(__name__)
 
@@ -27,7 +33,33 @@ def _iso_week_start(d: date | None = None) -> date:
     return d - timedelta(days=d.weekday())
 
 
+def _counter_expiry(week_start: date) -> int:
+    """Unix time a week's counter expires: a day after the week ends, so the
+    write-behind has time to flush its final count."""
+    expires = datetime.combine(week_start + timedelta(days=8), time.min, tzinfo=timezone.utc)
+    return int(expires.timestamp())
+
+
+_FLUSH_BATCH = 1000
+
+
 class UsageService:
+    """Weekly test quotas.
+
+    The live counter for (user, week) is a Redis key, incremented by a Lua
+    script that checks the limit atomically. A counter missing from Redis
+    is seeded once from usage_tracking. After that, checks and /usage reads
+    do not touch Postgres. Increments mark the counter dirty, and
+    flush_counters() (run periodically by UsageFlusher) upserts dirty
+    counts into usage_tracking for durability and reporting.
+
+    While Redis is unavailable, quotas are enforced against usage_tracking
+    directly, as before. A counter that survived the outage would then be
+    behind, so each fallback increment is remembered and UsageFlusher
+    raises the Redis counter to the stored count once Redis is back
+    (resync_counters).
+    """
+
     def __init__(self, db: Session) -> None:
         self.db = db
 
@@ -55,29 +87,231 @@ class UsageService:
     def check_and_increment(self, user: Profile) -> None:
         """Raises UsageLimitError if limit reached; otherwise increments counter."""
         limit = TIER_LIMITS.get(user.subscription_tier, settings.FREE_TESTS_PER_WEEK)
-        record = self.get_or_create_usage(user.id)
+        week_start = _iso_week_start()
+        key = cache.usage_counter_key(user.id, week_start)
 
-        if record.tests_generated >= limit:
-            raise UsageLimitError(
-                f"You have used all {limit} free tests this week. "
-                "Upgrade your plan to unlock more."
-            )
+        count = cache.increment_usage(key, limit)
+        if count is None and cache.available:
+            self._seed_counter(key, user.id, week_start)
+            count = cache.increment_usage(key, limit)
+        if count is None:
+            count = self._increment_in_db(user.id, limit)
+        elif count == USAGE_LIMIT_REACHED:
+            self._raise_limit(limit)
+        logger.info(f"User {user.id} generated test #{count}/{limit} this week")
 
+    def _increment_in_db(self, user_id, limit: int) -> int:
+        """Fallback while Redis is unavailable: count directly in usage_tracking."""
+        record = self.get_or_create_usage(user_id)
+        if record.tests_generated >= limit:
+            self._raise_limit(limit)
         record.tests_generated += 1
+        count, week_start = record.tests_generated, record.week_start
         self.db.commit()
-        logger.info(
-            f"User {user.id} generated test #{record.tests_generated}/{limit} this week"
+        usage_flusher.track_db_increment(user_id, week_start)
+        return count
+
+    @staticmethod
+    def _raise_limit(limit: int) -> None:
+        raise UsageLimitError(
+            f"You have used all {limit} free tests this week. "
+            "Upgrade your plan to unlock more."
         )
 
     def get_usage_status(self, user: Profile) -> UsageResponse:
         limit = TIER_LIMITS.get(user.subscription_tier, settings.FREE_TESTS_PER_WEEK)
-        record = self.get_or_create_usage(user.id)
-        remaining = max(0, limit - record.tests_generated)
+        week_start = _iso_week_start()
+        key = cache.usage_counter_key(user.id, week_start)
+        used = cache.get_usage_count(key)
+        if used is None:
+            used = self._seed_counter(key, user.id, week_start)
+        remaining = max(0, limit - used)
         return UsageResponse(
-            tests_generated_this_week=record.tests_generated,
+            tests_generated_this_week=used,
             tests_remaining=remaining,
             weekly_limit=limit,
-            week_start=record.week_start,
+            week_start=week_start,
             can_generate=remaining > 0,
             subscription_tier=user.subscription_tier,
         )
+
+    # ── Redis counters ────────────────────────────────────────────────────
+
+    def _stored_count(self, user_id, week_start: date) -> int:
+        """Read-only: the week's count in usage_tracking (0 if no row)."""
+        return (
+            self.db.query(UsageTracking.tests_generated)
+            .filter(
+                UsageTracking.user_id == user_id,
+                UsageTracking.week_start == week_start,
+            )
+            .scalar()
+            or 0
+        )
+
+    def _seed_counter(self, key: str, user_id, week_start: date) -> int:
+        """Create the Redis counter from usage_tracking; returns the stored count."""
+        count = self._stored_count(user_id, week_start)
+        cache.seed_usage_count(key, count, _counter_expiry(week_start))
+        return count
+
+    def resync_counters(self, pending: Set[Tuple[Any, date]]) -> Optional[int]:
+        """Raise the Redis counters of *pending* (user_id, week_start) pairs to
+        their usage_tracking count.
+
+        Counters that are absent are left alone: they get seeded from the
+        database on next use. Returns how many counters were raised, or
+        None if Redis is unavailable.
+        """
+        if not pending:
+            return 0
+        rows = (
+            self.db.query(UsageTracking.user_id, UsageTracking.week_start, UsageTracking.tests_generated)
+            .filter(tuple_(UsageTracking.user_id, UsageTracking.week_start).in_(list(pending)))
+            .all()
+        )
+        return cache.raise_usage_counts(
+            {
+                cache.usage_counter_key(user_id, week_start): count
+                for user_id, week_start, count in rows
+            }
+        )
+
+    def flush_counters(self, batch: int = _FLUSH_BATCH) -> int:
+        """Write-behind: upsert every dirty Redis counter into usage_tracking.
+
+        Counts only move forward (GREATEST), so a flush never undoes an
+        increment made through the database fallback. Returns rows written.
+        """
+        flushed = 0
+        while True:
+            counts = cache.drain_dirty_usage(batch)
+            if not counts:
+                return flushed
+            try:
+                flushed += self._upsert_counts(counts)
+            except Exception:
+                self.db.rollback()
+                cache.mark_usage_dirty(list(counts))
+                raise
+            if len(counts) < batch:
+                return flushed
+
+    def _upsert_counts(self, counts: Dict[str, Any]) -> int:
+        rows: List[Dict[str, Any]] = []
+        for key, count in counts.items():
+            if count is None:   # expired before it was flushed
+                continue
+            _, user_id, week_start = key.rsplit(":", 2)
+            rows.append(
+                {
+                    "user_id": uuid.UUID(user_id),
+                    "week_start": date.fromisoformat(week_start),
+                    "tests_generated": count,
+                }
+            )
+        # Skip users deleted since their last test; their rows cascade away anyway.
+        existing = {
+            user_id
+            for (user_id,) in self.db.query(Profile.id).filter(
+                Profile.id.in_({row["user_id"] for row in rows})
+            )
+        }
+        rows = [row for row in rows if row["user_id"] in existing]
+        if not rows:
+            return 0
+        insert = pg_insert(UsageTracking).values(rows)
+        self.db.execute(
+            insert.on_conflict_do_update(
+                index_elements=[UsageTracking.user_id, UsageTracking.week_start],
+                set_={
+                    "tests_generated": func.greatest(
+                        UsageTracking.tests_generated, insert.excluded.tests_generated
+                    ),
+                    "updated_at": func.now(),
+                },
+            )
+        )
+        self.db.commit()
+        return len(rows)
+
+
+class UsageFlusher:
+    """Runs UsageService.flush_counters() every USAGE_FLUSH_INTERVAL_SECONDS
+    on a daemon thread, with a final flush on stop().
+
+    Each run first resyncs the counters this process incremented through
+    the database fallback, once Redis is available again.
+    """
+
+    def __init__(self) -> None:
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._resync: Set[Tuple[Any, date]] = set()
+        self._resync_lock = threading.Lock()
+
+    def track_db_increment(self, user_id, week_start: date) -> None:
+        """Remember a fallback increment, to be pushed into Redis by resync_once()."""
+        if self._thread is None:
+            return
+        with self._resync_lock:
+            self._resync.add((user_id, week_start))
+
+    def start(self) -> None:
+        if self._thread is not None or settings.USAGE_FLUSH_INTERVAL_SECONDS <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="usage-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=10)
+        self._thread = None
+        self.resync_once()
+        self.flush_once()
+
+    def resync_once(self) -> int:
+        if not self._resync or not cache.available:
+            return 0
+        from app.database import SessionLocal
+
+        with self._resync_lock:
+            pending, self._resync = self._resync, set()
+        db = SessionLocal()
+        raised = None
+        try:
+            raised = UsageService(db).resync_counters(pending)
+        except Exception as exc:
+            logger.error("Usage counter resync failed; will retry: %s", exc, exc_info=True)
+        finally:
+            db.close()
+        if raised is None:
+            with self._resync_lock:
+                self._resync |= pending
+            return 0
+        if raised:
+            logger.info("Raised %d Redis usage counter(s) to their database count", raised)
+        return raised
+
+    def flush_once(self) -> int:
+        from app.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            return UsageService(db).flush_counters()
+        except Exception as exc:
+            logger.error("Usage counter flush failed; will retry: %s", exc, exc_info=True)
+            return 0
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        while not self._stop.wait(settings.USAGE_FLUSH_INTERVAL_SECONDS):
+            self.resync_once()
+            self.flush_once()
+
+
+usage_flusher = UsageFlusher()
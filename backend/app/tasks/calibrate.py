@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import logging
+
+from app.worker import celery_app
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(bind=True, name="calibrate_items", max_retries=2)
+def calibrate_items_task(self, min_responses: int | None = None) -> dict:
+    """Recompute item difficulty/discrimination from all submitted answers.
+
+    Pure database + NumPy work, no OpenAI calls; routed to the low-priority
+    pregen queue. Celery beat sends it every ITEM_CALIBRATION_INTERVAL_SECONDS
+    (see app/worker.py). A malformed question set is skipped, not retried:
+    retries are for database errors.
+    """
+    from app.database import SessionLocal
+    from app.services.analytics_service import AnalyticsService
+
+    db = SessionLocal()
+    try:
+        return AnalyticsService(db).calibrate_items(min_responses)
+    except Exception as exc:
+        logger.error(f"[calibrate] FAILED: {exc}", exc_info=True)
+        db.rollback()
+        raise self.retry(exc=exc, countdown=300)
+    finally:
+        db.close()
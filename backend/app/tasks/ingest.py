@@ -1,38 +1,41 @@
 from __future__ import annotations
 
-import io
 import logging
+import time
 import uuid
 from datetime import datetime, timezone
 
-from openai import OpenAI
-from pypdf import PdfReader
-
 from app.config import settings
 from app.worker import celery_app
 
 logger = logging.getLogger(__name__)
 
-CHUNK_SIZE = 900
-CHUNK_OVERLAP = 100
-BATCH_SIZE = 20
-
 
 @celery_app.task(bind=True, name="ingest_pdf", max_retries=3)
 def ingest_pdf_task(self, job_id: str, chapter_id: int, pdf_s3_key: str) -> dict:
     """Download PDF from S3, generate embeddings, store chunks in Supabase.
 
-    Updates IngestionJob and Chapter status throughout.
+    Updates IngestionJob and Chapter status throughout. Progress is
+    checkpointed on the IngestionJob: the extracted chunks are saved before
+    any embedding call, and every committed sub-batch is visible in
+    text_chunks. A retry (or a redelivery after a worker crash — tasks are
+    acks_late) therefore skips extraction and embeds only the missing chunks.
     """
+    from app.core.metrics import record_ingestion
+    from app.core.tracing import span
     from app.database import SessionLocal
     from app.models.board import Chapter
     from app.models.ingestion_job import IngestionJob
     from app.models.text_chunk import TextChunk
+    from app.services.chunker import chunk_pdf
+    from app.services.embedding_client import embedding_client
+    from app.services.rag_service import RAGService
     from app.services.storage_service import storage_service
 
     db = SessionLocal()
     chapter = None
     job = None
+    started = time.perf_counter()
 
     try:
         job = db.query(IngestionJob).filter(IngestionJob.id == uuid.UUID(job_id)).first()
@@ -44,94 +47,176 @@ def ingest_pdf_task(self, job_id: str, chapter_id: int, pdf_s3_key: str) -> dict
         # Mark as processing
         if job:
             job.status = "processing"
-            job.started_at = datetime.now(timezone.utc)
+            job.attempts = (job.attempts or 0) + 1
+            if job.started_at is None:
+                job.started_at = datetime.now(timezone.utc)
         chapter.status = "processing"
         db.commit()
 
-        # ── Download PDF ────────────────────────────────────────────────────
-        logger.info(f"[ingest] Downloading PDF: {pdf_s3_key}")
-        pdf_bytes = storage_service.download(pdf_s3_key)
-
-        # ── Extract and chunk text ──────────────────────────────────────────
-        reader = PdfReader(io.BytesIO(pdf_bytes))
-        all_chunks: list[dict] = []
-
-        for page_num, page in enumerate(reader.pages):
-            text = (page.extract_text() or "").strip()
-            if not text:
-                continue
-            start = 0
-            while start < len(text):
-                chunk_text = text[start : start + CHUNK_SIZE].strip()
-                if chunk_text:
-                    all_chunks.append(
-                        {
-                            "content": chunk_text,
-                            "page_number": page_num + 1,
-                            "chunk_index": len(all_chunks),
-                        }
-                    )
-                start += CHUNK_SIZE - CHUNK_OVERLAP
-
-        logger.info(f"[ingest] chapter={chapter_id}: {len(all_chunks)} chunks extracted")
-
-        # ── Clear existing chunks for this chapter ──────────────────────────
-        db.query(TextChunk).filter(TextChunk.chapter_id == chapter_id).delete()
-        db.commit()
-
-        # ── Generate embeddings in batches and store ────────────────────────
-        openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        if job and job.chunks_json is not None:
+            # ── Resume from checkpoint ──────────────────────────────────────
+            all_chunks = job.chunks_json
+            logger.info(
+                f"[ingest] chapter={chapter_id}: resuming attempt {job.attempts} "
+                f"from checkpoint ({job.embedded_chunks}/{job.total_chunks} embedded)"
+            )
+        else:
+            # ── Download, extract and chunk text ────────────────────────────
+            logger.info(f"[ingest] Downloading PDF: {pdf_s3_key}")
+            with span("ingest.extract", **{"chapter.id": chapter_id}):
+                with storage_service.local_path(pdf_s3_key) as pdf_path:
+                    all_chunks = chunk_pdf(pdf_path)
 
-        for i in range(0, len(all_chunks), BATCH_SIZE):
-            batch = all_chunks[i : i + BATCH_SIZE]
-            texts = [c["content"] for c in batch]
+            logger.info(f"[ingest] chapter={chapter_id}: {len(all_chunks)} chunks extracted")
 
-            response = openai_client.embeddings.create(
-                input=texts,
-                model=settings.OPENAI_EMBEDDING_MODEL,
-            )
-            embeddings = [item.embedding for item in response.data]
-
-            for j, emb in enumerate(embeddings):
-                db.add(
-                    TextChunk(
-                        chapter_id=chapter_id,
-                        content=batch[j]["content"],
-                        chunk_index=batch[j]["chunk_index"],
-                        page_number=batch[j]["page_number"],
-                        embedding=emb,
+            # ── Clear existing chunks and save the checkpoint atomically ────
+            db.query(TextChunk).filter(TextChunk.chapter_id == chapter_id).delete()
+            if job:
+                job.chunks_json = all_chunks
+                job.total_chunks = len(all_chunks)
+                job.embedded_chunks = 0
+            db.commit()
+            # Stop serving question sets built from the old PDF right away.
+            # If this fails the retry resumes from the checkpoint and relies
+            # on the invalidation after embedding.
+            RAGService(db).invalidate_chapter_caches(chapter_id)
+
+        done = {
+            idx
+            for (idx,) in db.query(TextChunk.chunk_index).filter(TextChunk.chapter_id == chapter_id)
+        }
+        pending = [c for c in all_chunks if c["chunk_index"] not in done]
+
+        # ── Generate embeddings in token-packed sub-batches and store ───────
+        # Throttled or failed sub-batches are retried individually inside the
+        # client; only an exhausted retry budget fails the task, and the next
+        # attempt picks up from the last committed sub-batch.
+        texts = [c["content"] for c in pending]
+        embedded = len(done)
+        with span("ingest.embed", **{"chapter.id": chapter_id, "ingest.pending_chunks": len(pending)}):
+            for start, embeddings in embedding_client.iter_batches(texts):
+                for chunk, emb in zip(pending[start:], embeddings):
+                    db.add(
+                        TextChunk(
+                            chapter_id=chapter_id,
+                            content=chunk["content"],
+                            chunk_index=chunk["chunk_index"],
+                            # Checkpoints written before these keys existed lack them.
+                            chunk_id=chunk.get("chunk_id"),
+                            page_number=chunk["page_number"],
+                            page_end=chunk.get("page_end"),
+                            embedding=emb,
+                        )
                     )
+                embedded += len(embeddings)
+                if job:
+                    job.embedded_chunks = embedded
+                db.commit()
+                logger.info(
+                    f"[ingest] chapter={chapter_id}: embedded {embedded}/{len(all_chunks)} chunks"
                 )
-            db.commit()
-            logger.info(
-                f"[ingest] chapter={chapter_id}: embedded batch {i // BATCH_SIZE + 1}"
-            )
+
+        # Again once the new chunks are in: anything cached while they were
+        # being embedded was built from a partial chapter. Before the job is
+        # marked completed, so a failed generation bump fails the attempt and
+        # the retry (resuming with nothing left to embed) bumps it again.
+        RAGService(db).invalidate_chapter_caches(chapter_id)
 
         # ── Mark as ready ───────────────────────────────────────────────────
         chapter.status = "ready"
         chapter.error_message = None
         if job:
             job.status = "completed"
+            job.error_message = None
+            job.chunks_json = None
             job.completed_at = datetime.now(timezone.utc)
         db.commit()
 
+        record_ingestion(len(pending), time.perf_counter() - started)
         logger.info(f"[ingest] chapter={chapter_id}: ingestion complete")
+
+        from app.tasks.pregenerate import pregenerate_questions_task
+
+        for num_questions in settings.PREGENERATE_QUESTION_COUNTS:
+            pregenerate_questions_task.delay(chapter_id, num_questions)
         return {"status": "completed", "chapter_id": chapter_id, "chunks": len(all_chunks)}
 
     except Exception as exc:
         logger.error(f"[ingest] chapter={chapter_id} FAILED: {exc}", exc_info=True)
         db.rollback()
+        final = self.request.retries >= self.max_retries
         try:
             if chapter:
-                chapter.status = "failed"
                 chapter.error_message = str(exc)
+                if final:
+                    chapter.status = "failed"
             if job:
-                job.status = "failed"
                 job.error_message = str(exc)
-                job.completed_at = datetime.now(timezone.utc)
+                if final:
+                    job.status = "failed"
+                    job.completed_at = datetime.now(timezone.utc)
             db.commit()
         except Exception:
             pass
+        # The checkpoint is kept even after the final failure so a manual
+        # re-run of this job still resumes rather than starting over.
         raise self.retry(exc=exc, countdown=60)
     finally:
         db.close()
+
+
+@celery_app.task(bind=True, name="ensure_chapter_embeddings", max_retries=3)
+def ensure_chapter_embeddings_task(self, chapter_id: int, job_id: str | None = None) -> dict:
+    """Run RAGService.ensure_chapter_embeddings on the interactive queue.
+
+    Lets the web tier hand the backfill / on-demand ingestion of a chapter to
+    a worker instead of doing it inside the request. *job_id*, when given,
+    is the IngestionJob the client is polling.
+    """
+    from app.database import SessionLocal
+    from app.models.board import Chapter
+    from app.models.ingestion_job import IngestionJob
+    from app.services.rag_service import RAGService
+
+    db = SessionLocal()
+    job = None
+    try:
+        if job_id:
+            job = db.query(IngestionJob).filter(IngestionJob.id == uuid.UUID(job_id)).first()
+        chapter = db.query(Chapter).filter(Chapter.id == chapter_id).first()
+        if not chapter:
+            raise ValueError(f"Chapter {chapter_id} not found")
+
+        if job:
+            job.status = "processing"
+            job.attempts = (job.attempts or 0) + 1
+            if job.started_at is None:
+                job.started_at = datetime.now(timezone.utc)
+            db.commit()
+
+        rag = RAGService(db)
+        embedded = rag.ensure_chapter_embeddings(chapter.id, chapter.pdf_s3_key)
+        if embedded and (chapter.status != "ready" or chapter.error_message):
+            chapter.status = "ready"
+            chapter.error_message = None
+        if job:
+            job.status = "completed" if embedded else "failed"
+            job.error_message = None if embedded else "No chunks could be embedded"
+            job.total_chunks, job.embedded_chunks = rag.embedding_counts(chapter.id)
+            job.completed_at = datetime.now(timezone.utc)
+        db.commit()
+        return {"status": "completed", "chapter_id": chapter_id, "chunks": embedded}
+    except Exception as exc:
+        logger.error(f"[ensure] chapter={chapter_id} FAILED: {exc}", exc_info=True)
+        db.rollback()
+        if job and self.request.retries >= self.max_retries:
+            try:
+                job.status = "failed"
+                job.error_message = str(exc)
+                job.completed_at = datetime.now(timezone.utc)
+                db.commit()
+            except Exception:
+                pass
+        raise self.retry(exc=exc, countdown=10)
+    finally:
+        db.close()
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import logging
+
+from app.worker import celery_app
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(bind=True, name="pregenerate_questions", max_retries=2)
+def pregenerate_questions_task(self, chapter_id: int, num_questions: int) -> dict:
+    """Fill the shared question cache for (chapter, num_questions) ahead of demand.
+
+    Routed to the low-priority pregen queue so it never competes with
+    ingestion or interactive work.
+    """
+    from app.database import SessionLocal
+    from app.services.generation_service import GenerationService
+
+    db = SessionLocal()
+    try:
+        generated = GenerationService(db).warm_question_cache(chapter_id, num_questions)
+        logger.info(
+            f"[pregen] chapter={chapter_id} num_q={num_questions}: "
+            f"{'generated' if generated else 'already cached'}"
+        )
+        return {"chapter_id": chapter_id, "num_questions": num_questions, "generated": generated}
+    except Exception as exc:
+        logger.error(f"[pregen] chapter={chapter_id} FAILED: {exc}", exc_info=True)
+        db.rollback()
+        raise self.retry(exc=exc, countdown=120)
+    finally:
+        db.close()
@@ -1,14 +1,31 @@
 from __future__ import annotations
 
 from celery import Celery
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown
+from kombu import Exchange, Queue
 
 from app.config import settings
 
+# ── Queues ───────────────────────────────────────────────────────────────────
+# interactive : work a user or admin is waiting on (single uploads, on-demand
+#               chapter embedding). Served by its own worker pool.
+# ingest      : background/bulk PDF ingestion.
+# pregen      : speculative question pre-generation and item calibration;
+#               lowest priority.
+QUEUE_INTERACTIVE = "interactive"
+QUEUE_INGEST = "ingest"
+QUEUE_PREGEN = "pregen"
+
+# Redis emulates priorities with one list per step; 0 is consumed first.
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 9
+
 celery_app = Celery(
     "vidyai",
     broker=settings.REDIS_URL,
     backend=settings.REDIS_URL,
-    include=["app.tasks.ingest"],
+    include=["app.tasks.ingest", "app.tasks.pregenerate", "app.tasks.calibrate"],
 )
 
 celery_app.conf.update(
@@ -20,4 +37,88 @@ celery_app.conf.update(
     task_track_started=True,
     task_acks_late=True,                  # Re-queue on worker crash
     worker_prefetch_multiplier=1,         # One task at a time per worker
+    task_queues=tuple(
+        Queue(name, Exchange(name), routing_key=name)
+        for name in (QUEUE_INTERACTIVE, QUEUE_INGEST, QUEUE_PREGEN)
+    ),
+    task_default_queue=QUEUE_INGEST,
+    task_default_priority=PRIORITY_NORMAL,
+    task_routes={
+        "ensure_chapter_embeddings": {"queue": QUEUE_INTERACTIVE, "priority": PRIORITY_HIGH},
+        "ingest_pdf": {"queue": QUEUE_INGEST, "priority": PRIORITY_NORMAL},
+        "pregenerate_questions": {"queue": QUEUE_PREGEN, "priority": PRIORITY_LOW},
+        "calibrate_items": {"queue": QUEUE_PREGEN, "priority": PRIORITY_LOW},
+    },
+    # Bound how long a publish can stall when Redis is unreachable (the
+    # defaults retry for several seconds); the API checks cache.available first.
+    broker_connection_timeout=2,
+    task_publish_retry_policy={"max_retries": 2, "interval_start": 0, "interval_step": 0.2, "interval_max": 0.5},
+    broker_transport_options={
+        "priority_steps": list(range(10)),
+        "sep": ":",
+        "queue_order_strategy": "priority",
+    },
 )
+
+
+# ── Periodic tasks (celery beat) ────────────────────────────────────────────
+# Run one beat process per deployment (see docker-compose.yml); the tasks it
+# sends are routed like any other.
+
+celery_app.conf.beat_schedule = {}
+if settings.ITEM_CALIBRATION_INTERVAL_SECONDS > 0:
+    celery_app.conf.beat_schedule["calibrate-items"] = {
+        "task": "calibrate_items",
+        "schedule": float(settings.ITEM_CALIBRATION_INTERVAL_SECONDS),
+    }
+
+
+# ── Metrics ──────────────────────────────────────────────────────────────────
+# Task code records into app.core.metrics; with PROMETHEUS_MULTIPROC_DIR set,
+# the parent worker process serves the aggregate of all its children.
+
+
+@worker_init.connect
+def _start_metrics_server(**_) -> None:
+    if not settings.WORKER_METRICS_PORT:
+        return
+    from prometheus_client import CollectorRegistry, start_http_server
+
+    from app.core.metrics import is_multiprocess
+
+    registry = None
+    if is_multiprocess():
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    start_http_server(settings.WORKER_METRICS_PORT, **({"registry": registry} if registry else {}))
+
+
+@worker_process_shutdown.connect
+def _mark_child_dead(pid=None, **_) -> None:
+    from app.core.metrics import mark_process_dead
+
+    mark_process_dead(pid)
+
+
+# ── Tracing ──────────────────────────────────────────────────────────────────
+# Set up in each prefork child: span exporter threads do not survive fork().
+# Thread-pool workers (see docker-compose.yml) run tasks in the main process
+# and never send worker_process_init, so set up there instead.
+
+
+@worker_init.connect
+def _setup_thread_pool_tracing(sender=None, **_) -> None:
+    from celery.concurrency import get_implementation
+    from celery.concurrency.prefork import TaskPool as PreforkPool
+
+    if sender is not None and not issubclass(get_implementation(sender.pool_cls), PreforkPool):
+        _setup_worker_tracing()
+
+
+@worker_process_init.connect
+def _setup_worker_tracing(**_) -> None:
+    from app.core.tracing import setup_tracing
+
+    setup_tracing("vidyai-worker")
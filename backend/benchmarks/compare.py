@@ -0,0 +1,122 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+A scenario regresses when its p50/p95/p99 latency rises, or its throughput
+falls, by more than --threshold percent relative to the baseline. Exits 1
+when anything regressed, so it can gate CI.
+
+Usage:
+    python -m benchmarks.compare benchmarks/results/<base>.json benchmarks/results/<new>.json [--threshold 10]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.harness import RESULTS_SCHEMA_VERSION
+
+# (label, path into a scenario/ingestion dict, True when higher is better)
+_SCENARIO_METRICS = (
+    ("rps", ("throughput_rps",), True),
+    ("p50", ("latency", "p50_ms"), False),
+    ("p95", ("latency", "p95_ms"), False),
+    ("p99", ("latency", "p99_ms"), False),
+)
+_INGESTION_METRICS = (
+    ("chunks/s", ("chunks_per_second",), True),
+    ("pdf p95", ("per_pdf", "p95_ms"), False),
+)
+
+
+def _load(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as fh:
+        report = json.load(fh)
+    if report.get("schema_version") != RESULTS_SCHEMA_VERSION:
+        raise SystemExit(
+            f"{path}: schema_version {report.get('schema_version')} != {RESULTS_SCHEMA_VERSION}"
+        )
+    return report
+
+
+def _dig(data: Dict[str, Any], path: Tuple[str, ...]) -> Optional[float]:
+    for key in path:
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    return data
+
+
+def _change_pct(base: float, new: float) -> Optional[float]:
+    if not base:
+        return None
+    return (new - base) / base * 100.0
+
+
+def compare(
+    base: Dict[str, Any], new: Dict[str, Any], threshold_pct: float
+) -> Tuple[List[str], List[str]]:
+    """Return (table lines, regression descriptions)."""
+    lines: List[str] = []
+    regressions: List[str] = []
+
+    def row(name: str, metrics: tuple, base_data: Dict[str, Any], new_data: Dict[str, Any]) -> None:
+        cells = []
+        for label, path, higher_is_better in metrics:
+            old, cur = _dig(base_data, path), _dig(new_data, path)
+            if old is None or cur is None:
+                cells.append(f"{label} n/a")
+                continue
+            change = _change_pct(old, cur)
+            if change is None:
+                cells.append(f"{label} {old}→{cur}")
+                continue
+            worse = -change if higher_is_better else change
+            flag = ""
+            if worse > threshold_pct:
+                flag = " !"
+                regressions.append(f"{name} {label}: {old} → {cur} ({change:+.1f}%)")
+            cells.append(f"{label} {old}→{cur} ({change:+.1f}%){flag}")
+        lines.append(f"{name:<15}" + "  ".join(cells))
+
+    if base.get("ingestion") and new.get("ingestion"):
+        row("ingestion", _INGESTION_METRICS, base["ingestion"], new["ingestion"])
+    for name, new_scenario in new.get("scenarios", {}).items():
+        base_scenario = base.get("scenarios", {}).get(name)
+        if base_scenario is None:
+            lines.append(f"{name:<15}(new scenario)")
+            continue
+        row(name, _SCENARIO_METRICS, base_scenario, new_scenario)
+        if new_scenario.get("errors", 0) > base_scenario.get("errors", 0):
+            regressions.append(
+                f"{name} errors: {base_scenario.get('errors', 0)} → {new_scenario['errors']}"
+            )
+    return lines, regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed slowdown in percent")
+    args = parser.parse_args()
+
+    base, new = _load(args.baseline), _load(args.candidate)
+    print(f"baseline : {(base.get('git') or {}).get('commit')}  {base.get('timestamp')}")
+    print(f"candidate: {(new.get('git') or {}).get('commit')}  {new.get('timestamp')}\n")
+    if base.get("config") != new.get("config"):
+        print("warning: runs used different benchmark settings; compare with care\n")
+
+    lines, regressions = compare(base, new, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold}%:")
+        for item in regressions:
+            print(f"  - {item}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.threshold}%.")
+
+
+if __name__ == "__main__":
+    main()
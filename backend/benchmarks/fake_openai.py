@@ -0,0 +1,270 @@
+"""
+Deterministic stand-in for the OpenAI API (and Supabase's JWKS endpoint).
+
+Serves just enough of the API for the app's hot paths:
+
+    POST /v1/embeddings          fixed unit vectors derived from each input's hash
+    POST /v1/chat/completions    canned MCQ JSON (json_object mode) or a summary
+    GET  /auth/v1/.well-known/jwks.json
+                                 one HS256 key, so benchmark users can be minted
+                                 locally with mint_token()
+
+Each endpoint sleeps for a configurable latency before answering, so the
+benchmark can model a slow upstream without spending real tokens. The same
+input always yields the same output, which keeps runs comparable.
+
+Usage (standalone):
+    python -m benchmarks.fake_openai --port 8765 --chat-latency-ms 800
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from jose import jwt
+
+JWKS_PATH = "/auth/v1/.well-known/jwks.json"
+_KID = "vidyai-bench"
+_NUM_QUESTIONS_RE = re.compile(r"Generate (\d+) MCQ")
+
+
+@dataclass
+class FakeOpenAIConfig:
+    embedding_dim: int = 1536
+    embedding_latency_ms: float = 0.0
+    chat_latency_ms: float = 0.0
+    jwt_secret: str = "vidyai-benchmark-secret"
+
+
+def fake_embedding(text: str, dim: int) -> List[float]:
+    """Unit vector of *dim* floats, a pure function of *text*."""
+    raw = hashlib.shake_256(text.encode("utf-8")).digest(dim)
+    vector = [(b - 127.5) / 127.5 for b in raw]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [round(v / norm, 6) for v in vector]
+
+
+def fake_questions(num_questions: int, topic: str) -> Dict[str, Any]:
+    """A valid TestQuestionsPayload with *num_questions* questions."""
+    keys = "ABCD"
+    return {
+        "questions": [
+            {
+                "id": i,
+                "question": f"Benchmark question {i} about {topic}?",
+                "options": [{"key": k, "text": f"Option {k} for question {i}"} for k in keys],
+                "correct_answer": keys[i % 4],
+                "explanation": f"Option {keys[i % 4]} is correct for question {i}.",
+            }
+            for i in range(1, num_questions + 1)
+        ]
+    }
+
+
+def _approx_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 — silence per-request logs
+        pass
+
+    def _send_json(self, status: int, body: Any) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path == JWKS_PATH:
+            self._send_json(200, {"keys": [self.server.jwk]})
+        else:
+            self._send_json(404, {"error": {"message": f"no route {self.path}"}})
+
+    def do_POST(self) -> None:  # noqa: N802
+        body = self._read_json()
+        if self.path.endswith("/embeddings"):
+            self._embeddings(body)
+        elif self.path.endswith("/chat/completions"):
+            self._chat(body)
+        else:
+            self._send_json(404, {"error": {"message": f"no route {self.path}"}})
+
+    def _embeddings(self, body: Dict[str, Any]) -> None:
+        config = self.server.config
+        inputs = body.get("input") or []
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        dim = int(body.get("dimensions") or config.embedding_dim)
+        time.sleep(config.embedding_latency_ms / 1000.0)
+        tokens = sum(_approx_tokens(text) for text in inputs)
+        self._send_json(
+            200,
+            {
+                "object": "list",
+                "model": body.get("model", "text-embedding-3-small"),
+                "data": [
+                    {"object": "embedding", "index": i, "embedding": fake_embedding(text, dim)}
+                    for i, text in enumerate(inputs)
+                ],
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+            },
+        )
+
+    def _chat(self, body: Dict[str, Any]) -> None:
+        config = self.server.config
+        messages = body.get("messages") or []
+        prompt = "\n".join(str(m.get("content", "")) for m in messages)
+        time.sleep(config.chat_latency_ms / 1000.0)
+
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            match = _NUM_QUESTIONS_RE.search(prompt)
+            num_questions = int(match.group(1)) if match else 10
+            content = json.dumps(fake_questions(num_questions, "the chapter"))
+        else:
+            content = (
+                "## Key Ideas\n- Benchmark summary.\n\n"
+                "## Important Formulas/Rules\n- a = b\n\n"
+                "## Exam Tips\n- Practise."
+            )
+
+        prompt_tokens = _approx_tokens(prompt)
+        completion_tokens = _approx_tokens(content)
+        self._send_json(
+            200,
+            {
+                "id": "chatcmpl-bench",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "gpt-4o"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            },
+        )
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple, config: FakeOpenAIConfig) -> None:
+        super().__init__(address, _Handler)
+        self.config = config
+        self.jwk = {
+            "kty": "oct",
+            "kid": _KID,
+            "alg": "HS256",
+            "k": base64.urlsafe_b64encode(config.jwt_secret.encode()).rstrip(b"=").decode(),
+        }
+
+
+class FakeOpenAIServer:
+    """Run the fake API on a background thread.
+
+    Point the app at it with ``OPENAI_BASE_URL=<server.base_url>`` and
+    ``SUPABASE_URL=<server.url>``.
+    """
+
+    def __init__(
+        self,
+        config: Optional[FakeOpenAIConfig] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.config = config or FakeOpenAIConfig()
+        self._server = _Server((host, port), self.config)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.url}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-openai", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def mint_token(self, user_id: str, ttl_seconds: int = 24 * 3600) -> str:
+        """A Supabase-shaped access token the app will accept via the JWKS above."""
+        now = int(time.time())
+        return jwt.encode(
+            {
+                "sub": user_id,
+                "aud": "authenticated",
+                "role": "authenticated",
+                "iat": now,
+                "exp": now + ttl_seconds,
+            },
+            self.config.jwt_secret,
+            algorithm="HS256",
+            headers={"kid": _KID},
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the fake OpenAI/JWKS server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--embedding-dim", type=int, default=1536)
+    parser.add_argument("--embedding-latency-ms", type=float, default=0.0)
+    parser.add_argument("--chat-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(
+        FakeOpenAIConfig(
+            embedding_dim=args.embedding_dim,
+            embedding_latency_ms=args.embedding_latency_ms,
+            chat_latency_ms=args.chat_latency_ms,
+        ),
+        host=args.host,
+        port=args.port,
+    )
+    print(f"Fake OpenAI listening on {server.base_url} (JWKS at {server.url}{JWKS_PATH})")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
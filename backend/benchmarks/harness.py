@@ -0,0 +1,116 @@
+"""Load-generation and latency-summary helpers shared by the benchmark scripts."""
+from __future__ import annotations
+
+import math
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Collection, Dict, List, Optional, Sequence
+
+import httpx
+
+# Bump when the layout of the results JSON changes incompatibly.
+RESULTS_SCHEMA_VERSION = 1
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of an already-sorted sequence."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies_s: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean/max in milliseconds."""
+    ordered = sorted(latencies_s)
+    if not ordered:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "mean_ms": 0.0, "max_ms": 0.0}
+    return {
+        "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    requests: int
+    concurrency: int
+    errors: int
+    duration_s: float
+    throughput_rps: float
+    latency: Dict[str, float]
+    status_codes: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def run_scenario(
+    name: str,
+    client: httpx.Client,
+    send: Callable[[httpx.Client, int], httpx.Response],
+    requests: int,
+    concurrency: int,
+    expected_status: Collection[int] = (200,),
+    before_each: Optional[Callable[[int], None]] = None,
+) -> ScenarioResult:
+    """Issue *requests* calls of ``send(client, i)`` with *concurrency* in flight.
+
+    Only the ``send`` call is timed; *before_each* (e.g. clearing a cache to
+    force a miss) runs untimed in the same worker thread. Responses outside
+    *expected_status* and transport errors count as errors, and their
+    latencies are excluded from the percentiles.
+    """
+    latencies: List[float] = []
+    status_codes: Dict[str, int] = {}
+    errors = 0
+    lock = threading.Lock()
+
+    def one(i: int) -> None:
+        nonlocal errors
+        if before_each is not None:
+            before_each(i)
+        start = time.perf_counter()
+        try:
+            response = send(client, i)
+        except httpx.HTTPError as exc:
+            elapsed = time.perf_counter() - start
+            status = type(exc).__name__
+            ok = False
+        else:
+            elapsed = time.perf_counter() - start
+            status = str(response.status_code)
+            ok = response.status_code in expected_status
+        with lock:
+            status_codes[status] = status_codes.get(status, 0) + 1
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    if concurrency <= 1:
+        for i in range(requests):
+            one(i)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=name) as pool:
+            list(pool.map(one, range(requests)))
+    duration = time.perf_counter() - started
+
+    return ScenarioResult(
+        name=name,
+        requests=requests,
+        concurrency=max(1, concurrency),
+        errors=errors,
+        duration_s=round(duration, 3),
+        throughput_rps=round(len(latencies) / duration, 2) if duration > 0 else 0.0,
+        latency=summarize(latencies),
+        status_codes=status_codes,
+    )
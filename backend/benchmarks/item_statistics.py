@@ -0,0 +1,110 @@
+"""
+Microbenchmark: item calibration over a synthetic response matrix.
+
+Simulates one question set answered by --submissions students under a
+two-parameter logistic model (known difficulty and discrimination per item,
+distractors drawn with weaker students favouring them), then times the two
+halves of AnalyticsService.calibrate_items():
+
+  build    answers maps ({"3": "B", ...}) -> (n, k) int8 matrix
+  stats    item_statistics(): difficulty, discrimination, distractor r
+
+and reports the rank correlation between the simulated and the recovered
+difficulty / discrimination as a sanity check. No database is needed.
+
+Usage:
+    python -m benchmarks.item_statistics [--submissions 100000] [--questions 20] [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.services.item_statistics import OPTION_KEYS, build_response_matrix, item_statistics
+
+
+def simulate(submissions: int, questions: int, seed: int = 7) -> Dict[str, Any]:
+    rng = np.random.default_rng(seed)
+    ability = rng.normal(size=(submissions, 1))
+    difficulty = rng.normal(size=questions)
+    discrimination = rng.uniform(0.3, 2.0, size=questions)
+    key = rng.integers(1, len(OPTION_KEYS) + 1, size=questions)
+
+    p_correct = 1 / (1 + np.exp(-discrimination * (ability - difficulty)))
+    correct = rng.random((submissions, questions)) < p_correct
+    wrong = rng.integers(1, len(OPTION_KEYS), size=(submissions, questions))
+    wrong = wrong + (wrong >= key)   # any option but the key
+    choices = np.where(correct, key, wrong)
+    choices[rng.random((submissions, questions)) < 0.03] = 0   # some omitted
+
+    labels = ("",) + OPTION_KEYS
+    answers: List[Dict[str, str]] = [
+        {str(j + 1): labels[c] for j, c in enumerate(row) if c} for row in choices.tolist()
+    ]
+    return {
+        "question_ids": list(range(1, questions + 1)),
+        "answers": answers,
+        "key": key.astype(np.int8),
+        "difficulty": difficulty,
+        "discrimination": discrimination,
+    }
+
+
+def _time(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 1)
+
+
+def _rank_correlation(a: np.ndarray, b: np.ndarray) -> float:
+    return round(float(np.corrcoef(np.argsort(np.argsort(a)), np.argsort(np.argsort(b)))[0, 1]), 3)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Item calibration microbenchmark")
+    parser.add_argument("--submissions", type=int, default=100_000)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    data = simulate(args.submissions, args.questions)
+    question_ids, answers, key = data["question_ids"], data["answers"], data["key"]
+    choices = build_response_matrix(question_ids, answers)
+    stats = item_statistics(question_ids, choices, key)
+
+    result = {
+        "submissions": args.submissions,
+        "questions": args.questions,
+        "responses": int(np.count_nonzero(choices)),
+        "build_ms": _time(lambda: build_response_matrix(question_ids, answers), args.repeat),
+        "stats_ms": _time(lambda: item_statistics(question_ids, choices, key), args.repeat),
+        # Higher simulated difficulty -> lower share correct; discrimination should track.
+        "difficulty_rank_r": _rank_correlation(data["difficulty"], 1 - stats.p_correct),
+        "discrimination_rank_r": _rank_correlation(data["discrimination"], stats.discrimination),
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(
+        f"{result['submissions']} submissions × {result['questions']} questions "
+        f"({result['responses']} answered cells)"
+    )
+    print(f"  build matrix   {result['build_ms']:>9.1f} ms")
+    print(f"  statistics     {result['stats_ms']:>9.1f} ms")
+    print(
+        f"  recovered vs simulated rank r: difficulty {result['difficulty_rank_r']}, "
+        f"discrimination {result['discrimination_rank_r']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Microbenchmark: response serialization for the heaviest JSON payloads.
+
+Times the three ways an endpoint's return value can reach the wire:
+
+  validated+json    FastAPI's stock path: validate against response_model,
+                    jsonable_encoder, stdlib JSONResponse
+  validated+orjson  the same, rendered by FastJSONResponse (the app default)
+  trusted           trusted_response(): no validation, orjson straight from
+                    the dicts (used by /tests, /tests/{id} and /boards)
+
+Payloads are synthetic and in-memory, so no database, Redis or app settings
+are needed. Before timing anything it also checks that all three paths
+produce the same JSON.
+
+Usage:
+    python -m benchmarks.serialization [--tests 20] [--questions 20] [--repeat 200]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.core.responses import FastJSONResponse, orjson, trusted_response
+from app.schemas.board import BoardResponse
+from app.schemas.test import GeneratedTestResponse
+
+_EXPLANATION = (
+    "The discriminant b² − 4ac is negative, so the quadratic has no real roots; "
+    "its graph does not meet the x-axis."
+)
+
+
+def make_tests(count: int, questions: int) -> List[Dict[str, Any]]:
+    """Payload of GET /tests: *count* tests of *questions* MCQs each."""
+    created = datetime(2025, 1, 6, 9, 30, tzinfo=timezone.utc)
+    tests = []
+    for t in range(count):
+        questions_json = {
+            "questions": [
+                {
+                    "id": q + 1,
+                    "question": f"Q{q + 1}. Which statement about the quadratic x² + {q}x + {t + 5} = 0 is true?",
+                    "options": [
+                        {"key": key, "text": f"Option {key}: the equation has {key.lower()} distinct real roots"}
+                        for key in "ABCD"
+                    ],
+                    "correct_answer": "ABCD"[q % 4],
+                    "explanation": _EXPLANATION,
+                }
+                for q in range(questions)
+            ]
+        }
+        tests.append(
+            {
+                "id": 1000 + t,
+                "chapter_id": 40 + t % 7,
+                "chapter_name": "Quadratic Equations",
+                "subject_name": "Mathematics",
+                "questions_json": questions_json,
+                "score": 72.5 if t % 2 else None,
+                "completed_at": created + timedelta(minutes=25) if t % 2 else None,
+                "created_at": created - timedelta(days=t),
+            }
+        )
+    return tests
+
+
+def make_boards(boards: int = 2, classes: int = 12, subjects: int = 6, chapters: int = 15) -> List[Dict[str, Any]]:
+    """Payload of GET /boards: the full curriculum tree."""
+    return [
+        {
+            "id": b,
+            "name": f"Board {b}",
+            "code": f"B{b}",
+            "description": None,
+            "is_active": True,
+            "classes": [
+                {
+                    "id": b * 100 + c,
+                    "class_number": c + 1,
+                    "display_name": f"Class {c + 1}",
+                    "is_active": True,
+                    "subjects": [
+                        {
+                            "id": (b * 100 + c) * 10 + s,
+                            "subject_name": f"Subject {s}",
+                            "subject_code": f"S{s}",
+                            "is_active": True,
+                            "chapters": [
+                                {
+                                    "id": ((b * 100 + c) * 10 + s) * 100 + ch,
+                                    "chapter_number": ch + 1,
+                                    "chapter_name": f"Chapter {ch + 1}",
+                                    "description": "Short description of the chapter's content.",
+                                    "is_active": True,
+                                    "chunk_count": 40 + ch,
+                                }
+                                for ch in range(chapters)
+                            ],
+                        }
+                        for s in range(subjects)
+                    ],
+                }
+                for c in range(classes)
+            ],
+        }
+        for b in range(boards)
+    ]
+
+
+def _validated(response_model: Any, response_class: type, loop: asyncio.AbstractEventLoop) -> Callable[[Any], bytes]:
+    field = create_model_field(name="Response", type_=response_model, mode="serialization")
+
+    def render(payload: Any) -> bytes:
+        content = loop.run_until_complete(serialize_response(field=field, response_content=payload))
+        return response_class(content=content).body
+
+    return render
+
+
+def _time(fn: Callable[[Any], bytes], payload: Any, repeat: int) -> Dict[str, float]:
+    fn(payload)   # warm up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(payload)
+        samples.append(time.perf_counter() - start)
+    return {"median_ms": round(statistics.median(samples) * 1000, 3), "min_ms": round(min(samples) * 1000, 3)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Response serialization microbenchmark")
+    parser.add_argument("--tests", type=int, default=20, help="Tests in the /tests payload (API max page: 100)")
+    parser.add_argument("--questions", type=int, default=20, help="Questions per test")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    cases = {
+        "GET /tests": (List[GeneratedTestResponse], make_tests(args.tests, args.questions)),
+        "GET /tests/{id}": (GeneratedTestResponse, make_tests(1, args.questions)[0]),
+        "GET /boards": (List[BoardResponse], make_boards()),
+    }
+    results: Dict[str, Dict[str, Any]] = {}
+    loop = asyncio.new_event_loop()
+    for name, (model, payload) in cases.items():
+        paths = {
+            "validated+json": _validated(model, JSONResponse, loop),
+            "validated+orjson": _validated(model, FastJSONResponse, loop),
+            "trusted": lambda p: trusted_response(p).body,
+        }
+        bodies = {path: json.loads(fn(payload)) for path, fn in paths.items()}
+        if any(body != bodies["validated+json"] for body in bodies.values()):
+            raise SystemExit(f"{name}: serialization paths disagree; trusted_response is not a drop-in")
+        timings = {path: _time(fn, payload, args.repeat) for path, fn in paths.items()}
+        baseline = timings["validated+json"]["median_ms"]
+        results[name] = {
+            "bytes": len(paths["trusted"](payload)),
+            **{
+                path: {**t, "speedup": round(baseline / t["median_ms"], 2) if t["median_ms"] else None}
+                for path, t in timings.items()
+            },
+        }
+    loop.close()
+
+    if args.json:
+        print(json.dumps({"orjson": orjson is not None, "results": results}, indent=2))
+        return
+    if orjson is None:
+        print("warning: orjson is not installed; FastJSONResponse falls back to the stdlib\n")
+    print(f"{'payload':<17}{'bytes':>9}  {'validated+json':>16}{'validated+orjson':>20}{'trusted':>20}")
+    for name, row in results.items():
+        cells = [f"{row[p]['median_ms']:>9.3f} ms ({row[p]['speedup']:.1f}x)" for p in ("validated+orjson", "trusted")]
+        print(f"{name:<17}{row['bytes']:>9}  {row['validated+json']['median_ms']:>13.3f} ms" + "".join(f"{c:>20}" for c in cells))
+
+
+if __name__ == "__main__":
+    main()
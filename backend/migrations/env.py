@@ -17,13 +17,17 @@ from app.database import Base
 from app.models import (  # noqa: F401
     Board,
     Chapter,
+    ChapterStats,
     Class,
     GeneratedTest,
     QuestionCache,
+    QuestionSet,
+    QuestionStats,
     Subject,
     TextChunk,
     UsageTracking,
     User,
+    UserChapterStats,
 )
 
 config = context.config
@@ -0,0 +1,102 @@
+"""Unique natural keys on classes, subjects and chapters
+
+Lets scripts/sync_curriculum.py upsert the curriculum hierarchy with
+INSERT ... ON CONFLICT. Existing duplicates are merged (classes, subjects)
+or renumbered (chapters) before the constraints are added.
+
+Revision ID: 003
+Revises: 002
+Create Date: 2024-01-03 00:00:00.000000
+"""
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "003"
+down_revision: Union[str, None] = "002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ── Merge duplicate classes into the oldest row ──────────────────────────
+    op.execute(
+        """
+        WITH keep AS (
+            SELECT id, MIN(id) OVER (PARTITION BY board_id, class_number) AS keep_id
+            FROM classes
+        )
+        UPDATE subjects s SET class_id = keep.keep_id
+        FROM keep
+        WHERE s.class_id = keep.id AND keep.id <> keep.keep_id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM classes c
+        USING classes older
+        WHERE c.board_id = older.board_id
+          AND c.class_number = older.class_number
+          AND c.id > older.id
+        """
+    )
+
+    # ── Merge duplicate subjects into the oldest row ─────────────────────────
+    op.execute(
+        """
+        WITH keep AS (
+            SELECT id, MIN(id) OVER (PARTITION BY class_id, subject_name) AS keep_id
+            FROM subjects
+        )
+        UPDATE chapters ch SET subject_id = keep.keep_id
+        FROM keep
+        WHERE ch.subject_id = keep.id AND keep.id <> keep.keep_id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM subjects s
+        USING subjects older
+        WHERE s.class_id = older.class_id
+          AND s.subject_name = older.subject_name
+          AND s.id > older.id
+        """
+    )
+
+    # ── Renumber clashing chapters after the subject's last chapter ──────────
+    op.execute(
+        """
+        WITH ranked AS (
+            SELECT id, subject_id,
+                   ROW_NUMBER() OVER (PARTITION BY subject_id, chapter_number ORDER BY id) AS rn
+            FROM chapters
+        ),
+        dups AS (
+            SELECT id, subject_id,
+                   ROW_NUMBER() OVER (PARTITION BY subject_id ORDER BY id) AS offset_
+            FROM ranked
+            WHERE rn > 1
+        ),
+        maxes AS (
+            SELECT subject_id, MAX(chapter_number) AS max_number
+            FROM chapters
+            GROUP BY subject_id
+        )
+        UPDATE chapters ch
+        SET chapter_number = maxes.max_number + dups.offset_
+        FROM dups JOIN maxes ON maxes.subject_id = dups.subject_id
+        WHERE ch.id = dups.id
+        """
+    )
+
+    op.create_unique_constraint("uq_class_board_number", "classes", ["board_id", "class_number"])
+    op.create_unique_constraint("uq_subject_class_name", "subjects", ["class_id", "subject_name"])
+    op.create_unique_constraint("uq_chapter_subject_number", "chapters", ["subject_id", "chapter_number"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_chapter_subject_number", "chapters", type_="unique")
+    op.drop_constraint("uq_subject_class_name", "subjects", type_="unique")
+    op.drop_constraint("uq_class_board_number", "classes", type_="unique")
@@ -0,0 +1,38 @@
+"""Checkpoint columns on ingestion_jobs
+
+Revision ID: 004
+Revises: 003
+Create Date: 2024-01-04 00:00:00.000000
+"""
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("ingestion_jobs", sa.Column("chunks_json", postgresql.JSONB(), nullable=True))
+    op.add_column("ingestion_jobs", sa.Column("total_chunks", sa.Integer(), nullable=True))
+    op.add_column(
+        "ingestion_jobs",
+        sa.Column("embedded_chunks", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "ingestion_jobs",
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("ingestion_jobs", "attempts")
+    op.drop_column("ingestion_jobs", "embedded_chunks")
+    op.drop_column("ingestion_jobs", "total_chunks")
+    op.drop_column("ingestion_jobs", "chunks_json")
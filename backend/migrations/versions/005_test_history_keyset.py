@@ -0,0 +1,45 @@
+"""Test history listing: num_questions column and (user_id, created_at) index
+
+GET /tests/history pages a user's tests newest first by (created_at, id)
+and reads num_questions instead of the full questions_json.
+
+Revision ID: 005
+Revises: 004
+Create Date: 2024-01-05 00:00:00.000000
+"""
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "generated_tests",
+        sa.Column("num_questions", sa.Integer(), server_default="0", nullable=False),
+    )
+    # questions_json is json or jsonb depending on how the table was created.
+    op.execute(
+        """
+        UPDATE generated_tests
+        SET num_questions = COALESCE(json_array_length(questions_json::json -> 'questions'), 0)
+        WHERE json_typeof(questions_json::json -> 'questions') = 'array'
+        """
+    )
+    op.create_index(
+        "ix_generated_tests_user_created",
+        "generated_tests",
+        ["user_id", sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_generated_tests_user_created", table_name="generated_tests")
+    op.drop_column("generated_tests", "num_questions")
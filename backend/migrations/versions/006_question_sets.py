@@ -0,0 +1,193 @@
+"""Shared question sets: tests and the question cache reference one row per set
+
+Every generated_tests and question_cache row held its own copy of
+questions_json, and submission rewrote the test's copy to add user_answer.
+The questions move to question_sets (content-addressed by a sha256 of the
+canonical JSON), and the user's answers to a compact generated_tests.answers
+map of question id -> option key.
+
+Revision ID: 006
+Revises: 005
+Create Date: 2024-01-06 00:00:00.000000
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Dict, Optional, Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_BATCH = 1000
+
+
+def _content_hash(questions_json: Dict[str, Any]) -> str:
+    # Must match app.models.question_set.question_set_hash, so sets created
+    # here are found again by the application.
+    canonical = json.dumps(questions_json, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _split_answers(payload: Any) -> tuple[Dict[str, Any], Dict[str, str]]:
+    """Separate a stored questions_json into the bare questions and user_answer map."""
+    if isinstance(payload, str):
+        payload = json.loads(payload)
+    if not isinstance(payload, dict):
+        payload = {}
+    answers: Dict[str, str] = {}
+    questions = []
+    for q in payload.get("questions") or []:
+        if q.get("user_answer") is not None:
+            answers[str(q["id"])] = q["user_answer"]
+        questions.append({k: v for k, v in q.items() if k != "user_answer"})
+    return {**payload, "questions": questions}, answers
+
+
+def _backfill(conn: sa.engine.Connection, table: str, with_answers: bool, set_ids: Dict[str, int]) -> None:
+    """Point every row of *table* at its question set; *set_ids* maps hash -> id across tables."""
+    insert_set = sa.text(
+        """
+        INSERT INTO question_sets (content_hash, num_questions, questions_json)
+        VALUES (:content_hash, :num_questions, CAST(:questions_json AS jsonb))
+        RETURNING id
+        """
+    )
+    columns = "id, questions_json, completed_at" if with_answers else "id, questions_json"
+    assign = (
+        "question_set_id = :set_id, answers = CAST(:answers AS jsonb)"
+        if with_answers
+        else "question_set_id = :set_id"
+    )
+    update_row = sa.text(f"UPDATE {table} SET {assign} WHERE id = :id")
+
+    after = 0
+    while True:
+        rows = conn.execute(
+            sa.text(f"SELECT {columns} FROM {table} WHERE id > :after ORDER BY id LIMIT {_BATCH}"),
+            {"after": after},
+        ).fetchall()
+        if not rows:
+            return
+        updates = []
+        for row in rows:
+            questions_json, answers = _split_answers(row.questions_json)
+            content_hash = _content_hash(questions_json)
+            if content_hash not in set_ids:
+                set_ids[content_hash] = conn.execute(
+                    insert_set,
+                    {
+                        "content_hash": content_hash,
+                        "num_questions": len(questions_json["questions"]),
+                        "questions_json": json.dumps(questions_json),
+                    },
+                ).scalar_one()
+            params: Dict[str, Optional[Any]] = {"id": row.id, "set_id": set_ids[content_hash]}
+            if with_answers:
+                # Unsubmitted tests keep answers NULL; a submitted test with no
+                # answers at all still gets {} so it renders as submitted.
+                params["answers"] = json.dumps(answers) if row.completed_at is not None else None
+            updates.append(params)
+        conn.execute(update_row, updates)
+        after = rows[-1].id
+
+
+def upgrade() -> None:
+    op.create_table(
+        "question_sets",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("num_questions", sa.Integer(), nullable=False),
+        sa.Column("questions_json", postgresql.JSONB(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("content_hash", name="uq_question_sets_content_hash"),
+    )
+    op.create_index("ix_question_sets_id", "question_sets", ["id"])
+
+    op.add_column("generated_tests", sa.Column("question_set_id", sa.Integer(), nullable=True))
+    op.add_column("generated_tests", sa.Column("answers", postgresql.JSONB(), nullable=True))
+    op.add_column("question_cache", sa.Column("question_set_id", sa.Integer(), nullable=True))
+
+    conn = op.get_bind()
+    set_ids: Dict[str, int] = {}
+    _backfill(conn, "generated_tests", with_answers=True, set_ids=set_ids)
+    _backfill(conn, "question_cache", with_answers=False, set_ids=set_ids)
+
+    op.alter_column("generated_tests", "question_set_id", nullable=False)
+    op.alter_column("question_cache", "question_set_id", nullable=False)
+    op.create_foreign_key(
+        "fk_generated_tests_question_set_id",
+        "generated_tests",
+        "question_sets",
+        ["question_set_id"],
+        ["id"],
+    )
+    op.create_foreign_key(
+        "fk_question_cache_question_set_id",
+        "question_cache",
+        "question_sets",
+        ["question_set_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+    op.create_index("ix_generated_tests_question_set_id", "generated_tests", ["question_set_id"])
+    op.drop_column("generated_tests", "questions_json")
+    op.drop_column("question_cache", "questions_json")
+
+
+def downgrade() -> None:
+    op.add_column("generated_tests", sa.Column("questions_json", postgresql.JSONB(), nullable=True))
+    op.add_column("question_cache", sa.Column("questions_json", postgresql.JSONB(), nullable=True))
+    op.execute(
+        """
+        UPDATE question_cache c
+        SET questions_json = s.questions_json
+        FROM question_sets s
+        WHERE s.id = c.question_set_id
+        """
+    )
+    # Submitted tests get their answers folded back into each question.
+    op.execute(
+        """
+        UPDATE generated_tests t
+        SET questions_json = CASE
+            WHEN t.answers IS NULL THEN s.questions_json
+            ELSE jsonb_set(
+                s.questions_json,
+                '{questions}',
+                COALESCE(
+                    (
+                        SELECT jsonb_agg(q || jsonb_build_object('user_answer', t.answers -> (q ->> 'id')) ORDER BY n)
+                        FROM jsonb_array_elements(s.questions_json -> 'questions') WITH ORDINALITY AS e(q, n)
+                    ),
+                    '[]'::jsonb
+                )
+            )
+        END
+        FROM question_sets s
+        WHERE s.id = t.question_set_id
+        """
+    )
+    op.alter_column("generated_tests", "questions_json", nullable=False)
+    op.alter_column("question_cache", "questions_json", nullable=False)
+
+    op.drop_index("ix_generated_tests_question_set_id", table_name="generated_tests")
+    op.drop_constraint("fk_question_cache_question_set_id", "question_cache", type_="foreignkey")
+    op.drop_constraint("fk_generated_tests_question_set_id", "generated_tests", type_="foreignkey")
+    op.drop_column("question_cache", "question_set_id")
+    op.drop_column("generated_tests", "answers")
+    op.drop_column("generated_tests", "question_set_id")
+    op.drop_index("ix_question_sets_id", table_name="question_sets")
+    op.drop_table("question_sets")
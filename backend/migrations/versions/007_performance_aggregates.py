@@ -0,0 +1,134 @@
+"""Performance aggregates: user_chapter_stats, chapter_stats, question_stats
+
+Maintained incrementally by submit_test; backfilled here from the tests
+already submitted, so the aggregates start out equal to a full scan.
+
+Revision ID: 007
+Revises: 006
+Create Date: 2024-01-07 00:00:00.000000
+"""
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _counter(name: str) -> sa.Column:
+    return sa.Column(name, sa.Integer(), server_default="0", nullable=False)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_chapter_stats",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("chapter_id", sa.Integer(), nullable=False),
+        _counter("attempts"),
+        sa.Column("score_sum", sa.Float(), server_default="0", nullable=False),
+        sa.Column("best_score", sa.Float(), nullable=True),
+        sa.Column("last_score", sa.Float(), nullable=True),
+        _counter("questions_total"),
+        _counter("questions_correct"),
+        sa.Column("last_attempt_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["profiles.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["chapter_id"], ["chapters.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "chapter_id"),
+    )
+    op.create_table(
+        "chapter_stats",
+        sa.Column("chapter_id", sa.Integer(), nullable=False),
+        _counter("attempts"),
+        _counter("students"),
+        sa.Column("score_sum", sa.Float(), server_default="0", nullable=False),
+        _counter("questions_total"),
+        _counter("questions_correct"),
+        sa.Column("last_attempt_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["chapter_id"], ["chapters.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("chapter_id"),
+    )
+    op.create_table(
+        "question_stats",
+        sa.Column("question_set_id", sa.Integer(), nullable=False),
+        sa.Column("question_id", sa.Integer(), nullable=False),
+        _counter("presented"),
+        _counter("answered"),
+        _counter("correct"),
+        sa.ForeignKeyConstraint(["question_set_id"], ["question_sets.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("question_set_id", "question_id"),
+    )
+
+    # One row per question of every submitted test. Ids are model output:
+    # anything that is not a plain integer gets no question_stats row
+    # (but still counts toward the per-test totals).
+    graded = """
+        SELECT t.id AS test_id, t.question_set_id,
+               CASE WHEN (q ->> 'id') ~ '^[0-9]{1,9}$' THEN (q ->> 'id')::int END AS question_id,
+               t.answers ->> (q ->> 'id') AS user_answer,
+               (t.answers ->> (q ->> 'id')) = (q ->> 'correct_answer') AS is_correct
+        FROM generated_tests t
+        JOIN question_sets s ON s.id = t.question_set_id
+        CROSS JOIN LATERAL jsonb_array_elements(
+            CASE WHEN jsonb_typeof(s.questions_json -> 'questions') = 'array'
+                 THEN s.questions_json -> 'questions' ELSE '[]'::jsonb END
+        ) AS q
+        WHERE t.completed_at IS NOT NULL
+    """
+    op.execute(
+        f"""
+        INSERT INTO question_stats (question_set_id, question_id, presented, answered, correct)
+        SELECT question_set_id, question_id,
+               count(*), count(user_answer), count(*) FILTER (WHERE is_correct)
+        FROM ({graded}) g
+        WHERE question_id IS NOT NULL
+        GROUP BY question_set_id, question_id
+        """
+    )
+    op.execute(
+        f"""
+        INSERT INTO user_chapter_stats (
+            user_id, chapter_id, attempts, score_sum, best_score, last_score,
+            questions_total, questions_correct, last_attempt_at
+        )
+        SELECT t.user_id, t.chapter_id,
+               count(*),
+               sum(COALESCE(t.score, 0)),
+               max(t.score),
+               (array_agg(t.score ORDER BY t.completed_at DESC))[1],
+               sum(t.num_questions),
+               sum(COALESCE(c.correct, 0)),
+               max(t.completed_at)
+        FROM generated_tests t
+        LEFT JOIN (
+            SELECT test_id, count(*) FILTER (WHERE is_correct) AS correct
+            FROM ({graded}) g
+            GROUP BY test_id
+        ) c ON c.test_id = t.id
+        WHERE t.completed_at IS NOT NULL AND t.chapter_id IS NOT NULL
+        GROUP BY t.user_id, t.chapter_id
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO chapter_stats (
+            chapter_id, attempts, students, score_sum,
+            questions_total, questions_correct, last_attempt_at
+        )
+        SELECT chapter_id, sum(attempts), count(*), sum(score_sum),
+               sum(questions_total), sum(questions_correct), max(last_attempt_at)
+        FROM user_chapter_stats
+        GROUP BY chapter_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("question_stats")
+    op.drop_table("chapter_stats")
+    op.drop_table("user_chapter_stats")
@@ -0,0 +1,37 @@
+"""Item calibration columns on question_stats
+
+Filled by the calibrate_items task from the response matrix of each
+question set; NULL until a set has enough submissions.
+
+Revision ID: 008
+Revises: 007
+Create Date: 2024-01-08 00:00:00.000000
+"""
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("question_stats", sa.Column("difficulty", sa.Float(), nullable=True))
+    op.add_column("question_stats", sa.Column("discrimination", sa.Float(), nullable=True))
+    op.add_column("question_stats", sa.Column("distractors", postgresql.JSONB(), nullable=True))
+    op.add_column("question_stats", sa.Column("calibrated_responses", sa.Integer(), nullable=True))
+    op.add_column("question_stats", sa.Column("calibrated_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("question_stats", "calibrated_at")
+    op.drop_column("question_stats", "calibrated_responses")
+    op.drop_column("question_stats", "distractors")
+    op.drop_column("question_stats", "discrimination")
+    op.drop_column("question_stats", "difficulty")
@@ -0,0 +1,31 @@
+"""Chunk id and page range on text_chunks
+
+The structure-aware chunker gives each chunk a content-derived chunk_id and
+lets chunks span pages; both are now stored. Rows ingested before this
+revision keep NULLs until their chapter is re-ingested.
+
+Revision ID: 009
+Revises: 008
+Create Date: 2024-01-09 00:00:00.000000
+"""
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "009"
+down_revision: Union[str, None] = "008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("text_chunks", sa.Column("chunk_id", sa.String(16), nullable=True))
+    op.add_column("text_chunks", sa.Column("page_end", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("text_chunks", "page_end")
+    op.drop_column("text_chunks", "chunk_id")
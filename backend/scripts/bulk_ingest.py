@@ -0,0 +1,314 @@
+"""
+Bulk-ingest a whole curriculum tree (e.g. CBSC/) concurrently and resumably.
+
+Walks  <root>/<Class N>/<Subject>/<chapter>.pdf , makes sure the board →
+class → subject → chapter rows exist (via sync_curriculum), then chunks and
+embeds every PDF with several chapters in flight at once. All workers share
+one rate limiter so the combined embedding traffic stays under the OpenAI
+request/token limits.
+
+Progress is recorded in a JSON manifest keyed by the PDF's path relative to
+<root>, together with its SHA-256. Re-running the command skips PDFs whose
+hash is unchanged since they were last ingested successfully, so a run that
+crashes at chapter 37 of 200 resumes from chapter 37.
+
+Usage:
+    python scripts/bulk_ingest.py [--root ../CBSC] [--only "Class 10/Mathematics"]
+                                  [--concurrency 4] [--force] [--dry-run]
+
+Onboarding another board:
+    python scripts/bulk_ingest.py --root /data/ICSE --board-code ICSE \\
+        --board-name "Indian Certificate of Secondary Education"
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Size the DB pool for --concurrency threads rather than for an API worker.
+os.environ.setdefault("PROCESS_ROLE", "script")
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(threadName)s | %(message)s")
+logger = logging.getLogger(__name__)
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.board import Chapter, Class, Subject
+from app.services.embedding_client import EmbeddingClient
+from app.services.rate_limiter import RateLimiter
+from scripts.ingest_pdf import ingest_pdf
+from scripts.sync_curriculum import (
+    BOARD_CODE,
+    BOARD_NAME,
+    CBSC_ROOT_DIR,
+    find_board,
+    parse_chapter_info,
+    sync_curriculum,
+)
+
+DEFAULT_MANIFEST = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ".bulk_ingest_manifest.json",
+)
+
+
+@dataclass
+class PdfJob:
+    rel_path: str
+    abs_path: str
+    class_number: int
+    subject_name: str
+    chapter_name: str
+    chapter_number: int
+    sha256: str = ""
+    chapter_id: Optional[int] = None
+
+
+# ── Manifest ──────────────────────────────────────────────────────────────────
+
+
+class Manifest:
+    """Thread-safe JSON progress file, rewritten atomically on every update."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.isfile(path):
+            with open(path, encoding="utf-8") as fh:
+                self.entries = json.load(fh).get("entries", {})
+
+    def is_done(self, job: PdfJob) -> bool:
+        entry = self.entries.get(job.rel_path)
+        return bool(
+            entry
+            and entry.get("status") == "done"
+            and entry.get("sha256") == job.sha256
+            and entry.get("chapter_id") == job.chapter_id
+        )
+
+    def update(self, job: PdfJob, status: str, **fields: Any) -> None:
+        with self._lock:
+            self.entries[job.rel_path] = {
+                "sha256": job.sha256,
+                "chapter_id": job.chapter_id,
+                "status": status,
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+                **fields,
+            }
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump({"version": 1, "entries": self.entries}, fh, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+# ── Discovery ─────────────────────────────────────────────────────────────────
+
+
+def sha256_file(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def discover_pdfs(root: str, only: List[str]) -> List[PdfJob]:
+    """Return every chapter PDF under *root*, in a stable (sorted) order."""
+    jobs: List[PdfJob] = []
+    for class_dir in sorted(os.listdir(root)):
+        class_path = os.path.join(root, class_dir)
+        if not os.path.isdir(class_path) or class_dir.startswith("."):
+            continue
+        match = re.search(r"\d+", class_dir)
+        class_number = int(match.group()) if match else 0
+
+        for subject_dir in sorted(os.listdir(class_path)):
+            subject_path = os.path.join(class_path, subject_dir)
+            if not os.path.isdir(subject_path) or subject_dir.startswith("."):
+                continue
+
+            for filename in sorted(os.listdir(subject_path)):
+                if filename.startswith(".") or not filename.lower().endswith(".pdf"):
+                    continue
+                rel_path = os.path.join(class_dir, subject_dir, filename)
+                if only and not any(rel_path.startswith(prefix) for prefix in only):
+                    continue
+                chapter_name, chapter_number = parse_chapter_info(filename)
+                jobs.append(
+                    PdfJob(
+                        rel_path=rel_path,
+                        abs_path=os.path.join(subject_path, filename),
+                        class_number=class_number,
+                        subject_name=subject_dir,
+                        chapter_name=chapter_name,
+                        chapter_number=chapter_number,
+                    )
+                )
+    return jobs
+
+
+def resolve_chapter_ids(jobs: List[PdfJob], board_name: str, board_code: str) -> None:
+    """Fill in chapter_id for each job with one query over the board's chapters.
+
+    The board and the matching mirror sync_curriculum: find_board, then by
+    chapter number when the filename carries one, otherwise by chapter name.
+    """
+    db = SessionLocal()
+    try:
+        board_id = find_board(db, board_name, board_code)
+        rows = [] if board_id is None else (
+            db.query(Class.class_number, Subject.subject_name, Chapter.chapter_number, Chapter.chapter_name, Chapter.id)
+            .join(Subject, Subject.class_id == Class.id)
+            .join(Chapter, Chapter.subject_id == Subject.id)
+            .filter(Class.board_id == board_id)
+            .all()
+        )
+    finally:
+        db.close()
+
+    by_number = {(r[0], r[1], r[2]): r[4] for r in rows}
+    by_name = {(r[0], r[1], r[3]): r[4] for r in rows}
+    for job in jobs:
+        if job.chapter_number > 0:
+            job.chapter_id = by_number.get((job.class_number, job.subject_name, job.chapter_number))
+        else:
+            job.chapter_id = by_name.get((job.class_number, job.subject_name, job.chapter_name))
+
+
+def _set_chapter_status(chapter_id: int, status: str, error: Optional[str] = None) -> None:
+    db = SessionLocal()
+    try:
+        chapter = db.query(Chapter).filter(Chapter.id == chapter_id).first()
+        if chapter:
+            chapter.status = status
+            chapter.error_message = error
+            db.commit()
+    finally:
+        db.close()
+
+
+# ── Ingestion ─────────────────────────────────────────────────────────────────
+
+
+def ingest_one(job: PdfJob, manifest: Manifest, embedder: EmbeddingClient) -> int:
+    manifest.update(job, "in_progress")
+    _set_chapter_status(job.chapter_id, "processing")
+    started = time.perf_counter()
+    try:
+        chunks = ingest_pdf(job.abs_path, job.chapter_id, embedder=embedder)
+    except Exception as exc:
+        manifest.update(job, "failed", error=str(exc))
+        _set_chapter_status(job.chapter_id, "failed", str(exc))
+        raise
+    elapsed = round(time.perf_counter() - started, 2)
+    manifest.update(job, "done", chunks=chunks, seconds=elapsed)
+    _set_chapter_status(job.chapter_id, "ready")
+    return chunks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-ingest a curriculum PDF tree into Vidyai")
+    parser.add_argument("--root", default=CBSC_ROOT_DIR, help="Board directory: <root>/<Class N>/<Subject>/*.pdf")
+    parser.add_argument("--board-code", default=BOARD_CODE)
+    parser.add_argument("--board-name", default=BOARD_NAME)
+    parser.add_argument(
+        "--only",
+        nargs="*",
+        default=[],
+        help='Restrict to paths under these prefixes, e.g. "Class 10/Mathematics"',
+    )
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST, help="Resumable progress file")
+    parser.add_argument("--concurrency", type=int, default=4, help="Chapters ingested in parallel")
+    parser.add_argument("--rpm", type=int, default=settings.OPENAI_EMBEDDING_RPM, help="Embedding requests/minute")
+    parser.add_argument("--tpm", type=int, default=settings.OPENAI_EMBEDDING_TPM, help="Embedding tokens/minute")
+    parser.add_argument("--force", action="store_true", help="Re-ingest even if the PDF hash is unchanged")
+    parser.add_argument("--skip-sync", action="store_true", help="Assume curriculum rows already exist")
+    parser.add_argument("--dry-run", action="store_true", help="List what would be ingested and exit")
+    args = parser.parse_args()
+
+    root = os.path.abspath(args.root)
+    if not os.path.isdir(root):
+        logger.error(f"Curriculum directory not found: {root}")
+        sys.exit(1)
+
+    if not args.skip_sync and not args.dry_run:
+        sync_curriculum(root, args.board_name, args.board_code)
+
+    jobs = discover_pdfs(root, args.only)
+    resolve_chapter_ids(jobs, args.board_name, args.board_code)
+    for job in jobs:
+        job.sha256 = sha256_file(job.abs_path)
+
+    manifest = Manifest(args.manifest)
+    pending: List[PdfJob] = []
+    errors: List[str] = []
+    skipped = 0
+    for job in jobs:
+        if job.chapter_id is None:
+            msg = f"{job.rel_path}: no matching chapter in database"
+            logger.error(msg)
+            errors.append(msg)
+        elif not args.force and manifest.is_done(job):
+            skipped += 1
+        else:
+            pending.append(job)
+
+    logger.info(
+        f"Found {len(jobs)} PDFs: {len(pending)} to ingest, {skipped} unchanged, "
+        f"{len(errors)} unmatched"
+    )
+
+    if args.dry_run:
+        for job in pending:
+            logger.info(f"[DRY RUN] {job.rel_path} → chapter id={job.chapter_id}")
+        return
+
+    embedder = EmbeddingClient(
+        limiter=RateLimiter(requests_per_minute=args.rpm, tokens_per_minute=args.tpm)
+    )
+    started = time.perf_counter()
+    total_chunks = 0
+    succeeded = 0
+    finished = 0
+
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency), thread_name_prefix="ingest") as pool:
+        futures = {pool.submit(ingest_one, job, manifest, embedder): job for job in pending}
+        for future in as_completed(futures):
+            job = futures[future]
+            finished += 1
+            try:
+                total_chunks += future.result()
+                succeeded += 1
+                logger.info(f"[{finished}/{len(pending)}] OK {job.rel_path}")
+            except Exception as exc:
+                msg = f"{job.rel_path} failed: {exc}"
+                logger.error(msg)
+                errors.append(msg)
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"Bulk ingestion finished in {elapsed:.1f}s: {succeeded}/{len(pending)} PDFs, "
+        f"{total_chunks} chunks ({total_chunks / elapsed if elapsed else 0:.1f} chunks/s)"
+    )
+    if errors:
+        logger.error(f"FAILED ({len(errors)}):")
+        for e in errors:
+            logger.error(f"  {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
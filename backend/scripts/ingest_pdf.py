@@ -13,6 +13,7 @@ import argparse
 import logging
 import os
 import sys
+from typing import Optional
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -25,52 +26,39 @@ except ImportError:
     logger.error("pypdf not installed. Run: pip install pypdf")
     sys.exit(1)
 
-from openai import OpenAI
-
-from app.config import settings
 from app.database import SessionLocal
 from app.models.board import Chapter
 from app.models.text_chunk import TextChunk
-
-CHUNK_SIZE = 900      # characters
-CHUNK_OVERLAP = 100   # characters of overlap between adjacent chunks
-BATCH_SIZE = 20       # embeddings per API call
+from app.services.chunker import chunk_pages
+from app.services.embedding_client import EmbeddingClient, embedding_client
+from app.services.pdf_text import iter_pdf_pages
+from app.services.rag_service import RAGService
 
 
 def extract_pages(pdf_path: str) -> list[tuple[int, str]]:
     """Return [(page_number, text), ...] for every non-empty page."""
-    pages = []
-    with open(pdf_path, "rb") as fh:
-        reader = pypdf.PdfReader(fh)
-        for i, page in enumerate(reader.pages, start=1):
-            text = page.extract_text() or ""
-            if text.strip():
-                pages.append((i, text))
-    return pages
-
-
-def chunk_text(text: str) -> list[str]:
-    """Split *text* into overlapping windows of CHUNK_SIZE characters."""
-    chunks = []
-    start = 0
-    while start < len(text):
-        end = start + CHUNK_SIZE
-        snippet = text[start:end].strip()
-        if snippet:
-            chunks.append(snippet)
-        start = end - CHUNK_OVERLAP
-    return chunks
-
-
-def ingest_pdf(pdf_path: str, chapter_id: int) -> None:
+    return [(i, text) for i, text in iter_pdf_pages(pdf_path) if text.strip()]
+
+
+def ingest_pdf(
+    pdf_path: str,
+    chapter_id: int,
+    embedder: Optional[EmbeddingClient] = None,
+) -> int:
+    """Chunk, embed and store *pdf_path* for *chapter_id*; return the chunk count.
+
+    *embedder* is shared by concurrent callers (see bulk_ingest.py) so their
+    combined embedding traffic stays under one rate limiter and one adaptive
+    concurrency window. Defaults to the process-wide client.
+    """
+    embedder = embedder or embedding_client
     db = SessionLocal()
-    client = OpenAI(api_key=settings.OPENAI_API_KEY)
 
     try:
         chapter = db.query(Chapter).filter(Chapter.id == chapter_id).first()
         if not chapter:
             logger.error(f"Chapter id={chapter_id} not found.")
-            return
+            return 0
 
         # Clear existing chunks for a clean re-ingest
         deleted = db.query(TextChunk).filter(TextChunk.chapter_id == chapter_id).delete()
@@ -81,42 +69,38 @@ def ingest_pdf(pdf_path: str, chapter_id: int) -> None:
         pages = extract_pages(pdf_path)
         logger.info(f"Extracted {len(pages)} pages from '{pdf_path}'")
 
-        all_chunks: list[tuple[int, str]] = []
-        for page_num, page_text in pages:
-            for snippet in chunk_text(page_text):
-                all_chunks.append((page_num, snippet))
+        all_chunks = list(chunk_pages(pages))
 
         logger.info(f"Created {len(all_chunks)} text chunks — generating embeddings…")
 
-        global_idx = 0
-        for batch_start in range(0, len(all_chunks), BATCH_SIZE):
-            batch = all_chunks[batch_start : batch_start + BATCH_SIZE]
-            texts = [c[1] for c in batch]
-
-            response = client.embeddings.create(
-                input=texts,
-                model=settings.OPENAI_EMBEDDING_MODEL,
-            )
-
-            for j, (page_num, content) in enumerate(batch):
+        texts = [c.content for c in all_chunks]
+        embedded = 0
+        for start, embeddings in embedder.iter_batches(texts):
+            for chunk, embedding in zip(all_chunks[start:], embeddings):
                 db.add(
                     TextChunk(
                         chapter_id=chapter_id,
-                        content=content,
-                        chunk_index=global_idx,
-                        page_number=page_num,
-                        embedding=response.data[j].embedding,
+                        content=chunk.content,
+                        chunk_index=chunk.chunk_index,
+                        chunk_id=chunk.chunk_id,
+                        page_number=chunk.page_number,
+                        page_end=chunk.page_end,
+                        embedding=embedding,
                     )
                 )
-                global_idx += 1
 
             db.commit()
-            logger.info(f"Progress: {min(batch_start + BATCH_SIZE, len(all_chunks))}/{len(all_chunks)}")
+            embedded += len(embeddings)
+            logger.info(f"Progress: {embedded}/{len(all_chunks)}")
+
+        # Cached RAG contexts and question sets were built from the old chunks.
+        RAGService(db).invalidate_chapter_caches(chapter_id)
 
         logger.info(
-            f"✓ Ingestion complete. {global_idx} chunks stored for chapter {chapter_id} "
+            f"✓ Ingestion complete. {len(all_chunks)} chunks stored for chapter {chapter_id} "
             f"({chapter.chapter_name})."
         )
+        return len(all_chunks)
     except Exception as exc:
         db.rollback()
         logger.error(f"Ingestion failed: {exc}", exc_info=True)
@@ -16,12 +16,32 @@ File Structure Assumption:
           └── ...
 
 Run this script periodically or via a cron job to sync the filesystem state with the DB.
-Usage: python backend/scripts/sync_curriculum.py
+
+The existing hierarchy for the board is read in a single query, diffed against
+the filesystem in memory, and all missing rows are written with batched
+INSERT ... ON CONFLICT statements in one transaction (relying on the unique
+constraints on (board_id, class_number), (class_id, subject_name) and
+(subject_id, chapter_number)). Chapters whose filename has no "chapter N" are
+matched by name and, when new, numbered after the subject's highest chapter.
+
+The board is looked up by --board-code, then by --board-name: a board first
+created through the admin upload API has a code derived from its name (e.g.
+CENTRAL_BOARD_OF_SEC), and is synced into as-is rather than duplicated.
+
+Usage:
+  python backend/scripts/sync_curriculum.py [--dry-run] [--update-names]
+                                            [--root CBSC] [--board-code CBSE]
 """
+import argparse
 import os
 import sys
 import re
 import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 # Add backend directory to path so we can import app modules
@@ -40,63 +60,6 @@ BOARD_NAME = "Central Board of Secondary Education"
 BOARD_CODE = "CBSE"
 
 
-def get_or_create_board(db: Session, name: str, code: str) -> Board:
-    board = db.query(Board).filter(Board.code == code).first()
-    if not board:
-        logger.info(f"Creating Board: {name}")
-        board = Board(name=name, code=code)
-        db.add(board)
-        db.commit()
-        db.refresh(board)
-    return board
-
-
-def get_or_create_class(db: Session, board_id: int, dir_name: str) -> Class:
-    # Expect directory names like "Class 10", "Class 9"
-    # Extract number
-    match = re.search(r'\d+', dir_name)
-    class_num = int(match.group()) if match else 0
-    
-    # Check existing
-    cls = db.query(Class).filter(
-        Class.board_id == board_id, 
-        Class.class_number == class_num
-    ).first()
-    
-    if not cls:
-        logger.info(f"Creating Class: {dir_name} (Number: {class_num})")
-        cls = Class(
-            board_id=board_id,
-            class_number=class_num,
-            display_name=dir_name
-        )
-        db.add(cls)
-        db.commit()
-        db.refresh(cls)
-    return cls
-
-
-def get_or_create_subject(db: Session, class_id: int, subject_name: str) -> Subject:
-    subj = db.query(Subject).filter(
-        Subject.class_id == class_id,
-        Subject.subject_name == subject_name
-    ).first()
-    
-    if not subj:
-        logger.info(f"Creating Subject: {subject_name}")
-        # Create a simple code, e.g., "MATH" from "Mathematics"
-        code = subject_name[:4].upper()
-        subj = Subject(
-            class_id=class_id,
-            subject_name=subject_name,
-            subject_code=code
-        )
-        db.add(subj)
-        db.commit()
-        db.refresh(subj)
-    return subj
-
-
 def parse_chapter_info(filename: str):
     """
     Extract chapter details from filename.
@@ -123,78 +86,303 @@ def parse_chapter_info(filename: str):
     return chapter_name, chapter_num
 
 
-def sync_chapter(db: Session, subject_id: int, filename: str):
-    if not filename.lower().endswith(".pdf"):
-        return
+@dataclass
+class FsChapter:
+    class_number: int
+    class_display: str
+    subject_name: str
+    chapter_number: int      # 0 when the filename carries no number
+    chapter_name: str
+    filename: str
 
-    chapter_name, chapter_num = parse_chapter_info(filename)
-    
-    # Check if chapter exists by number (if clearly identified) or name
-    query = db.query(Chapter).filter(Chapter.subject_id == subject_id)
-    
-    if chapter_num > 0:
-        chapter = query.filter(Chapter.chapter_number == chapter_num).first()
-    else:
-        chapter = query.filter(Chapter.chapter_name == chapter_name).first()
-
-    if not chapter:
-        logger.info(f"Creating Chapter: {chapter_name} (No. {chapter_num})")
-        chapter = Chapter(
-            subject_id=subject_id,
-            chapter_number=chapter_num,
-            chapter_name=chapter_name,
-            description=f"Automatically imported from {filename}",
-            is_active=True
+
+@dataclass
+class SyncDiff:
+    board_exists: bool = True
+    new_classes: Dict[int, str] = field(default_factory=dict)                 # number → display name
+    new_subjects: List[Tuple[int, str]] = field(default_factory=list)        # (class_number, subject)
+    new_chapters: List[FsChapter] = field(default_factory=list)
+    renamed_chapters: List[Tuple[int, str, str]] = field(default_factory=list)  # (id, old, new)
+
+    @property
+    def is_empty(self) -> bool:
+        return (
+            self.board_exists
+            and not self.new_classes
+            and not self.new_subjects
+            and not self.new_chapters
+            and not self.renamed_chapters
         )
-        db.add(chapter)
-        db.commit()
-    else:
-        # Update name if needed (optional)
-        pass
 
+    def report(self, board_code: str) -> List[str]:
+        lines: List[str] = []
+        if not self.board_exists:
+            lines.append(f"+ board   {board_code}")
+        for number, display in sorted(self.new_classes.items()):
+            lines.append(f"+ class   {display} (No. {number})")
+        for class_number, subject in self.new_subjects:
+            lines.append(f"+ subject Class {class_number} / {subject}")
+        for ch in self.new_chapters:
+            lines.append(
+                f"+ chapter Class {ch.class_number} / {ch.subject_name} / "
+                f"{ch.chapter_number}. {ch.chapter_name}"
+            )
+        for chapter_id, old, new in self.renamed_chapters:
+            lines.append(f"~ chapter id={chapter_id}: {old!r} → {new!r}")
+        return lines
+
+
+def scan_tree(root_dir: str) -> List[FsChapter]:
+    """Return one FsChapter per PDF under <root>/<Class N>/<Subject>/."""
+    found: List[FsChapter] = []
+    for class_dir in sorted(os.listdir(root_dir)):
+        class_path = os.path.join(root_dir, class_dir)
+        if not os.path.isdir(class_path) or class_dir.startswith("."):
+            continue
+        # Expect directory names like "Class 10", "Class 9"
+        match = re.search(r'\d+', class_dir)
+        class_number = int(match.group()) if match else 0
+
+        for subject_dir in sorted(os.listdir(class_path)):
+            subject_path = os.path.join(class_path, subject_dir)
+            if not os.path.isdir(subject_path) or subject_dir.startswith("."):
+                continue
+
+            for filename in sorted(os.listdir(subject_path)):
+                if filename.startswith(".") or not filename.lower().endswith(".pdf"):
+                    continue
+                chapter_name, chapter_number = parse_chapter_info(filename)
+                found.append(
+                    FsChapter(class_number, class_dir, subject_dir, chapter_number, chapter_name, filename)
+                )
+    return found
+
+
+def find_board(db: Session, board_name: str, board_code: str) -> Optional[int]:
+    """Id of the board with *board_code*, else of the board named *board_name*.
 
-def sync_curriculum():
-    logger.info(f"Starting sync from root: {CBSC_ROOT_DIR}")
+    Both columns are unique. AdminService creates boards by name with a
+    derived code, so matching on the code alone would miss such a board and
+    the insert would then fail on boards.name.
+    """
+    rows = db.execute(
+        select(Board.id, Board.code, Board.name).where(
+            or_(Board.code == board_code, Board.name == board_name)
+        )
+    ).all()
+    if not rows:
+        return None
+    board_id, code, name = next((r for r in rows if r.code == board_code), rows[0])
+    if code != board_code:
+        logger.info(f"No board with code {board_code}; syncing into board '{name}' (code {code})")
+    return board_id
+
+
+def compute_diff(
+    db: Session,
+    board_id: Optional[int],
+    fs_chapters: List[FsChapter],
+    update_names: bool = False,
+) -> SyncDiff:
+    """Read the board's whole hierarchy in one query and diff it against *fs_chapters*.
+
+    *board_id* is None when the board does not exist yet (see find_board).
+    """
+    rows = [] if board_id is None else db.execute(
+        select(
+            Board.id,
+            Class.class_number,
+            Subject.subject_name,
+            Chapter.id,
+            Chapter.chapter_number,
+            Chapter.chapter_name,
+        )
+        .select_from(Board)
+        .outerjoin(Class, Class.board_id == Board.id)
+        .outerjoin(Subject, Subject.class_id == Class.id)
+        .outerjoin(Chapter, Chapter.subject_id == Subject.id)
+        .where(Board.id == board_id)
+    ).all()
+
+    diff = SyncDiff(board_exists=bool(rows))
+    classes = {r[1] for r in rows if r[1] is not None}
+    subjects = {(r[1], r[2]) for r in rows if r[2] is not None}
+    by_number: Dict[Tuple[int, str, int], Tuple[int, str]] = {}
+    by_name = set()
+    max_number: Dict[Tuple[int, str], int] = {}
+    for _, class_number, subject_name, chapter_id, chapter_number, chapter_name in rows:
+        if chapter_id is None:
+            continue
+        by_number[(class_number, subject_name, chapter_number)] = (chapter_id, chapter_name)
+        by_name.add((class_number, subject_name, chapter_name))
+        key = (class_number, subject_name)
+        max_number[key] = max(max_number.get(key, 0), chapter_number)
+
+    for ch in fs_chapters:
+        key = (ch.class_number, ch.subject_name)
+        if ch.chapter_number > 0:
+            max_number[key] = max(max_number.get(key, 0), ch.chapter_number)
+
+    for ch in fs_chapters:
+        key = (ch.class_number, ch.subject_name)
+        if ch.class_number not in classes:
+            diff.new_classes.setdefault(ch.class_number, ch.class_display)
+        if key not in subjects and key not in diff.new_subjects:
+            diff.new_subjects.append(key)
+
+        if ch.chapter_number > 0:
+            existing = by_number.get((ch.class_number, ch.subject_name, ch.chapter_number))
+            if existing is None:
+                diff.new_chapters.append(ch)
+            elif update_names and existing[1] != ch.chapter_name:
+                diff.renamed_chapters.append((existing[0], existing[1], ch.chapter_name))
+        elif (ch.class_number, ch.subject_name, ch.chapter_name) not in by_name:
+            # Unnumbered file (appendix, answers…): append after the last chapter.
+            max_number[key] = max_number.get(key, 0) + 1
+            ch.chapter_number = max_number[key]
+            diff.new_chapters.append(ch)
+
+    return diff
+
+
+def apply_diff(
+    db: Session, diff: SyncDiff, board_id: Optional[int], board_name: str, board_code: str
+) -> None:
+    """Write *diff* with batched upserts. The caller owns the transaction.
+
+    The board is created only when *board_id* is None.
+    """
+    if board_id is None:
+        board_id = db.execute(
+            insert(Board)
+            .values(name=board_name, code=board_code)
+            .on_conflict_do_update(index_elements=[Board.code], set_={"code": board_code})
+            .returning(Board.id)
+        ).scalar_one()
+
+    if diff.new_classes:
+        db.execute(
+            insert(Class)
+            .values(
+                [
+                    {"board_id": board_id, "class_number": number, "display_name": display}
+                    for number, display in diff.new_classes.items()
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=[Class.board_id, Class.class_number])
+        )
+    class_ids = dict(
+        db.execute(select(Class.class_number, Class.id).where(Class.board_id == board_id)).all()
+    )
+
+    if diff.new_subjects:
+        db.execute(
+            insert(Subject)
+            .values(
+                [
+                    {
+                        "class_id": class_ids[class_number],
+                        "subject_name": subject,
+                        # Create a simple code, e.g., "MATH" from "Mathematics"
+                        "subject_code": subject[:4].upper(),
+                    }
+                    for class_number, subject in diff.new_subjects
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=[Subject.class_id, Subject.subject_name])
+        )
+    subject_ids = {
+        (class_number, subject_name): subject_id
+        for class_number, subject_name, subject_id in db.execute(
+            select(Class.class_number, Subject.subject_name, Subject.id)
+            .join(Subject, Subject.class_id == Class.id)
+            .where(Class.board_id == board_id)
+        ).all()
+    }
+
+    if diff.new_chapters:
+        db.execute(
+            insert(Chapter)
+            .values(
+                [
+                    {
+                        "subject_id": subject_ids[(ch.class_number, ch.subject_name)],
+                        "chapter_number": ch.chapter_number,
+                        "chapter_name": ch.chapter_name,
+                        "description": f"Automatically imported from {ch.filename}",
+                        "is_active": True,
+                        "status": "ready",
+                    }
+                    for ch in diff.new_chapters
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=[Chapter.subject_id, Chapter.chapter_number])
+        )
+
+    if diff.renamed_chapters:
+        db.execute(
+            update(Chapter),
+            [{"id": chapter_id, "chapter_name": new} for chapter_id, _, new in diff.renamed_chapters],
+        )
+
+
+def sync_curriculum(
+    root_dir: str = CBSC_ROOT_DIR,
+    board_name: str = BOARD_NAME,
+    board_code: str = BOARD_CODE,
+    dry_run: bool = False,
+    update_names: bool = False,
+) -> Optional[SyncDiff]:
+    logger.info(f"Starting sync from root: {root_dir}")
     
-    if not os.path.exists(CBSC_ROOT_DIR):
-        logger.error(f"Directory not found: {CBSC_ROOT_DIR}")
-        return
+    if not os.path.exists(root_dir):
+        logger.error(f"Directory not found: {root_dir}")
+        return None
 
     db = SessionLocal()
     
     try:
-        # 1. Ensure Board Exists
-        board = get_or_create_board(db, BOARD_NAME, BOARD_CODE)
-        
-        # 2. Iterate Classes (Directories in CBSC root)
-        for class_dir in os.listdir(CBSC_ROOT_DIR):
-            class_path = os.path.join(CBSC_ROOT_DIR, class_dir)
-            if not os.path.isdir(class_path) or class_dir.startswith("."):
-                continue
-                
-            cls = get_or_create_class(db, board.id, class_dir)
-            
-            # 3. Iterate Subjects (Directories in Class folder)
-            for subject_dir in os.listdir(class_path):
-                subject_path = os.path.join(class_path, subject_dir)
-                if not os.path.isdir(subject_path) or subject_dir.startswith("."):
-                    continue
-                    
-                subj = get_or_create_subject(db, cls.id, subject_dir)
-                
-                # 4. Iterate Chapters (PDF files in Subject folder)
-                for chapter_file in os.listdir(subject_path):
-                    if chapter_file.startswith("."):
-                        continue
-                    sync_chapter(db, subj.id, chapter_file)
-                    
-        logger.info("Sync completed successfully.")
+        fs_chapters = scan_tree(root_dir)
+        board_id = find_board(db, board_name, board_code)
+        diff = compute_diff(db, board_id, fs_chapters, update_names=update_names)
+
+        for line in diff.report(board_code):
+            logger.info(line)
+        if diff.is_empty:
+            logger.info(f"Already in sync ({len(fs_chapters)} chapter PDFs).")
+            return diff
+        if dry_run:
+            logger.info("DRY RUN — no changes written.")
+            db.rollback()
+            return diff
+
+        apply_diff(db, diff, board_id, board_name, board_code)
+        db.commit()
+        logger.info(
+            f"Sync completed successfully: +{len(diff.new_classes)} classes, "
+            f"+{len(diff.new_subjects)} subjects, +{len(diff.new_chapters)} chapters, "
+            f"{len(diff.renamed_chapters)} renamed."
+        )
+        return diff
 
     except Exception as e:
+        db.rollback()
         logger.error(f"Sync failed: {e}", exc_info=True)
+        return None
     finally:
         db.close()
 
 
 if __name__ == "__main__":
-    sync_curriculum()
+    parser = argparse.ArgumentParser(description="Sync a curriculum PDF tree into the database")
+    parser.add_argument("--root", default=CBSC_ROOT_DIR)
+    parser.add_argument("--board-code", default=BOARD_CODE)
+    parser.add_argument("--board-name", default=BOARD_NAME)
+    parser.add_argument("--dry-run", action="store_true", help="Print the diff without writing")
+    parser.add_argument(
+        "--update-names",
+        action="store_true",
+        help="Rename existing chapters whose name differs from the PDF filename",
+    )
+    args = parser.parse_args()
+    sync_curriculum(args.root, args.board_name, args.board_code, args.dry_run, args.update_names)
@@ -11,7 +11,7 @@ import {
 import { LoadingSpinner } from '@/components/ui/LoadingSpinner'
 import { useAuthStore } from '@/store/authStore'
 import { usageApi, testsApi } from '@/lib/api'
-import type { UsageStatus, GeneratedTest } from '@/types'
+import type { UsageStatus, TestSummary } from '@/types'
 import { formatDate } from '@/lib/utils'
 import { Badge } from '@/components/ui/Badge'
 import { Button } from '@/components/ui/Button'
@@ -28,12 +28,12 @@ const SUBJECTS = [
 export default function DashboardPage() {
   const { user } = useAuthStore()
   const [usage, setUsage] = useState<UsageStatus | null>(null)
-  const [recentTests, setRecentTests] = useState<GeneratedTest[]>([])
+  const [recentTests, setRecentTests] = useState<TestSummary[]>([])
   const [loading, setLoading] = useState(true)
 
   useEffect(() => {
-    Promise.all([usageApi.get(), testsApi.list(0, 5)])
-      .then(([u, t]) => { setUsage(u); setRecentTests(t) })
+    Promise.all([usageApi.get(), testsApi.history(5)])
+      .then(([u, t]) => { setUsage(u); setRecentTests(t.items) })
       .catch(() => { /* backend not running — still show UI */ })
       .finally(() => setLoading(false))
   }, [])
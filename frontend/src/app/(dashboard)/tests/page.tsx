@@ -6,18 +6,32 @@ import { Header } from '@/components/layout/Header'
 import { Button } from '@/components/ui/Button'
 import { LoadingSpinner } from '@/components/ui/LoadingSpinner'
 import { testsApi } from '@/lib/api'
-import type { GeneratedTest } from '@/types'
+import type { TestSummary } from '@/types'
 import { formatDateTime } from '@/lib/utils'
 import { FileText, ArrowRight, Zap, Clock, BookOpen, Target } from 'lucide-react'
 
 export default function TestsPage() {
-  const [tests, setTests] = useState<GeneratedTest[]>([])
+  const [tests, setTests] = useState<TestSummary[]>([])
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
   const [loading, setLoading] = useState(true)
+  const [loadingMore, setLoadingMore] = useState(false)
 
   useEffect(() => {
-    testsApi.list(0, 50).then(setTests).catch(() => {}).finally(() => setLoading(false))
+    testsApi.history(50)
+      .then((page) => { setTests(page.items); setNextCursor(page.next_cursor) })
+      .catch(() => {})
+      .finally(() => setLoading(false))
   }, [])
 
+  const loadMore = () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    testsApi.history(50, nextCursor)
+      .then((page) => { setTests((prev) => [...prev, ...page.items]); setNextCursor(page.next_cursor) })
+      .catch(() => {})
+      .finally(() => setLoadingMore(false))
+  }
+
   const attempted = tests.filter(t => t.score !== null).length
   const avgScore = attempted > 0
     ? tests.filter(t => t.score !== null).reduce((a, t) => a + t.score!, 0) / attempted
@@ -66,6 +80,14 @@ export default function TestsPage() {
             <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 gap-4">
               {tests.map((test) => <TestCard key={test.id} test={test} />)}
             </div>
+
+            {nextCursor && (
+              <div className="flex justify-center mt-6">
+                <Button variant="secondary" onClick={loadMore} loading={loadingMore}>
+                  Load older tests
+                </Button>
+              </div>
+            )}
           </>
         )}
       </div>
@@ -73,8 +95,8 @@ export default function TestsPage() {
   )
 }
 
-function TestCard({ test }: { test: GeneratedTest }) {
-  const questionCount = test.questions_json?.questions?.length ?? 0
+function TestCard({ test }: { test: TestSummary }) {
+  const questionCount = test.num_questions
   const score = test.score
   const scoreColor = score === null ? '' : score >= 80 ? 'text-emerald-400' : score >= 50 ? 'text-amber-400' : 'text-red-400'
   const scoreBorder = score === null ? 'border-amber-400/20 text-amber-400' : score >= 80 ? 'border-emerald-500/20 bg-emerald-500/10' : score >= 50 ? 'border-amber-400/20 bg-amber-400/10' : 'border-red-500/20 bg-red-500/10'
@@ -1,10 +1,12 @@
 import type {
   AdminChapter,
   Board,
+  ChapterPreparation,
   ChapterSummary,
   GeneratedTest,
   IngestionJob,
   SubmitTestResponse,
+  TestHistoryPage,
   UsageStatus,
   User,
 } from '@/types'
@@ -55,11 +57,11 @@ async function getToken(): Promise<string | null> {
   return session?.access_token ?? null
 }
 
-async function request<T>(
+async function send(
   method: string,
   path: string,
   options: { body?: unknown } = {},
-): Promise<T> {
+): Promise<Response> {
   const baseUrl = resolveBaseUrl()
   const token = await getToken()
   const headers: Record<string, string> = {
@@ -86,9 +88,56 @@ async function request<T>(
     throw new ApiError(res.status, payload.detail ?? 'Request failed')
   }
 
+  return res
+}
+
+async function request<T>(
+  method: string,
+  path: string,
+  options: { body?: unknown } = {},
+): Promise<T> {
+  const res = await send(method, path, options)
   return res.json() as Promise<T>
 }
 
+const PREPARATION_TIMEOUT_MS = 10 * 60 * 1000
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms))
+
+/**
+ * Like request(), for endpoints that answer 202 while the chapter's
+ * embeddings are generated in the background: polls the chapter's
+ * preparation status until it is ready, then repeats the original request.
+ */
+async function requestWhenReady<T>(
+  method: string,
+  path: string,
+  options: { body?: unknown } = {},
+): Promise<T> {
+  const deadline = Date.now() + PREPARATION_TIMEOUT_MS
+  for (;;) {
+    const res = await send(method, path, options)
+    if (res.status !== 202) {
+      return res.json() as Promise<T>
+    }
+
+    let preparation = (await res.json()) as ChapterPreparation
+    const delayMs = Number(res.headers.get('Retry-After') ?? 5) * 1000
+    while (!preparation.ready) {
+      if (preparation.job_status === 'failed') {
+        throw new ApiError(502, preparation.error_message ?? 'Chapter preparation failed. Please retry.')
+      }
+      if (Date.now() > deadline) {
+        throw new ApiError(504, 'Chapter is still being prepared. Please try again in a few minutes.')
+      }
+      await sleep(delayMs)
+      preparation = await request<ChapterPreparation>(
+        'GET',
+        `/boards/chapters/${preparation.chapter_id}/preparation`,
+      )
+    }
+  }
+}
+
 async function requestFormData<T>(path: string, formData: FormData): Promise<T> {
   const baseUrl = resolveBaseUrl()
   const token = await getToken()
@@ -132,20 +181,29 @@ export const boardsApi = {
   getChapter: (chapterId: number) =>
     request<any>('GET', `/boards/chapters/${chapterId}`),
   generateSummary: (chapterId: number) =>
-    request<ChapterSummary>('POST', `/boards/chapters/${chapterId}/summary`),
+    requestWhenReady<ChapterSummary>('POST', `/boards/chapters/${chapterId}/summary`),
+  getPreparation: (chapterId: number) =>
+    request<ChapterPreparation>('GET', `/boards/chapters/${chapterId}/preparation`),
 }
 
 // ── Tests ─────────────────────────────────────────────────────────────────────
 
 export const testsApi = {
   generate: (chapterId: number, numQuestions: number) =>
-    request<GeneratedTest>('POST', '/tests/generate', {
+    requestWhenReady<GeneratedTest>('POST', '/tests/generate', {
       body: { chapter_id: chapterId, num_questions: numQuestions },
     }),
 
   list: (skip = 0, limit = 20) =>
     request<GeneratedTest[]>('GET', `/tests?skip=${skip}&limit=${limit}`),
 
+  // Summaries only (no questions), newest first; pass next_cursor for older pages.
+  history: (limit = 20, cursor?: string | null) =>
+    request<TestHistoryPage>(
+      'GET',
+      `/tests/history?limit=${limit}${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`,
+    ),
+
   get: (testId: number) =>
     request<GeneratedTest>('GET', `/tests/${testId}`),
 
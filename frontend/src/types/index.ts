@@ -29,6 +29,17 @@ export interface ChapterSummary {
   summary: string
 }
 
+export interface ChapterPreparation {
+  chapter_id: number
+  ready: boolean
+  chapter_status: string
+  job_id: string | null
+  job_status: 'pending' | 'processing' | 'completed' | 'failed' | null
+  total_chunks: number | null
+  embedded_chunks: number
+  error_message: string | null
+}
+
 export interface Subject {
   id: number
   subject_name: string
@@ -85,6 +96,22 @@ export interface GeneratedTest {
   created_at: string
 }
 
+export interface TestSummary {
+  id: number
+  chapter_id: number | null
+  chapter_name: string | null
+  subject_name: string | null
+  num_questions: number
+  score: number | null
+  completed_at: string | null
+  created_at: string
+}
+
+export interface TestHistoryPage {
+  items: TestSummary[]
+  next_cursor: string | null
+}
+
 export interface AnswerDetail {
   question_id: number
   question: string
@@ -132,6 +159,9 @@ export interface IngestionJob {
   chapter_id: number | null
   status: 'pending' | 'processing' | 'completed' | 'failed'
   error_message: string | null
+  total_chunks: number | null
+  embedded_chunks: number
+  attempts: number
   started_at: string | null
   completed_at: string | null
   created_at: string
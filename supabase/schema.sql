@@ -24,7 +24,8 @@ create table if not exists public.classes (
   class_number integer not null,
   display_name varchar(100) not null,
   is_active    boolean default true not null,
-  created_at   timestamptz default now()
+  created_at   timestamptz default now(),
+  constraint uq_class_board_number unique (board_id, class_number)
 );
 
 -- ── 4. Subjects ──────────────────────────────────────────────
@@ -34,7 +35,8 @@ create table if not exists public.subjects (
   subject_name varchar(100) not null,
   subject_code varchar(20),
   is_active    boolean default true not null,
-  created_at   timestamptz default now()
+  created_at   timestamptz default now(),
+  constraint uq_subject_class_name unique (class_id, subject_name)
 );
 
 -- ── 5. Chapters ──────────────────────────────────────────────
@@ -49,7 +51,8 @@ create table if not exists public.chapters (
                    check (status in ('pending','processing','ready','failed')),
   pdf_s3_key     text,
   error_message  text,
-  created_at     timestamptz default now()
+  created_at     timestamptz default now(),
+  constraint uq_chapter_subject_number unique (subject_id, chapter_number)
 );
 
 -- ── 6. Profiles (linked to Supabase Auth) ────────────────────
@@ -72,7 +75,9 @@ create table if not exists public.text_chunks (
   chapter_id  integer references public.chapters(id) on delete cascade not null,
   content     text not null,
   chunk_index integer not null,
-  page_number integer,
+  chunk_id    varchar(16),              -- content hash from the chunker, stable across re-ingestion
+  page_number integer,                  -- first page of the chunk
+  page_end    integer,                  -- last page (chunks may span pages)
   embedding   vector(1536),
   created_at  timestamptz default now()
 );
@@ -84,27 +89,43 @@ create index if not exists idx_text_chunks_embedding
   with (lists = 100);
 
 -- ── 8. Generated Tests ───────────────────────────────────────
-create table if not exists public.generated_tests (
+-- Immutable question sets, addressed by sha256 of their canonical JSON;
+-- every test and cache entry with the same questions shares one row.
+create table if not exists public.question_sets (
   id             serial primary key,
-  user_id        uuid references public.profiles(id) on delete cascade not null,
-  chapter_id     integer references public.chapters(id) on delete set null,
+  content_hash   varchar(64) not null unique,
+  num_questions  integer not null,
   questions_json jsonb not null,
-  score          float,
-  completed_at   timestamptz,
-  created_at     timestamptz default now()
+  created_at     timestamptz default now() not null
+);
+
+create table if not exists public.generated_tests (
+  id              serial primary key,
+  user_id         uuid references public.profiles(id) on delete cascade not null,
+  chapter_id      integer references public.chapters(id) on delete set null,
+  question_set_id integer references public.question_sets(id) not null,
+  num_questions   integer not null default 0,   -- question set size, for listings
+  answers         jsonb,                        -- {"<question id>": "A", ...}, set on submission
+  score           float,
+  completed_at    timestamptz,
+  created_at      timestamptz default now()
 );
 
 create index if not exists idx_generated_tests_user_id    on public.generated_tests(user_id);
 create index if not exists idx_generated_tests_chapter_id on public.generated_tests(chapter_id);
+create index if not exists ix_generated_tests_question_set_id on public.generated_tests(question_set_id);
+-- Keyset pagination of GET /tests/history: (created_at, id) < cursor, newest first
+create index if not exists ix_generated_tests_user_created
+  on public.generated_tests(user_id, created_at desc, id desc);
 
 -- ── 9. Question Cache ────────────────────────────────────────
 create table if not exists public.question_cache (
-  id             serial primary key,
-  chapter_id     integer references public.chapters(id) on delete cascade not null,
-  num_questions  integer not null,
-  questions_json jsonb not null,
-  created_at     timestamptz default now(),
-  expires_at     timestamptz not null,
+  id              serial primary key,
+  chapter_id      integer references public.chapters(id) on delete cascade not null,
+  num_questions   integer not null,
+  question_set_id integer references public.question_sets(id) on delete cascade not null,
+  created_at      timestamptz default now(),
+  expires_at      timestamptz not null,
   unique(chapter_id, num_questions)
 );
 
@@ -132,6 +153,10 @@ create table if not exists public.ingestion_jobs (
                   check (status in ('pending','processing','completed','failed')),
   pdf_s3_key    text not null,
   error_message text,
+  chunks_json   jsonb,                       -- extraction checkpoint, cleared on completion
+  total_chunks  integer,
+  embedded_chunks integer default 0 not null,
+  attempts      integer default 0 not null,
   started_at    timestamptz,
   completed_at  timestamptz,
   created_at    timestamptz default now()
@@ -139,7 +164,48 @@ create table if not exists public.ingestion_jobs (
 
 create index if not exists idx_ingestion_jobs_chapter_id on public.ingestion_jobs(chapter_id);
 
--- ── 12. Auto-create profile on signup ────────────────────────
+-- ── 12. Performance Aggregates ───────────────────────────────
+-- Updated incrementally by submit_test (in the submission's transaction);
+-- averages are score_sum / attempts.
+create table if not exists public.user_chapter_stats (
+  user_id           uuid references public.profiles(id) on delete cascade not null,
+  chapter_id        integer references public.chapters(id) on delete cascade not null,
+  attempts          integer default 0 not null,
+  score_sum         float default 0 not null,
+  best_score        float,
+  last_score        float,
+  questions_total   integer default 0 not null,
+  questions_correct integer default 0 not null,
+  last_attempt_at   timestamptz,
+  primary key (user_id, chapter_id)
+);
+
+create table if not exists public.chapter_stats (
+  chapter_id        integer primary key references public.chapters(id) on delete cascade,
+  attempts          integer default 0 not null,
+  students          integer default 0 not null,   -- distinct users with an attempt
+  score_sum         float default 0 not null,
+  questions_total   integer default 0 not null,
+  questions_correct integer default 0 not null,
+  last_attempt_at   timestamptz
+);
+
+create table if not exists public.question_stats (
+  question_set_id integer references public.question_sets(id) on delete cascade not null,
+  question_id     integer not null,             -- the "id" inside questions_json
+  presented       integer default 0 not null,
+  answered        integer default 0 not null,
+  correct         integer default 0 not null,
+  -- Item calibration (calibrate_items task); null until enough submissions
+  difficulty      float,                        -- 1 - share correct: 0 easy … 1 hard
+  discrimination  float,                        -- corrected item–total correlation
+  distractors     jsonb,                        -- per option: {"share": .., "r": ..}
+  calibrated_responses integer,
+  calibrated_at   timestamptz,
+  primary key (question_set_id, question_id)
+);
+
+-- ── 13. Auto-create profile on signup ────────────────────────
 create or replace function public.handle_new_user()
 returns trigger as $$
 begin
@@ -159,7 +225,7 @@ create trigger on_auth_user_created
   after insert on auth.users
   for each row execute function public.handle_new_user();
 
--- ── 13. Row Level Security ───────────────────────────────────
+-- ── 14. Row Level Security ───────────────────────────────────
 -- Profiles: users see/update only their own row
 alter table public.profiles enable row level security;
 
@@ -195,7 +261,7 @@ create policy "Users can view own usage"
 -- NOTE: The FastAPI backend uses the SERVICE ROLE KEY which bypasses all RLS.
 -- All backend writes (tests, usage, profiles) go through the service role.
 
--- ── 14. Seed: CBSE Class 10 Mathematics ─────────────────────
+-- ── 15. Seed: CBSE Class 10 Mathematics ─────────────────────
 -- (Safe to re-run — uses ON CONFLICT DO NOTHING)
 insert into public.boards (name, code, description)
 values ('CBSE', 'CBSE', 'Central Board of Secondary Education')